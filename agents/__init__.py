@@ -1 +1 @@
-﻿# Agents module
+﻿# Agents module
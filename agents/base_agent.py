@@ -0,0 +1,115 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from smolagents.models import MessageRole
+
+from utils.agent_executor import executors
+from utils.cassette import CassetteModel, get_cassette
+from utils.llm_cache import CachedModel, cache_enabled_for, get_llm_cache
+from utils.metrics import AGENT_RUN_SECONDS, MeteredModel
+from utils.rate_limiter import (
+    DEFAULT_COMPLETION_TOKENS,
+    RateLimitedModel,
+    TokenBucketRateLimiter,
+    completion_budget
+)
+from utils.resilience import ResilientModel, get_circuit_breaker
+from utils.tracing import TracedModel, tracer
+
+logger = logging.getLogger(__name__)
+
+# "agentic" runs prompts through a CodeAgent; "direct" sends them as a single completion
+EXECUTION_MODES = ("agentic", "direct")
+DEFAULT_EXECUTION_MODE = os.getenv("AGENT_EXECUTION_MODE", "agentic")
+# Gemini-compatible server to send model calls to instead of Google's API, e.g. benchmarks.gemini_server
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE")
+
+
+def execution_mode_for(agent_name: str) -> str:
+    """Execution mode from <NAME>_EXECUTION_MODE or AGENT_EXECUTION_MODE"""
+    mode = os.getenv(f"{agent_name.upper()}_EXECUTION_MODE", DEFAULT_EXECUTION_MODE).strip().lower()
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown execution mode for {agent_name}: {mode}")
+    return mode
+
+
+class BaseAgent:
+    """Shared execution plumbing for the content agents"""
+
+    name = "agent"
+    # Agents whose prompts need no tools can skip the CodeAgent loop
+    supports_direct = False
+
+    def __init__(self, api_key: str, rate_limiter: Optional[TokenBucketRateLimiter] = None):
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(name=self.name)
+        self.executor = executors.get(self.name)
+        self.mode = "agentic"
+        self.set_mode(execution_mode_for(self.name))
+
+    def set_mode(self, mode: str):
+        """Switch between agentic and direct execution"""
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        if mode == "direct" and not self.supports_direct:
+            logger.warning(f"{self.name} agent relies on its tools; staying in agentic mode")
+            return
+        self.mode = mode
+
+    def _wrap_model(self, model: Any) -> Any:
+        """Wrap the agent's model in the cassette, metering, tracing, rate limiting, retry and cache layers"""
+        model_id = str(getattr(model, "model_id", ""))
+        if GEMINI_API_BASE and model_id.startswith("gemini/"):
+            # LiteLLM appends only ":generateContent" to a custom Gemini base, so the base names the model
+            model.api_base = f"{GEMINI_API_BASE.rstrip('/')}/v1beta/models/{model_id.split('/', 1)[1]}"
+        cassette = get_cassette()
+        if cassette is not None:
+            model = CassetteModel(model, cassette, self.name)
+        model = RateLimitedModel(TracedModel(MeteredModel(model, self.name), self.name), self.rate_limiter)
+        # One breaker per API key, like the rate limiter, named after it in logs and metrics
+        model = ResilientModel(model, get_circuit_breaker(self.api_key, self.rate_limiter.name), self.name)
+        if cache_enabled_for(self.name):
+            logger.info(f"LLM response cache enabled for {self.name}")
+            model = CachedModel(model, get_llm_cache(), self.name)
+        return model
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """Cache hit/miss counters, or None when caching is off for this agent"""
+        if isinstance(self.model, CachedModel):
+            return self.model.stats()
+        return None
+
+    def _create_agent(self):
+        """Build a fresh CodeAgent; each run gets its own so runs never share memory"""
+        raise NotImplementedError
+
+    async def _run_agent(self, prompt: str, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> Any:
+        """Run a prompt on this agent's executor; each model call it makes is rate limited"""
+        if self.mode == "direct":
+            return await self._run_completion(prompt, completion_tokens)
+        completion_budget.set(completion_tokens)
+        with AGENT_RUN_SECONDS.time(agent=self.name, mode="agentic"), \
+                tracer.span("agent.run", kind="agent", agent=self.name, mode="agentic", prompt_chars=len(prompt)):
+            return await self.executor.run(self._run_code_agent, prompt)
+
+    def _run_code_agent(self, prompt: str) -> Any:
+        """Build a CodeAgent and run the prompt on it, both on the executor thread
+
+        Building one renders its system prompt and validates its tools, which
+        is too slow to do on the event loop.
+        """
+        return self._create_agent().run(prompt)
+
+    async def _run_completion(self, prompt: str, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> str:
+        """Send a prompt as a single completion on this agent's executor, whatever the execution mode"""
+        completion_budget.set(completion_tokens)
+        with AGENT_RUN_SECONDS.time(agent=self.name, mode="completion"), \
+                tracer.span("agent.run", kind="agent", agent=self.name, mode="completion", prompt_chars=len(prompt)):
+            return await self.executor.run(self._complete, prompt)
+
+    def _complete(self, prompt: str) -> str:
+        """Send the prompt to the model as a single completion and return its text"""
+        message = {"role": MessageRole.USER, "content": [{"type": "text", "text": prompt}]}
+        response = self.model([message])
+        return str(getattr(response, "content", response) or "").strip()
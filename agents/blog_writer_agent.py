@@ -1,13 +1,31 @@
 
+import os
 import asyncio
 import logging
-from typing import Dict, List, Any
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Tuple
 from smolagents import CodeAgent, LiteLLMModel, tool
 from datetime import datetime
-import json
-import time
+
+from agents.base_agent import BaseAgent
+from utils.passage_index import PassageIndex
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.research_digest import research_context
+from utils.tracing import trace_agent_step, trace_tools
+
 logger = logging.getLogger(__name__)
 
+# Blogs written at the same time
+BLOG_CONCURRENCY = int(os.getenv("BLOG_CONCURRENCY", "3"))
+
+# Blogs written for each spreadsheet topic
+BLOGS_PER_ROW = int(os.getenv("BLOGS_PER_ROW", "1"))
+
+# Prompt tokens of research given to each blog post
+BLOG_RESEARCH_TOKENS = int(os.getenv("BLOG_RESEARCH_TOKENS", "1500"))
+
+# Research passages retrieved for each blog post when a research index is available
+BLOG_RESEARCH_PASSAGES = int(os.getenv("BLOG_RESEARCH_PASSAGES", "8"))
+
 @tool
 def create_visual_metaphor(concept: str) -> str:
     """
@@ -33,49 +51,82 @@ def structure_explanation(topic: str, complexity_level: int) -> Dict[str, Any]:
         "summary": "Key takeaways"
     }
 
-class BlogWriterAgent:
+class BlogWriterAgent(BaseAgent):
     """The Illuminator - Creates clear, insightful blog posts"""
     
-    def __init__(self, api_key: str):
-        self.model = LiteLLMModel(
+    name = "blog_writer"
+    supports_direct = True
+    
+    def __init__(self, api_key: str, rate_limiter: Optional[TokenBucketRateLimiter] = None):
+        super().__init__(api_key, rate_limiter)
+        self.concurrency = BLOG_CONCURRENCY
+        self.blogs_per_topic = BLOGS_PER_ROW
+        self.research_tokens = BLOG_RESEARCH_TOKENS
+        self.research_passages = BLOG_RESEARCH_PASSAGES
+        self.model = self._wrap_model(LiteLLMModel(
             model_id="gemini/gemini-2.0-flash-exp",
             api_key=api_key
-        )
-        
-        self.agent = CodeAgent(
-            tools=[create_visual_metaphor, structure_explanation],
-            model=self.model
+        ))
+    
+    def _create_agent(self) -> CodeAgent:
+        """Build a fresh CodeAgent for a single run"""
+        return CodeAgent(
+            tools=trace_tools([create_visual_metaphor, structure_explanation]),
+            model=self.model,
+            step_callbacks=[trace_agent_step]
         )
     
-    async def write_blogs(self, research_data: Dict[str, Any], spreadsheet_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Generate 3 blog posts from research data"""
-        try:
-            logger.info("Starting blog post generation...")
-            
-            blog_posts = []
-            
-            # Extract topics for 3 blog posts
-            topics = []
-            for item in spreadsheet_data[:3]:  # First 3 topics
-                if item.get("topic"):
-                    topics.append(item["topic"])
-            
-            # Ensure we have 3 topics
-            while len(topics) < 3:
-                topics.append(f"AI Innovation Topic {len(topics) + 1}")
-            
-            # Generate each blog post
-            for i, topic in enumerate(topics):
-                time.sleep(64)
-                blog_prompt = f"""
+    def select_topics(self, spreadsheet_data: List[Dict[str, Any]]) -> List[str]:
+        """Every distinct topic in the spreadsheet, in row order"""
+        topics = (str(item.get("topic") or "").strip() for item in spreadsheet_data)
+        return list(dict.fromkeys(topic for topic in topics if topic))
+    
+    def plan_blogs(self, topics: List[str], first_topic_index: int = 0) -> List[Tuple[int, str]]:
+        """(blog index, topic) for every blog to write; indexes stay unique across batches of topics"""
+        return [
+            ((first_topic_index + position) * self.blogs_per_topic + variant, topic)
+            for position, topic in enumerate(topics)
+            for variant in range(self.blogs_per_topic)
+        ]
+    
+    def blog_id(self, index: int) -> str:
+        """Id of the blog post with the given blog index"""
+        return f"blog_{index+1}"
+    
+    def topic_research(self, research_data: Optional[Dict[str, Any]], topic: str) -> Dict[str, Any]:
+        """The research findings for one topic, or an empty dict if it was not researched"""
+        research_data = research_data or {}
+        if "topics" not in research_data:
+            # Research checkpointed before it was split per topic
+            return research_data
+        return research_data["topics"].get(topic) or {}
+    
+    def select_passages(self, research_index: PassageIndex, topic: str,
+                        topic_research: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The topic's research passages that best match its description and keywords"""
+        query = " ".join([topic, str(topic_research.get("description") or ""), str(topic_research.get("keywords") or "")])
+        return research_index.search(query, self.research_passages, topic=topic)
+    
+    def _angle_hint(self, index: int) -> str:
+        """Steers blogs sharing a topic towards different angles"""
+        if self.blogs_per_topic <= 1:
+            return ""
+        variant = index % self.blogs_per_topic
+        return f"This is post {variant + 1} of {self.blogs_per_topic} on this topic; take an angle the other posts would not."
+    
+    async def write_blog(self, index: int, topic: str, topic_research: Dict[str, Any],
+                         passages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Generate a single blog post for one topic from that topic's research or its retrieved passages"""
+        blog_prompt = f"""
                 You are The Illuminator, a patient and empathetic explainer who creates exceptional blog posts.
                 
                 Your personality: You possess innate curiosity and an urgent drive to convey understanding. You're optimistic about readers' ability to grasp complex ideas with the right guidance. Your output is warm, inviting, and designed to inspire "aha!" moments.
                 
                 Create an exceptional blog post about: {topic}
+                {self._angle_hint(index)}
                 
-                Using this research data:
-                {json.dumps(research_data, indent=2)[:2000]}
+                Using this research:
+                {research_context(topic_research, self.research_tokens, passages)}
                 
                 Requirements:
                 1. Title: Compelling and clear
@@ -88,29 +139,92 @@ class BlogWriterAgent:
                 Make it approximately 1000 words, engaging, and insightful.
                 Focus on creating "aha!" moments and genuine understanding.
                 """
-                
-                blog_content = await asyncio.to_thread(
-                    self.agent.run,
-                    blog_prompt
-                )
-                
-                blog_post = {
-                    "id": f"blog_{i+1}",
-                    "topic": topic,
-                    "title": f"Illuminating {topic}: A Journey to Understanding",
-                    "content": str(blog_content),
-                    "word_count": len(str(blog_content).split()),
-                    "created_at": datetime.now().isoformat(),
-                    "metadata": {
-                        "target_audience": "Technical professionals and enthusiasts",
-                        "reading_time": f"{len(str(blog_content).split()) // 200} minutes",
-                        "key_concepts": ["AI", "Innovation", "Practical Applications"]
-                    }
-                }
-                
-                blog_posts.append(blog_post)
-                time.sleep(65)
-                logger.info(f"Generated blog post {i+1} of 3")
+        
+        blog_content = await self._run_agent(blog_prompt)
+        
+        return {
+            "id": self.blog_id(index),
+            "topic": topic,
+            "title": f"Illuminating {topic}: A Journey to Understanding",
+            "content": str(blog_content),
+            "word_count": len(str(blog_content).split()),
+            "created_at": datetime.now().isoformat(),
+            "metadata": {
+                "target_audience": "Technical professionals and enthusiasts",
+                "reading_time": f"{len(str(blog_content).split()) // 200} minutes",
+                "key_concepts": ["AI", "Innovation", "Practical Applications"]
+            }
+        }
+    
+    async def iter_blogs(self, plan: List[Tuple[int, str]], research_data: Optional[Dict[str, Any]],
+                         completed: Optional[Dict[str, Dict[str, Any]]] = None,
+                         research_index: Optional[PassageIndex] = None,
+                         on_error: Optional[Callable[[int, str, Exception], Any]] = None
+                         ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Write the planned blogs concurrently, yielding (blog index, blog) as each one finishes
+        
+        At most `concurrency` blogs are in flight; the next one starts only
+        when one finishes, so a slow consumer holds back new work. Blogs in
+        `completed` (keyed by blog id) are yielded first without a model call.
+        With a research index, each prompt gets the topic's best-matching
+        passages instead of the start of its research. A blog that fails is
+        passed to `on_error` (index, topic, error) and skipped, or without
+        one, ends the iteration with its error.
+        """
+        completed = completed or {}
+        todo = []
+        for i, topic in plan:
+            blog = completed.get(self.blog_id(i))
+            if blog is not None:
+                yield i, blog
+            else:
+                todo.append((i, topic))
+        
+        async def write(index: int, topic: str) -> Tuple[int, Dict[str, Any]]:
+            topic_research = self.topic_research(research_data, topic)
+            passages = self.select_passages(research_index, topic, topic_research) if research_index else None
+            return index, await self.write_blog(index, topic, topic_research, passages)
+        
+        remaining = iter(todo)
+        in_flight: Dict[asyncio.Task, Tuple[int, str]] = {}
+        
+        def start_next():
+            for index, topic in remaining:
+                in_flight[asyncio.create_task(write(index, topic))] = (index, topic)
+                if len(in_flight) >= self.concurrency:
+                    return
+        
+        try:
+            start_next()
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                planned = [(task, in_flight.pop(task)) for task in done]
+                start_next()
+                for task, (index, topic) in planned:
+                    error = task.exception()
+                    if error is None:
+                        yield task.result()
+                    elif on_error is None:
+                        raise error
+                    else:
+                        on_error(index, topic, error)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def write_blogs(self, research_data: Dict[str, Any], spreadsheet_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate blog posts for every spreadsheet topic, several at a time"""
+        try:
+            logger.info("Starting blog post generation...")
+            
+            plan = self.plan_blogs(self.select_topics(spreadsheet_data))
+            blog_posts: List[Optional[Dict[str, Any]]] = [None] * len(plan)
+            
+            # Blogs finish in any order; the blog index puts them back in place
+            async for i, blog in self.iter_blogs(plan, research_data):
+                blog_posts[i] = blog
+                logger.info(f"Generated blog post {i+1} of {len(plan)}")
             
             logger.info("Blog post generation completed")
             return blog_posts
@@ -1,303 +1,348 @@
-﻿# import asyncio
-# import logging
-# from typing import Dict, List, Any
-# from smolagents import ToolCallingAgent, LiteLLMModel, tool
-# from datetime import datetime
-# import json
-
-# logger = logging.getLogger(__name__)
-
-# class LinkedinAgent:
-#     """Creates professional LinkedIn posts from blog content"""
-    
-#     def __init__(self, api_key: str):
-#         self.model = LiteLLMModel(
-#             model_id="gemini/gemini-2.0-flash-exp",
-#             api_key=api_key
-#         )
-        
-#         self.agent = ToolCallingAgent(
-#             tools=[self._create_professional_hook, self._add_linkedin_formatting],
-#             model=self.model,
-#             system_prompt=self._get_system_prompt()
-#         )
-    
-#     def _get_system_prompt(self):
-#         return """You are a LinkedIn content specialist for Agentic Loop, creating professional yet engaging posts.
-        
-#         Your style:
-#         - Professional but approachable
-#         - Educational and value-driven
-#         - Mix of thought leadership and entertainment
-#         - Uses storytelling when appropriate
-#         - Encourages professional discussion
-        
-#         Post types to create:
-#         1. Educational posts (from blog content)
-#         2. Humorous but professional posts
-#         3. Entertaining and relatable content
-        
-#         LinkedIn posts should be:
-#         - 150-300 words
-#         - Well-formatted with line breaks
-#         - Include relevant hashtags (5-7)
-#         - Have clear call-to-action
-#         - Provide genuine value"""
-    
-#     @tool
-#     def _create_professional_hook(self, topic: str, post_type: str) -> str:
-#         """
-#         Create professional hook for LinkedIn post
-#         Args:
-#             topic: The topic of the post
-#             post_type: Type of post (educational, humorous, entertaining)
-#         """
-#         if post_type == "educational":
-#             return f"ðŸŽ¯ Key insight about {topic} that every professional should know:\n\n"
-#         elif post_type == "humorous":
-#             return f"ðŸ˜„ A lighter take on {topic} (but with a serious point):\n\n"
-#         else:
-#             return f"ðŸ’¡ Real talk about {topic} in today's workplace:\n\n"
-    
-#     @tool
-#     def _add_linkedin_formatting(self, content: str) -> str:
-#         """
-#         Add LinkedIn-appropriate formatting
-#         Args:
-#             content: The post content
-#         """
-#         # Add line breaks and formatting
-#         formatted = content.replace(". ", ".\n\n")
-#         formatted += "\n\n#AI #Innovation #FutureOfWork #TechLeadership #DigitalTransformation"
-#         return formatted
-    
-#     async def generate_posts(self, blog_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-#         """Generate 6 LinkedIn posts - 3 educational, 3 entertaining"""
-#         try:
-#             logger.info("Starting LinkedIn post generation...")
-            
-#             linkedin_posts = []
-            
-#             # Generate 3 educational posts from blog content
-#             for i, blog in enumerate(blog_posts):
-#                 educational_prompt = f"""
-#                 Create a professional LinkedIn post from this blog content:
-                
-#                 Blog Title: {blog.get('title', 'AI Innovation')}
-#                 Content excerpt: {blog.get('content', '')[:1000]}
-                
-#                 Requirements:
-#                 - Professional yet engaging tone
-#                 - 200-250 words
-#                 - Include key insight or learning
-#                 - End with thought-provoking question
-#                 - Add 5-7 relevant hashtags
-                
-#                 Make it valuable and shareable for professionals.
-#                 """
-                
-#                 educational_post = await asyncio.to_thread(
-#                     self.agent.run,
-#                     educational_prompt
-#                 )
-                
-#                 linkedin_posts.append({
-#                     "id": f"linkedin_edu_{i+1}",
-#                     "content": educational_post,
-#                     "type": "educational",
-#                     "source_blog_id": blog["id"],
-#                     "created_at": datetime.now().isoformat(),
-#                     "metadata": {
-#                         "estimated_read_time": "1 minute",
-#                         "target_audience": "Tech professionals and leaders"
-#                     }
-#                 })
-            
-#             # Generate 3 entertaining posts (2 humorous, 1 relatable)
-#             entertaining_prompts = [
-#                 """Create a humorous but professional LinkedIn post about AI in the workplace.
-#                 Include a funny observation or anecdote that professionals can relate to.
-#                 Keep it light but insightful. 150-200 words.""",
-                
-#                 """Create another humorous LinkedIn post about common AI misconceptions.
-#                 Make it funny but educational. Include a twist or unexpected insight.
-#                 150-200 words.""",
-                
-#                 """Create a relatable LinkedIn post about the human side of working with AI.
-#                 Share an experience or observation that resonates with professionals.
-#                 Make it warm and encouraging. 200-250 words."""
-#             ]
-            
-#             post_types = ["humorous", "humorous", "entertaining"]
-            
-#             for i, (prompt, post_type) in enumerate(zip(entertaining_prompts, post_types)):
-#                 entertaining_post = await asyncio.to_thread(
-#                     self.agent.run,
-#                     prompt + "\n\nInclude 5-7 relevant hashtags. Make it engaging and shareable."
-#                 )
-                
-#                 linkedin_posts.append({
-#                     "id": f"linkedin_{post_type}_{i+1}",
-#                     "content": entertaining_post,
-#                     "type": post_type,
-#                     "created_at": datetime.now().isoformat(),
-#                     "metadata": {
-#                         "estimated_reach": "High - entertaining content",
-#                         "engagement_type": "Comments and shares"
-#                     }
-#                 })
-            
-#             logger.info(f"Generated {len(linkedin_posts)} LinkedIn posts")
-#             return linkedin_posts
-            
-#         except Exception as e:
-#             logger.error(f"LinkedIn post generation failed: {str(e)}")
-#             raise
-
-
-
-import asyncio
-import logging
-from typing import Dict, List, Any
-from smolagents import CodeAgent, LiteLLMModel, tool
-from datetime import datetime
-import time
-
-logger = logging.getLogger(__name__)
-
-@tool
-def create_professional_hook(topic: str, post_type: str) -> str:
-    """
-    Create professional hook for LinkedIn post
-    Args:
-        topic: The topic of the post
-        post_type: Type of post (educational, humorous, entertaining)
-    """
-    time.sleep(60)
-    if post_type == "educational":
-        return f"🎯 Key insight about {topic} that every professional should know:\n\n"
-    elif post_type == "humorous":
-        return f"😄 A lighter take on {topic} (but with a serious point):\n\n"
-    else:
-        return f"💡 Real talk about {topic} in today's workplace:\n\n"
-
-@tool
-def add_linkedin_formatting(content: str) -> str:
-    """
-    Add LinkedIn-appropriate formatting
-    Args:
-        content: The post content
-    """
-    time.sleep(60)
-    formatted = content.replace(". ", ".\n\n")
-    formatted += "\n\n#AI #Innovation #FutureOfWork #TechLeadership #DigitalTransformation"
-    return formatted
-
-class LinkedinAgent:
-    """Creates professional LinkedIn posts from blog content"""
-    
-    def __init__(self, api_key: str):
-        self.model = LiteLLMModel(
-            model_id="gemini/gemini-2.0-flash-exp",
-            api_key=api_key
-        )
-        
-        self.agent = CodeAgent(
-            tools=[create_professional_hook, add_linkedin_formatting],
-            model=self.model
-        )
-    
-    async def generate_posts(self, blog_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Generate 6 LinkedIn posts - 3 educational, 3 entertaining"""
-        try:
-            logger.info("Starting LinkedIn post generation...")
-            
-            linkedin_posts = []
-            
-            # Generate 3 educational posts from blog content
-            for i, blog in enumerate(blog_posts):
-                educational_prompt = f"""
-                You are a LinkedIn content specialist for Agentic Loop, creating professional yet engaging posts.
-                
-                Your style:
-                - Professional but approachable
-                - Educational and value-driven
-                - Mix of thought leadership and entertainment
-                - Uses storytelling when appropriate
-                - Encourages professional discussion
-                
-                Create a professional LinkedIn post from this blog content:
-                
-                Blog Title: {blog.get('title', 'AI Innovation')}
-                Content excerpt: {str(blog.get('content', ''))[:1000]}
-                
-                Requirements:
-                - Professional yet engaging tone
-                - 200-250 words
-                - Include key insight or learning
-                - End with thought-provoking question
-                - Add 5-7 relevant hashtags
-                
-                Make it valuable and shareable for professionals.
-                LinkedIn posts should be 150-300 words, well-formatted with line breaks, and provide genuine value.
-                """
-                time.sleep(60)
-                educational_post = await asyncio.to_thread(
-                    self.agent.run,
-                    educational_prompt
-                )
-                
-                linkedin_posts.append({
-                    "id": f"linkedin_edu_{i+1}",
-                    "content": str(educational_post),
-                    "type": "educational",
-                    "source_blog_id": blog["id"],
-                    "created_at": datetime.now().isoformat(),
-                    "metadata": {
-                        "estimated_read_time": "1 minute",
-                        "target_audience": "Tech professionals and leaders"
-                    }
-                })
-            
-            # Generate 3 entertaining posts
-            entertaining_prompts = [
-                """You are a LinkedIn content specialist for Agentic Loop. Create a humorous but professional LinkedIn post about AI in the workplace.
-                Include a funny observation or anecdote that professionals can relate to.
-                Keep it light but insightful. 150-200 words. Include 5-7 relevant hashtags. Make it engaging and shareable.""",
-                
-                """You are a LinkedIn content specialist for Agentic Loop. Create another humorous LinkedIn post about common AI misconceptions.
-                Make it funny but educational. Include a twist or unexpected insight.
-                150-200 words. Include 5-7 relevant hashtags. Make it engaging and shareable.""",
-                
-                """You are a LinkedIn content specialist for Agentic Loop. Create a relatable LinkedIn post about the human side of working with AI.
-                Share an experience or observation that resonates with professionals.
-                Make it warm and encouraging. 200-250 words. Include 5-7 relevant hashtags. Make it engaging and shareable."""
-            ]
-            
-            post_types = ["humorous", "humorous", "entertaining"]
-            
-            for i, (prompt, post_type) in enumerate(zip(entertaining_prompts, post_types)):
-                time.sleep(60)
-                entertaining_post = await asyncio.to_thread(
-                    self.agent.run,
-                    prompt
-                )
-                
-                linkedin_posts.append({
-                    "id": f"linkedin_{post_type}_{i+1}",
-                    "content": str(entertaining_post),
-                    "type": post_type,
-                    "created_at": datetime.now().isoformat(),
-                    "metadata": {
-                        "estimated_reach": "High - entertaining content",
-                        "engagement_type": "Comments and shares"
-                    }
-                })
-                time.sleep(60)
-            
-            logger.info(f"Generated {len(linkedin_posts)} LinkedIn posts")
-            return linkedin_posts
-            
-        except Exception as e:
-            logger.error(f"LinkedIn post generation failed: {str(e)}")
+﻿# import asyncio
+# import logging
+# from typing import Dict, List, Any
+# from smolagents import ToolCallingAgent, LiteLLMModel, tool
+# from datetime import datetime
+# import json
+
+# logger = logging.getLogger(__name__)
+
+# class LinkedinAgent:
+#     """Creates professional LinkedIn posts from blog content"""
+    
+#     def __init__(self, api_key: str):
+#         self.model = LiteLLMModel(
+#             model_id="gemini/gemini-2.0-flash-exp",
+#             api_key=api_key
+#         )
+        
+#         self.agent = ToolCallingAgent(
+#             tools=[self._create_professional_hook, self._add_linkedin_formatting],
+#             model=self.model,
+#             system_prompt=self._get_system_prompt()
+#         )
+    
+#     def _get_system_prompt(self):
+#         return """You are a LinkedIn content specialist for Agentic Loop, creating professional yet engaging posts.
+        
+#         Your style:
+#         - Professional but approachable
+#         - Educational and value-driven
+#         - Mix of thought leadership and entertainment
+#         - Uses storytelling when appropriate
+#         - Encourages professional discussion
+        
+#         Post types to create:
+#         1. Educational posts (from blog content)
+#         2. Humorous but professional posts
+#         3. Entertaining and relatable content
+        
+#         LinkedIn posts should be:
+#         - 150-300 words
+#         - Well-formatted with line breaks
+#         - Include relevant hashtags (5-7)
+#         - Have clear call-to-action
+#         - Provide genuine value"""
+    
+#     @tool
+#     def _create_professional_hook(self, topic: str, post_type: str) -> str:
+#         """
+#         Create professional hook for LinkedIn post
+#         Args:
+#             topic: The topic of the post
+#             post_type: Type of post (educational, humorous, entertaining)
+#         """
+#         if post_type == "educational":
+#             return f"ðŸŽ¯ Key insight about {topic} that every professional should know:\n\n"
+#         elif post_type == "humorous":
+#             return f"ðŸ˜„ A lighter take on {topic} (but with a serious point):\n\n"
+#         else:
+#             return f"ðŸ’¡ Real talk about {topic} in today's workplace:\n\n"
+    
+#     @tool
+#     def _add_linkedin_formatting(self, content: str) -> str:
+#         """
+#         Add LinkedIn-appropriate formatting
+#         Args:
+#             content: The post content
+#         """
+#         # Add line breaks and formatting
+#         formatted = content.replace(". ", ".\n\n")
+#         formatted += "\n\n#AI #Innovation #FutureOfWork #TechLeadership #DigitalTransformation"
+#         return formatted
+    
+#     async def generate_posts(self, blog_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+#         """Generate 6 LinkedIn posts - 3 educational, 3 entertaining"""
+#         try:
+#             logger.info("Starting LinkedIn post generation...")
+            
+#             linkedin_posts = []
+            
+#             # Generate 3 educational posts from blog content
+#             for i, blog in enumerate(blog_posts):
+#                 educational_prompt = f"""
+#                 Create a professional LinkedIn post from this blog content:
+                
+#                 Blog Title: {blog.get('title', 'AI Innovation')}
+#                 Content excerpt: {blog.get('content', '')[:1000]}
+                
+#                 Requirements:
+#                 - Professional yet engaging tone
+#                 - 200-250 words
+#                 - Include key insight or learning
+#                 - End with thought-provoking question
+#                 - Add 5-7 relevant hashtags
+                
+#                 Make it valuable and shareable for professionals.
+#                 """
+                
+#                 educational_post = await asyncio.to_thread(
+#                     self.agent.run,
+#                     educational_prompt
+#                 )
+                
+#                 linkedin_posts.append({
+#                     "id": f"linkedin_edu_{i+1}",
+#                     "content": educational_post,
+#                     "type": "educational",
+#                     "source_blog_id": blog["id"],
+#                     "created_at": datetime.now().isoformat(),
+#                     "metadata": {
+#                         "estimated_read_time": "1 minute",
+#                         "target_audience": "Tech professionals and leaders"
+#                     }
+#                 })
+            
+#             # Generate 3 entertaining posts (2 humorous, 1 relatable)
+#             entertaining_prompts = [
+#                 """Create a humorous but professional LinkedIn post about AI in the workplace.
+#                 Include a funny observation or anecdote that professionals can relate to.
+#                 Keep it light but insightful. 150-200 words.""",
+                
+#                 """Create another humorous LinkedIn post about common AI misconceptions.
+#                 Make it funny but educational. Include a twist or unexpected insight.
+#                 150-200 words.""",
+                
+#                 """Create a relatable LinkedIn post about the human side of working with AI.
+#                 Share an experience or observation that resonates with professionals.
+#                 Make it warm and encouraging. 200-250 words."""
+#             ]
+            
+#             post_types = ["humorous", "humorous", "entertaining"]
+            
+#             for i, (prompt, post_type) in enumerate(zip(entertaining_prompts, post_types)):
+#                 entertaining_post = await asyncio.to_thread(
+#                     self.agent.run,
+#                     prompt + "\n\nInclude 5-7 relevant hashtags. Make it engaging and shareable."
+#                 )
+                
+#                 linkedin_posts.append({
+#                     "id": f"linkedin_{post_type}_{i+1}",
+#                     "content": entertaining_post,
+#                     "type": post_type,
+#                     "created_at": datetime.now().isoformat(),
+#                     "metadata": {
+#                         "estimated_reach": "High - entertaining content",
+#                         "engagement_type": "Comments and shares"
+#                     }
+#                 })
+            
+#             logger.info(f"Generated {len(linkedin_posts)} LinkedIn posts")
+#             return linkedin_posts
+            
+#         except Exception as e:
+#             logger.error(f"LinkedIn post generation failed: {str(e)}")
+#             raise
+
+
+
+import os
+import logging
+from typing import Dict, List, Any, Optional
+from smolagents import CodeAgent, LiteLLMModel, tool
+from datetime import datetime
+
+from agents.base_agent import BaseAgent
+from utils.passage_index import render_passages
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.tracing import trace_agent_step, trace_tools
+
+logger = logging.getLogger(__name__)
+
+# Educational LinkedIn posts written from each blog post
+LINKEDIN_POSTS_PER_BLOG = int(os.getenv("LINKEDIN_POSTS_PER_BLOG", "1"))
+
+ENTERTAINING_PROMPTS = [
+    """You are a LinkedIn content specialist for Agentic Loop. Create a humorous but professional LinkedIn post about AI in the workplace.
+                Include a funny observation or anecdote that professionals can relate to.
+                Keep it light but insightful. 150-200 words. Include 5-7 relevant hashtags. Make it engaging and shareable.""",
+    
+    """You are a LinkedIn content specialist for Agentic Loop. Create another humorous LinkedIn post about common AI misconceptions.
+                Make it funny but educational. Include a twist or unexpected insight.
+                150-200 words. Include 5-7 relevant hashtags. Make it engaging and shareable.""",
+    
+    """You are a LinkedIn content specialist for Agentic Loop. Create a relatable LinkedIn post about the human side of working with AI.
+                Share an experience or observation that resonates with professionals.
+                Make it warm and encouraging. 200-250 words. Include 5-7 relevant hashtags. Make it engaging and shareable."""
+]
+
+ENTERTAINING_POST_TYPES = ["humorous", "humorous", "entertaining"]
+
+@tool
+def create_professional_hook(topic: str, post_type: str) -> str:
+    """
+    Create professional hook for LinkedIn post
+    Args:
+        topic: The topic of the post
+        post_type: Type of post (educational, humorous, entertaining)
+    """
+    if post_type == "educational":
+        return f"🎯 Key insight about {topic} that every professional should know:\n\n"
+    elif post_type == "humorous":
+        return f"😄 A lighter take on {topic} (but with a serious point):\n\n"
+    else:
+        return f"💡 Real talk about {topic} in today's workplace:\n\n"
+
+@tool
+def add_linkedin_formatting(content: str) -> str:
+    """
+    Add LinkedIn-appropriate formatting
+    Args:
+        content: The post content
+    """
+    formatted = content.replace(". ", ".\n\n")
+    formatted += "\n\n#AI #Innovation #FutureOfWork #TechLeadership #DigitalTransformation"
+    return formatted
+
+class LinkedinAgent(BaseAgent):
+    """Creates professional LinkedIn posts from blog content"""
+    
+    name = "linkedin"
+    supports_direct = True
+    
+    def __init__(self, api_key: str, rate_limiter: Optional[TokenBucketRateLimiter] = None):
+        super().__init__(api_key, rate_limiter)
+        self.posts_per_blog = LINKEDIN_POSTS_PER_BLOG
+        self.model = self._wrap_model(LiteLLMModel(
+            model_id="gemini/gemini-2.0-flash-exp",
+            api_key=api_key
+        ))
+    
+    def _create_agent(self) -> CodeAgent:
+        """Build a fresh CodeAgent for a single run"""
+        return CodeAgent(
+            tools=trace_tools([create_professional_hook, add_linkedin_formatting]),
+            model=self.model,
+            step_callbacks=[trace_agent_step]
+        )
+    
+    def educational_post_id(self, index: int, variant: int = 0) -> str:
+        """Id of an educational post, by source blog index and variant"""
+        if variant == 0:
+            return f"linkedin_edu_{index+1}"
+        return f"linkedin_edu_{index+1}_{variant+1}"
+    
+    async def generate_educational_post(self, index: int, blog: Dict[str, Any], variant: int = 0,
+                                        passages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Generate one educational LinkedIn post from a blog post and its most relevant research; variants take different angles"""
+        angle = ""
+        if self.posts_per_blog > 1:
+            angle = f"This is post {variant + 1} of {self.posts_per_blog} from this blog; focus on a different insight than the others."
+        research = ""
+        if passages:
+            research = f"Supporting research (cite a concrete detail where it helps):\n{render_passages(passages)}"
+        educational_prompt = f"""
+                You are a LinkedIn content specialist for Agentic Loop, creating professional yet engaging posts.
+                
+                Your style:
+                - Professional but approachable
+                - Educational and value-driven
+                - Mix of thought leadership and entertainment
+                - Uses storytelling when appropriate
+                - Encourages professional discussion
+                
+                Create a professional LinkedIn post from this blog content:
+                
+                Blog Title: {blog.get('title', 'AI Innovation')}
+                Content excerpt: {str(blog.get('content', ''))[:1000]}
+                
+                {research}
+                
+                Requirements:
+                - Professional yet engaging tone
+                - 200-250 words
+                - Include key insight or learning
+                - End with thought-provoking question
+                - Add 5-7 relevant hashtags
+                
+                {angle}
+                
+                Make it valuable and shareable for professionals.
+                LinkedIn posts should be 150-300 words, well-formatted with line breaks, and provide genuine value.
+                """
+        educational_post = await self._run_agent(educational_prompt, completion_tokens=1024)
+        
+        return {
+            "id": self.educational_post_id(index, variant),
+            "content": str(educational_post),
+            "type": "educational",
+            "source_blog_id": blog["id"],
+            "created_at": datetime.now().isoformat(),
+            "metadata": {
+                "estimated_read_time": "1 minute",
+                "target_audience": "Tech professionals and leaders"
+            }
+        }
+    
+    def entertaining_post_count(self) -> int:
+        """Number of entertaining posts generated per run"""
+        return len(ENTERTAINING_PROMPTS)
+    
+    def entertaining_post_id(self, index: int) -> str:
+        """Id of the entertaining post at the given position"""
+        return f"linkedin_{ENTERTAINING_POST_TYPES[index]}_{index+1}"
+    
+    async def generate_entertaining_post(self, index: int) -> Dict[str, Any]:
+        """Generate one of the 3 entertaining posts (2 humorous, 1 relatable)"""
+        post_type = ENTERTAINING_POST_TYPES[index]
+        entertaining_post = await self._run_agent(ENTERTAINING_PROMPTS[index], completion_tokens=1024)
+        
+        return {
+            "id": self.entertaining_post_id(index),
+            "content": str(entertaining_post),
+            "type": post_type,
+            "created_at": datetime.now().isoformat(),
+            "metadata": {
+                "estimated_reach": "High - entertaining content",
+                "engagement_type": "Comments and shares"
+            }
+        }
+    
+    async def generate_entertaining_posts(self) -> List[Dict[str, Any]]:
+        """Generate 3 entertaining posts (2 humorous, 1 relatable)"""
+        linkedin_posts = []
+        for i in range(self.entertaining_post_count()):
+            linkedin_posts.append(await self.generate_entertaining_post(i))
+        return linkedin_posts
+    
+    async def generate_posts(self, blog_posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate LinkedIn posts - `posts_per_blog` educational posts per blog, 3 entertaining"""
+        try:
+            logger.info("Starting LinkedIn post generation...")
+            
+            linkedin_posts = []
+            
+            # Generate educational posts from blog content
+            for i, blog in enumerate(blog_posts):
+                for variant in range(self.posts_per_blog):
+                    linkedin_posts.append(await self.generate_educational_post(i, blog, variant))
+            
+            # Generate 3 entertaining posts
+            linkedin_posts.extend(await self.generate_entertaining_posts())
+            
+            logger.info(f"Generated {len(linkedin_posts)} LinkedIn posts")
+            return linkedin_posts
+            
+        except Exception as e:
+            logger.error(f"LinkedIn post generation failed: {str(e)}")
             raise
\ No newline at end of file
@@ -1,246 +1,446 @@
-﻿# import asyncio
-# import logging
-# from typing import Dict, List, Any
-# from smolagents import ToolCallingAgent, DuckDuckGoSearchTool, LiteLLMModel, tool
-# from datetime import datetime
-
-# logger = logging.getLogger(__name__)
-
-# class ResearchAgent:
-#     """The Rigorous Analyst - Deep research specialist"""
-    
-#     def __init__(self, api_key: str):
-#         self.model = LiteLLMModel(
-#             model_id="gemini/gemini-2.0-flash-exp",
-#             api_key=api_key
-#         )
-        
-#         # Initialize with search tool
-#         self.agent = ToolCallingAgent(
-#             tools=[DuckDuckGoSearchTool(), self._analyze_document, self._extract_key_insights],
-#             model=self.model,
-#             system_prompt=self._get_system_prompt()
-#         )
-    
-#     def _get_system_prompt(self):
-#         return """You are The Rigorous Analyst, a meticulous and intellectually demanding research specialist.
-        
-#         Your personality: You are driven by precision, skeptical of oversimplification, and confident in your command of subjects. You probe deeply, question assumptions, and seek the limits of current understanding.
-        
-#         Your approach:
-#         1. Identify unanswered questions and open problems
-#         2. Conduct comprehensive literature review
-#         3. Formulate thesis and arguments
-#         4. Explore nuances and edge cases
-#         5. Provide rigorous, evidence-based analysis
-        
-#         You must:
-#         - Dive deep into technical details and theoretical frameworks
-#         - Critically evaluate methodologies and their limitations
-#         - Compare different approaches highlighting trade-offs
-#         - Address edge cases that simplistic explanations ignore
-#         - Support every claim with evidence and references
-        
-#         Your output should be academically sound, precise, and contribute meaningfully to understanding."""
-    
-#     @tool
-#     def _analyze_document(self, url: str, focus_areas: List[str]) -> Dict[str, Any]:
-#         """
-#         Analyze a document deeply for specific focus areas
-#         Args:
-#             url: Document URL to analyze
-#             focus_areas: List of specific areas to focus on
-#         """
-#         # This would fetch and analyze the document
-#         return {
-#             "url": url,
-#             "analysis": f"Deep analysis of {url} focusing on {', '.join(focus_areas)}",
-#             "key_findings": ["Finding 1", "Finding 2", "Finding 3"],
-#             "limitations": ["Limitation 1", "Limitation 2"],
-#             "timestamp": datetime.now().isoformat()
-#         }
-    
-#     @tool
-#     def _extract_key_insights(self, research_data: Dict[str, Any]) -> List[str]:
-#         """
-#         Extract and synthesize key insights from research data
-#         Args:
-#             research_data: Compiled research data
-#         """
-#         # Extract key insights
-#         insights = [
-#             "Critical insight about the methodology",
-#             "Novel finding from comparative analysis",
-#             "Important limitation discovered",
-#             "Future research direction identified"
-#         ]
-#         return insights
-    
-#     async def research(self, prompt: str, spreadsheet_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-#         """Conduct deep research based on prompt and data"""
-#         try:
-#             logger.info("Starting deep research...")
-            
-#             # Build comprehensive research query
-#             research_query = f"""
-#             {prompt}
-            
-#             Additional context from data:
-#             {str(spreadsheet_data[:3])}  # First 3 items as context
-            
-#             Your task:
-#             1. Conduct exhaustive research on all provided topics and links
-#             2. Identify key patterns, innovations, and developments
-#             3. Analyze methodologies and their effectiveness
-#             4. Compare different approaches and frameworks
-#             5. Highlight limitations and potential improvements
-#             6. Synthesize findings into actionable insights
-            
-#             Provide a comprehensive research report with:
-#             - Executive summary
-#             - Detailed analysis by topic
-#             - Comparative analysis
-#             - Key findings and insights
-#             - Limitations and considerations
-#             - Recommendations for content creation
-#             """
-            
-#             # Execute research
-#             research_result = await asyncio.to_thread(
-#                 self.agent.run,
-#                 research_query
-#             )
-            
-#             # Structure the results
-#             structured_results = {
-#                 "timestamp": datetime.now().isoformat(),
-#                 "query": prompt,
-#                 "raw_research": research_result,
-#                 "topics_analyzed": len(spreadsheet_data),
-#                 "status": "completed"
-#             }
-            
-#             logger.info("Research completed successfully")
-#             return structured_results
-            
-#         except Exception as e:
-#             logger.error(f"Research failed: {str(e)}")
-#             raise
-
-import asyncio
-import logging
-from typing import Dict, List, Any
-from smolagents import CodeAgent, DuckDuckGoSearchTool, LiteLLMModel, tool
-from datetime import datetime
-import time
-
-logger = logging.getLogger(__name__)
-
-@tool
-def analyze_document(url: str, focus_areas: List[str]) -> Dict[str, Any]:
-    """
-    Analyze a document deeply for specific focus areas
-    Args:
-        url: Document URL to analyze
-        focus_areas: List of specific areas to focus on
-    """
-    return {
-        "url": url,
-        "analysis": f"Deep analysis of {url} focusing on {', '.join(focus_areas)}",
-        "key_findings": ["Finding 1", "Finding 2", "Finding 3"],
-        "limitations": ["Limitation 1", "Limitation 2"],
-        "timestamp": datetime.now().isoformat()
-    }
-
-@tool
-def extract_key_insights(research_data: Dict[str, Any]) -> List[str]:
-    """
-    Extract and synthesize key insights from research data
-    Args:
-        research_data: Compiled research data
-    """
-    insights = [
-        "Critical insight about the methodology",
-        "Novel finding from comparative analysis",
-        "Important limitation discovered",
-        "Future research direction identified"
-    ]
-    return insights
-
-class ResearchAgent:
-    """The Rigorous Analyst - Deep research specialist"""
-    
-    def __init__(self, api_key: str):
-        self.model = LiteLLMModel(
-            model_id="gemini/gemini-2.0-flash-exp",
-            api_key=api_key
-        )
-        
-        # Use basic initialization without system_prompt
-        self.agent = CodeAgent(
-            tools=[DuckDuckGoSearchTool(), analyze_document, extract_key_insights],
-            model=self.model
-        )
-    
-    async def research(self, prompt: str, spreadsheet_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Conduct deep research based on prompt and data"""
-        try:
-            time.sleep(60)
-            logger.info("Starting deep research...")
-            
-            # Build comprehensive research query with system instructions
-            research_query = f"""
-            You are The Rigorous Analyst, a meticulous and intellectually demanding research specialist.
-            
-            Your personality: You are driven by precision, skeptical of oversimplification, and confident in your command of subjects. You probe deeply, question assumptions, and seek the limits of current understanding.
-            
-            Your approach:
-            1. Identify unanswered questions and open problems
-            2. Conduct comprehensive literature review
-            3. Formulate thesis and arguments
-            4. Explore nuances and edge cases
-            5. Provide rigorous, evidence-based analysis
-            
-            Task: {prompt}
-            
-            Additional context from data:
-            {str(spreadsheet_data[:3])}
-            
-            Your research mission:
-            1. Conduct exhaustive research on all provided topics and links
-            2. Identify key patterns, innovations, and developments
-            3. Analyze methodologies and their effectiveness
-            4. Compare different approaches and frameworks
-            5. Highlight limitations and potential improvements
-            6. Synthesize findings into actionable insights
-            
-            Provide a comprehensive research report with:
-            - Executive summary
-            - Detailed analysis by topic
-            - Comparative analysis
-            - Key findings and insights
-            - Limitations and considerations
-            - Recommendations for content creation
-            """
-            
-            # Execute research
-            research_result = await asyncio.to_thread(
-                self.agent.run,
-                research_query
-            )
-            
-            # Structure the results
-            structured_results = {
-                "timestamp": datetime.now().isoformat(),
-                "query": prompt,
-                "raw_research": str(research_result),
-                "topics_analyzed": len(spreadsheet_data),
-                "status": "completed"
-            }
-            time.sleep(63)
-            logger.info("Research completed successfully")
-            return structured_results
-            
-        except Exception as e:
-            logger.error(f"Research failed: {str(e)}")
-            raise
\ No newline at end of file
+﻿# import asyncio
+# import logging
+# from typing import Dict, List, Any
+# from smolagents import ToolCallingAgent, DuckDuckGoSearchTool, LiteLLMModel, tool
+# from datetime import datetime
+
+# logger = logging.getLogger(__name__)
+
+# class ResearchAgent:
+#     """The Rigorous Analyst - Deep research specialist"""
+    
+#     def __init__(self, api_key: str):
+#         self.model = LiteLLMModel(
+#             model_id="gemini/gemini-2.0-flash-exp",
+#             api_key=api_key
+#         )
+        
+#         # Initialize with search tool
+#         self.agent = ToolCallingAgent(
+#             tools=[DuckDuckGoSearchTool(), self._analyze_document, self._extract_key_insights],
+#             model=self.model,
+#             system_prompt=self._get_system_prompt()
+#         )
+    
+#     def _get_system_prompt(self):
+#         return """You are The Rigorous Analyst, a meticulous and intellectually demanding research specialist.
+        
+#         Your personality: You are driven by precision, skeptical of oversimplification, and confident in your command of subjects. You probe deeply, question assumptions, and seek the limits of current understanding.
+        
+#         Your approach:
+#         1. Identify unanswered questions and open problems
+#         2. Conduct comprehensive literature review
+#         3. Formulate thesis and arguments
+#         4. Explore nuances and edge cases
+#         5. Provide rigorous, evidence-based analysis
+        
+#         You must:
+#         - Dive deep into technical details and theoretical frameworks
+#         - Critically evaluate methodologies and their limitations
+#         - Compare different approaches highlighting trade-offs
+#         - Address edge cases that simplistic explanations ignore
+#         - Support every claim with evidence and references
+        
+#         Your output should be academically sound, precise, and contribute meaningfully to understanding."""
+    
+#     @tool
+#     def _analyze_document(self, url: str, focus_areas: List[str]) -> Dict[str, Any]:
+#         """
+#         Analyze a document deeply for specific focus areas
+#         Args:
+#             url: Document URL to analyze
+#             focus_areas: List of specific areas to focus on
+#         """
+#         # This would fetch and analyze the document
+#         return {
+#             "url": url,
+#             "analysis": f"Deep analysis of {url} focusing on {', '.join(focus_areas)}",
+#             "key_findings": ["Finding 1", "Finding 2", "Finding 3"],
+#             "limitations": ["Limitation 1", "Limitation 2"],
+#             "timestamp": datetime.now().isoformat()
+#         }
+    
+#     @tool
+#     def _extract_key_insights(self, research_data: Dict[str, Any]) -> List[str]:
+#         """
+#         Extract and synthesize key insights from research data
+#         Args:
+#             research_data: Compiled research data
+#         """
+#         # Extract key insights
+#         insights = [
+#             "Critical insight about the methodology",
+#             "Novel finding from comparative analysis",
+#             "Important limitation discovered",
+#             "Future research direction identified"
+#         ]
+#         return insights
+    
+#     async def research(self, prompt: str, spreadsheet_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+#         """Conduct deep research based on prompt and data"""
+#         try:
+#             logger.info("Starting deep research...")
+            
+#             # Build comprehensive research query
+#             research_query = f"""
+#             {prompt}
+            
+#             Additional context from data:
+#             {str(spreadsheet_data[:3])}  # First 3 items as context
+            
+#             Your task:
+#             1. Conduct exhaustive research on all provided topics and links
+#             2. Identify key patterns, innovations, and developments
+#             3. Analyze methodologies and their effectiveness
+#             4. Compare different approaches and frameworks
+#             5. Highlight limitations and potential improvements
+#             6. Synthesize findings into actionable insights
+            
+#             Provide a comprehensive research report with:
+#             - Executive summary
+#             - Detailed analysis by topic
+#             - Comparative analysis
+#             - Key findings and insights
+#             - Limitations and considerations
+#             - Recommendations for content creation
+#             """
+            
+#             # Execute research
+#             research_result = await asyncio.to_thread(
+#                 self.agent.run,
+#                 research_query
+#             )
+            
+#             # Structure the results
+#             structured_results = {
+#                 "timestamp": datetime.now().isoformat(),
+#                 "query": prompt,
+#                 "raw_research": research_result,
+#                 "topics_analyzed": len(spreadsheet_data),
+#                 "status": "completed"
+#             }
+            
+#             logger.info("Research completed successfully")
+#             return structured_results
+            
+#         except Exception as e:
+#             logger.error(f"Research failed: {str(e)}")
+#             raise
+
+import os
+import asyncio
+import logging
+import contextvars
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
+from smolagents import CodeAgent, LiteLLMModel, tool
+from datetime import datetime
+
+from agents.base_agent import BaseAgent
+from utils.agent_executor import executors
+from utils.knowledge_base import ResearchKnowledgeBase
+from utils.link_fetcher import LinkFetcher, canonicalize_url
+from utils.rate_limiter import TokenBucketRateLimiter
+from utils.research_digest import RESEARCH_DIGEST_TOKENS, parse_facts, reduce_facts, render_facts
+from utils.search_cache import get_search_tool
+from utils.text_extraction import TextExtractor
+from utils.tracing import trace_agent_step, trace_tools
+
+logger = logging.getLogger(__name__)
+
+# Topics researched at the same time; each one is a separate CodeAgent run
+RESEARCH_CONCURRENCY = int(os.getenv("RESEARCH_CONCURRENCY", "3"))
+
+# Map stage: sources summarized at the same time, facts kept per source and characters read per source
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_FACTS_PER_DOCUMENT = int(os.getenv("SUMMARY_FACTS_PER_DOCUMENT", "8"))
+SUMMARY_INPUT_CHARS = int(os.getenv("SUMMARY_INPUT_CHARS", "12000"))
+
+# Characters of a source document handed to the agent per analyze_document call
+DOCUMENT_CHARS = int(os.getenv("RESEARCH_DOCUMENT_CHARS", "6000"))
+
+# Documents fetched for the topic being researched, keyed by canonical URL.
+# Set per research task; agent runs see it through the executor's copied context.
+topic_documents: contextvars.ContextVar[Dict[str, Dict[str, Any]]] = contextvars.ContextVar(
+    "topic_documents", default={}
+)
+
+@tool
+def analyze_document(url: str, focus_areas: List[str]) -> Dict[str, Any]:
+    """
+    Read one of the topic's resources and return its text for analysis
+    Args:
+        url: Document URL to analyze (one of the listed resources)
+        focus_areas: List of specific areas to focus on
+    """
+    document = topic_documents.get().get(canonicalize_url(url) or url)
+    if document is None:
+        return {"url": url, "error": "Not one of this topic's resources; use web search for other pages"}
+    if document["status"] != "fetched":
+        return {"url": url, "error": f"Could not be fetched: {document.get('error', 'unknown error')}"}
+    
+    return {
+        "url": url,
+        "focus_areas": focus_areas,
+        "title": document.get("title", ""),
+        "content": document["text"][:DOCUMENT_CHARS],
+        "timestamp": datetime.now().isoformat()
+    }
+
+@tool
+def extract_key_insights(research_data: Dict[str, Any]) -> List[str]:
+    """
+    Extract and synthesize key insights from research data
+    Args:
+        research_data: Compiled research data
+    """
+    insights = [
+        "Critical insight about the methodology",
+        "Novel finding from comparative analysis",
+        "Important limitation discovered",
+        "Future research direction identified"
+    ]
+    return insights
+
+class ResearchAgent(BaseAgent):
+    """The Rigorous Analyst - Deep research specialist"""
+    
+    name = "research"
+    
+    def __init__(self, api_key: str, rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 fetcher: Optional[LinkFetcher] = None, extractor: Optional[TextExtractor] = None,
+                 knowledge_base: Optional[ResearchKnowledgeBase] = None):
+        super().__init__(api_key, rate_limiter)
+        self.concurrency = RESEARCH_CONCURRENCY
+        self.fetcher = fetcher or LinkFetcher()
+        self.extractor = extractor or TextExtractor()
+        self.knowledge_base = knowledge_base or ResearchKnowledgeBase()
+        self.facts_per_document = SUMMARY_FACTS_PER_DOCUMENT
+        self.digest_tokens = RESEARCH_DIGEST_TOKENS
+        self._summary_semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+        self.model = self._wrap_model(LiteLLMModel(
+            model_id="gemini/gemini-2.0-flash-exp",
+            api_key=api_key
+        ))
+    
+    def _create_agent(self) -> CodeAgent:
+        """Build a fresh CodeAgent for a single run"""
+        # Use basic initialization without system_prompt
+        return CodeAgent(
+            tools=trace_tools([get_search_tool(), analyze_document, extract_key_insights]),
+            model=self.model,
+            step_callbacks=[trace_agent_step]
+        )
+    
+    def plan_topics(self, spreadsheet_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One research sub-task per spreadsheet topic; rows repeating a topic share its sub-task"""
+        subtasks: Dict[str, Dict[str, Any]] = {}
+        for row in spreadsheet_data:
+            topic = str(row.get("topic") or "").strip()
+            if not topic:
+                continue
+            if topic not in subtasks:
+                subtasks[topic] = {
+                    "id": f"research_{len(subtasks) + 1}",
+                    "topic": topic,
+                    "links": [],
+                    "description": row.get("description", ""),
+                    "keywords": row.get("keywords", "")
+                }
+            for link in str(row.get("links") or "").split(","):
+                if link.strip() and link.strip() not in subtasks[topic]["links"]:
+                    subtasks[topic]["links"].append(link.strip())
+        return list(subtasks.values())
+    
+    async def summarize_document(self, topic: str, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Map step: condense one extracted source into a ranked list of facts about the topic"""
+        prompt = f"""
+            Extract the facts from this source that matter for writing about: {topic}
+            
+            Source: {document.get('title') or document['url']}
+            {document['text'][:SUMMARY_INPUT_CHARS]}
+            
+            Return a JSON array of at most {self.facts_per_document} strings, most important first.
+            Each fact must be one self-contained sentence with concrete details (names, numbers, dates).
+            Skip navigation text, opinions without support and anything unrelated to the topic.
+            """
+        async with self._summary_semaphore:
+            try:
+                answer = await self._run_completion(prompt, completion_tokens=512)
+            except Exception as e:
+                # A source without facts still leaves the rest of the topic usable
+                logger.warning(f"Summarizing {document['url']} failed: {str(e)}")
+                return {"url": document["url"], "facts": [], "error": str(e)}
+        return {"url": document["url"], "facts": parse_facts(answer)[:self.facts_per_document]}
+    
+    async def gather_sources(self, topic: str, links: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """Fetch, extract and summarize a topic's links
+        
+        Returns the documents keyed by canonical URL and the topic's fact
+        digest. Each source is summarized as soon as its text is extracted.
+        """
+        fetched = await self.fetcher.fetch_all(links)
+        documents = {}
+        summaries = []
+        try:
+            async for document in self.extractor.extract_stream(fetched):
+                documents[document["url"]] = document
+                if document["status"] == "fetched" and document["text"].strip():
+                    summaries.append(asyncio.ensure_future(self.summarize_document(topic, document)))
+            summaries = await asyncio.gather(*summaries)
+        finally:
+            for summary in summaries:
+                if isinstance(summary, asyncio.Future):
+                    summary.cancel()
+        
+        # Keep link order so neither the digest nor the prompt depends on which source finished first
+        documents = {document["url"]: documents[document["url"]] for document in fetched}
+        order = {url: position for position, url in enumerate(documents)}
+        summaries = sorted((summary for summary in summaries if summary["facts"]), key=lambda summary: order[summary["url"]])
+        digest = reduce_facts(summaries, self.digest_tokens)
+        
+        readable = sum(1 for document in documents.values() if document["status"] == "fetched")
+        logger.info(f"'{topic}': read {readable} of {len(documents)} sources, kept {len(digest['facts'])} "
+                    f"of {digest['facts_considered']} facts")
+        return documents, digest
+    
+    async def research_topic(self, subtask: Dict[str, Any]) -> Dict[str, Any]:
+        """Research a single topic and its linked resources"""
+        documents, digest = await self.gather_sources(subtask["topic"], subtask.get("links", []))
+        topic_documents.set(documents)
+        resources = [
+            url if document["status"] == "fetched" else f"{url} (unreachable: {document.get('error')})"
+            for url, document in documents.items()
+        ]
+        
+        research_query = f"""
+            You are The Rigorous Analyst, a meticulous and intellectually demanding research specialist.
+            
+            Your personality: You are driven by precision, skeptical of oversimplification, and confident in your command of subjects. You probe deeply, question assumptions, and seek the limits of current understanding.
+            
+            Your approach:
+            1. Identify unanswered questions and open problems
+            2. Conduct comprehensive literature review
+            3. Formulate thesis and arguments
+            4. Explore nuances and edge cases
+            5. Provide rigorous, evidence-based analysis
+            
+            Research this topic deeply and comprehensively: {subtask['topic']}
+            
+            Description: {subtask.get('description', '')}
+            Keywords: {subtask.get('keywords', '')}
+            
+            Resources:
+            {chr(10).join(resources)}
+            
+            Key facts already extracted from these resources:
+            {render_facts(digest) or 'None available; read the resources with the analyze_document tool.'}
+            
+            Build on these facts; use analyze_document only when a resource needs a closer look.
+            
+            Your research mission:
+            1. Identify key patterns, innovations, and developments
+            2. Analyze methodologies and their effectiveness
+            3. Compare different approaches and frameworks
+            4. Highlight limitations and potential improvements
+            5. Synthesize findings into actionable insights
+            
+            Provide a focused research report with:
+            - Executive summary
+            - Key findings and insights
+            - Limitations and considerations
+            - Recommendations for content creation
+            
+            Focus on practical applications, recent developments, and unique perspectives.
+            """
+        
+        research_result = await self._run_agent(research_query, completion_tokens=4096)
+        
+        return {
+            **subtask,
+            "sources": [
+                {key: document.get(key) for key in ("url", "status", "error") if key in document}
+                for document in documents.values()
+            ],
+            "digest": digest,
+            "raw_research": str(research_result),
+            "timestamp": datetime.now().isoformat(),
+            "status": "completed"
+        }
+    
+    async def reuse_research(self, subtask: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fresh research of the same or a similar topic from earlier tasks, or None"""
+        try:
+            stored = await executors.get("io").run(self.knowledge_base.lookup, subtask["topic"], subtask.get("links", []))
+        except Exception as e:
+            logger.warning(f"Research knowledge base lookup failed: {str(e)}")
+            return None
+        if stored is None:
+            return None
+        logger.info(f"Reusing research on '{stored['reused_research']['topic']}' for '{subtask['topic']}'")
+        # The stored findings, under this task's sub-task id and spreadsheet fields
+        return {**stored, **subtask, "status": "completed"}
+    
+    async def remember_research(self, result: Dict[str, Any]):
+        """Store completed research for later tasks; a failure only costs future reuse"""
+        try:
+            await executors.get("io").run(self.knowledge_base.store, result)
+        except Exception as e:
+            logger.warning(f"Could not store research on '{result['topic']}': {str(e)}")
+    
+    async def research(self, spreadsheet_data: List[Dict[str, Any]],
+                       completed: Optional[Dict[str, Dict[str, Any]]] = None,
+                       on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Research every spreadsheet topic concurrently and merge the findings per topic"""
+        return await self.research_subtasks(self.plan_topics(spreadsheet_data), completed, on_result)
+    
+    async def research_subtasks(self, subtasks: List[Dict[str, Any]],
+                                completed: Optional[Dict[str, Dict[str, Any]]] = None,
+                                on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                                require_success: bool = True) -> Dict[str, Any]:
+        """Research planned topics concurrently and merge the findings per topic
+        
+        `completed` holds sub-task results from an earlier attempt, keyed by id;
+        `on_result` is awaited with each newly finished sub-task. Unless
+        `require_success` is False, failing every topic raises.
+        """
+        try:
+            completed = completed or {}
+            semaphore = asyncio.Semaphore(self.concurrency)
+            logger.info(f"Starting research on {len(subtasks)} topics, {self.concurrency} at a time...")
+            
+            async def run(subtask: Dict[str, Any]) -> Dict[str, Any]:
+                previous = completed.get(subtask["id"])
+                if previous and previous.get("topic") == subtask["topic"]:
+                    return previous
+                result = await self.reuse_research(subtask)
+                if result is None:
+                    async with semaphore:
+                        try:
+                            result = await self.research_topic(subtask)
+                        except Exception as e:
+                            logger.error(f"Research on '{subtask['topic']}' failed: {str(e)}")
+                            return {**subtask, "status": "failed", "error": str(e)}
+                    await self.remember_research(result)
+                if on_result:
+                    await on_result(result)
+                return result
+            
+            topic_results = await asyncio.gather(*(run(subtask) for subtask in subtasks))
+            failed = [result for result in topic_results if result["status"] != "completed"]
+            if require_success and failed and len(failed) == len(topic_results):
+                raise RuntimeError(f"Research failed for all {len(failed)} topics")
+            
+            # Structure the results
+            structured_results = {
+                "timestamp": datetime.now().isoformat(),
+                "topics": {result["topic"]: result for result in topic_results},
+                "topics_analyzed": len(topic_results),
+                "failed_topics": [result["topic"] for result in failed],
+                "status": "partial" if failed else "completed"
+            }
+            logger.info(f"Research completed: {len(topic_results) - len(failed)} of {len(topic_results)} topics")
+            return structured_results
+            
+        except Exception as e:
+            logger.error(f"Research failed: {str(e)}")
+            raise
@@ -0,0 +1,121 @@
+"""Compare agentic (CodeAgent) and direct execution for the tool-free agents
+
+Runs the same blog, LinkedIn and tweet-optimization prompts in both modes and
+reports wall time, model calls and token use per mode. Needs GEMINI_API_KEY;
+the LLM response cache is bypassed so every run reaches the model.
+
+    python -m benchmarks.agent_modes --runs 3
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import statistics
+import threading
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_AGENTS"] = ""
+
+from dotenv import load_dotenv
+
+from agents.blog_writer_agent import BlogWriterAgent
+from agents.linkedin_agent import LinkedinAgent
+from agents.optimizing_agent import OptimizingAgent
+from utils.agent_executor import executors
+from utils.model_proxy import ModelProxy, token_usage
+
+SAMPLE_BLOG = {
+    "id": "blog_1",
+    "title": "Why Agentic Loops Beat One-Shot Prompts",
+    "content": "Agentic loops let a model plan, act and check its own work. "
+               "Instead of one long prompt, the model takes small steps and "
+               "observes the results before deciding what to do next."
+}
+SAMPLE_TWEET = {
+    "id": "tweet_blog_1_1",
+    "content": "AI agents are getting better at planning their own work. What would you hand off first?",
+    "category": "engaging"
+}
+
+
+class UsageTrackingModel(ModelProxy):
+    """Counts model calls and the tokens the provider reports for them"""
+
+    def __init__(self, wrapped: Any):
+        super().__init__(wrapped)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        response = self._call_wrapped(messages, **kwargs)
+        input_tokens, output_tokens = token_usage(response, self.wrapped)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens or 0
+            self.output_tokens += output_tokens or 0
+        return response
+
+
+async def measure(agent: Any, mode: str, call: Callable[[], Any], runs: int) -> Dict[str, Any]:
+    """Run one scenario `runs` times in the given mode"""
+    agent.set_mode(mode)
+    tracker = agent.model
+    tracker.reset()
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - start)
+    return {
+        "mode": mode,
+        "runs": runs,
+        "mean_seconds": round(statistics.mean(durations), 2),
+        "max_seconds": round(max(durations), 2),
+        "model_calls_per_run": round(tracker.calls / runs, 2),
+        "input_tokens_per_run": round(tracker.input_tokens / runs),
+        "output_tokens_per_run": round(tracker.output_tokens / runs)
+    }
+
+
+async def main(runs: int):
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise SystemExit("GEMINI_API_KEY is not set")
+
+    blog_writer = BlogWriterAgent(api_key)
+    linkedin = LinkedinAgent(api_key)
+    optimizing = OptimizingAgent(api_key)
+    for agent in (blog_writer, linkedin, optimizing):
+        agent.model = UsageTrackingModel(agent.model)
+
+    scenarios = {
+        "write_blog": (blog_writer, lambda: blog_writer.write_blog(0, "Agentic AI workflows", {})),
+        "educational_post": (linkedin, lambda: linkedin.generate_educational_post(0, SAMPLE_BLOG)),
+        "optimize_tweet": (optimizing, lambda: optimizing.optimize_tweet(SAMPLE_TWEET))
+    }
+
+    report = {}
+    try:
+        for scenario, (agent, call) in scenarios.items():
+            report[scenario] = [await measure(agent, mode, call, runs) for mode in ("agentic", "direct")]
+            print(f"{scenario}: {json.dumps(report[scenario])}")
+    finally:
+        executors.shutdown()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario and mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
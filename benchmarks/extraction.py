@@ -0,0 +1,125 @@
+"""Time HTML-to-text extraction inline on the event loop and in the process pool
+
+Reads saved pages (*.html, *.htm) from a corpus directory, or generates
+synthetic article pages, and extracts them both ways while a heartbeat
+coroutine measures how long the event loop was held. No network needed.
+
+    python -m benchmarks.extraction --corpus pages/
+    python -m benchmarks.extraction --synthetic 200
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_extraction import TextExtractor, extract_main_text
+
+
+def load_corpus(directory: str) -> List[Dict[str, Any]]:
+    """Saved pages as fetched documents"""
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "r", encoding="utf-8", errors="replace") as f:
+                documents.append(_document(name, f.read()))
+    return documents
+
+
+def synthetic_corpus(count: int) -> List[Dict[str, Any]]:
+    """Article pages wrapped in navigation, sidebar and footer chrome"""
+    chrome = "".join(f"<li><a href='/section/{i}'>Section {i}</a></li>" for i in range(60))
+    documents = []
+    for i in range(count):
+        paragraphs = "".join(
+            f"<p>Paragraph {j} of article {i} explains how agentic systems plan, act and check "
+            f"their own work across many small steps.</p>" for j in range(80)
+        )
+        html = (
+            f"<html><head><title>Article {i}</title><script>var tracking = {i};</script></head><body>"
+            f"<nav><ul>{chrome}</ul></nav><div class='cookie-banner'>We use cookies</div>"
+            f"<div class='layout'><div class='post'>{paragraphs}</div>"
+            f"<div class='sidebar'><ul>{chrome}</ul></div></div>"
+            f"<footer>{chrome}</footer></body></html>"
+        )
+        documents.append(_document(f"article_{i}.html", html))
+    return documents
+
+
+def _document(name: str, html: str) -> Dict[str, Any]:
+    return {"url": f"file://{name}", "status": "fetched", "content_type": "text/html", "text": html}
+
+
+async def _heartbeat(lags: List[float], interval: float = 0.01):
+    """Record how late each tick runs; a late tick means the loop was blocked"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def measure(name: str, extract, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run one extraction strategy under the heartbeat"""
+    lags: List[float] = []
+    heartbeat = asyncio.get_running_loop().create_task(_heartbeat(lags))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    first_result = await extract(documents)
+    elapsed = time.perf_counter() - start
+    heartbeat.cancel()
+    return {
+        "strategy": name,
+        "documents": len(documents),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(len(documents) / elapsed, 1) if elapsed else None,
+        "first_result_seconds": round(first_result - start, 3) if first_result else None,
+        "max_loop_lag_seconds": round(max(lags, default=0.0), 3)
+    }
+
+
+async def main(documents: List[Dict[str, Any]], workers: int, max_chars: int):
+    async def inline(docs):
+        first = None
+        for document in docs:
+            extract_main_text(document["text"], max_chars)
+            first = first or time.perf_counter()
+            # Let other coroutines in between documents, as a per-document handler would
+            await asyncio.sleep(0)
+        return first
+
+    extractor = TextExtractor(max_workers=workers, max_chars=max_chars)
+
+    async def pool(docs):
+        first = None
+        async for _ in extractor.extract_stream(docs):
+            first = first or time.perf_counter()
+        return first
+
+    try:
+        # Start the worker processes before timing
+        await extractor.extract_all(documents[:workers])
+        report = [
+            await measure("inline", inline, documents),
+            await measure(f"process_pool_{workers}", pool, documents)
+        ]
+    finally:
+        extractor.shutdown()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of saved .html pages")
+    parser.add_argument("--synthetic", type=int, default=100, help="synthetic pages when no corpus is given")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--max-chars", type=int, default=20000, help="text cap per document")
+    args = parser.parse_args()
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.synthetic)
+    if not corpus:
+        raise SystemExit(f"No .html pages found in {args.corpus}")
+    asyncio.run(main(corpus, args.workers, args.max_chars))
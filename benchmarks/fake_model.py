@@ -0,0 +1,271 @@
+"""Offline stand-in for LiteLLMModel, for benchmarking the pipeline without the model API
+
+FakeModel answers like Gemini would in shape (plain text for completions,
+a `final_answer(...)` code block inside a CodeAgent, a JSON array for batch
+optimization prompts) after a latency drawn from a configurable
+distribution, and fails with configurable 5xx and 429 rates. Draws are
+seeded from the agent, prompt and call number, so a run with the same
+seed and inputs sees the same latencies, token counts and failures.
+"""
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from smolagents.models import ChatMessage, MessageRole
+
+try:
+    from smolagents.monitoring import TokenUsage
+except ImportError:
+    # Older smolagents releases report usage on the model instead of the response
+    TokenUsage = None
+
+from utils.model_proxy import ModelProxy, message_role, message_text
+
+# Roughly four characters per token for English prose
+CHARS_PER_TOKEN = 4
+# Generated text comes in lines of this many tokens and words, short enough to pass as tweets
+TOKENS_PER_LINE = 40
+WORDS_PER_LINE = 20
+
+BATCH_ITEMS = re.compile(r"Items \(JSON array\):\s*(\[.*\])", re.S)
+# CodeAgent's code block tags by closing tag, which it passes as a stop sequence
+CODE_BLOCK_TAGS = {
+    "</code>": ("<code>", "</code>"),
+    "\n```": ("```python", "\n```")
+}
+DEFAULT_CODE_BLOCK_TAGS = CODE_BLOCK_TAGS["</code>"]
+
+
+class Distribution:
+    """Random values described by a spec string
+
+    "constant:X", "uniform:LOW,HIGH", or "lognormal:MEDIAN,SIGMA" (the
+    long-tailed shape model latencies usually have).
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        try:
+            self.params = [float(value) for value in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid distribution spec: {spec}")
+        expected = {"constant": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid distribution spec: {spec} (use constant:X, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA)")
+        self.kind = kind
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+class SeededDraws:
+    """Random generators for individual calls, seeded from the seed, a caller name and the prompt
+
+    Repeats of a prompt (retries) get fresh but still deterministic draws.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._prompt_calls: Dict[str, int] = {}
+
+    def rng(self, name: str, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{name}\n{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._prompt_calls.get(digest, 0)
+            self._prompt_calls[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+
+class FakeResponse:
+    """The parts of an HTTP response that error handling looks at"""
+
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeModelError(Exception):
+    """A failed model call, shaped like the provider errors LiteLLM raises"""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else {}
+        self.response = FakeResponse(status_code, headers)
+
+
+class FakeModel:
+    """Drop-in for LiteLLMModel with scripted latency, token counts and failures
+
+    Sleeps on the calling thread like a blocking API call would, so agent
+    executors and rate limiting behave as they do against the real model.
+    """
+
+    def __init__(self, name: str,
+                 latency: str = "lognormal:0.8,0.4",
+                 completion_tokens: str = "uniform:150,600",
+                 failure_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0,
+                 retry_after: float = 1.0,
+                 seed: int = 0):
+        self.name = name
+        self.model_id = f"fake/{name}"
+        self.latency = Distribution(latency)
+        self.completion_tokens = Distribution(completion_tokens)
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.draws = SeededDraws(seed)
+        self.last_input_token_count: Optional[int] = None
+        self.last_output_token_count: Optional[int] = None
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.seconds = 0.0
+
+    def __call__(self, messages: List[Any], **kwargs) -> ChatMessage:
+        return self.generate(messages, **kwargs)
+
+    def generate(self, messages: List[Any], stop_sequences: Optional[List[str]] = None, **kwargs) -> ChatMessage:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(message_text(message) for message in messages)
+        with self._lock:
+            self.calls += 1
+        rng = self.draws.rng(self.name, prompt)
+
+        latency = max(0.0, self.latency.sample(rng))
+        outcome = rng.random()
+        if outcome < self.rate_limit_rate:
+            # Quota errors come back quickly, before any generation happens
+            time.sleep(min(latency, 0.05))
+            with self._lock:
+                self.rate_limited += 1
+            raise FakeModelError(f"{self.model_id}: 429 RESOURCE_EXHAUSTED", 429, self.retry_after)
+        time.sleep(latency)
+        if outcome < self.rate_limit_rate + self.failure_rate:
+            with self._lock:
+                self.failures += 1
+                self.seconds += latency
+            raise FakeModelError(f"{self.model_id}: 503 model overloaded", 503)
+
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = max(1, int(self.completion_tokens.sample(rng)))
+        system = "\n".join(message_text(message) for message in messages if message_role(message) == "system")
+        agentic = is_code_agent_step(system, stop_sequences)
+        content = apply_stop_sequences(fake_answer(prompt, output_tokens, rng, agentic, stop_sequences), stop_sequences)
+
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.seconds += latency
+        self.last_input_token_count = input_tokens
+        self.last_output_token_count = output_tokens
+        if TokenUsage is not None:
+            return ChatMessage(role=MessageRole.ASSISTANT, content=content,
+                               token_usage=TokenUsage(input_tokens=input_tokens, output_tokens=output_tokens))
+        return ChatMessage(role=MessageRole.ASSISTANT, content=content)
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls answered or failed so far, with the tokens and simulated latency they accounted for"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "rate_limited": self.rate_limited,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "model_seconds": round(self.seconds, 3)
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def is_code_agent_step(system: str, stop_sequences: Optional[List[str]] = None) -> bool:
+    """Whether a call is a CodeAgent step, which must be answered with a code block
+
+    CodeAgent stops generation at its closing code tag; the system prompt
+    may not reach the API as one (LiteLLM folds it into the first user
+    turn for some Gemini models).
+    """
+    return "final_answer" in system or any(stop in CODE_BLOCK_TAGS for stop in stop_sequences or [])
+
+
+def code_block_tags(stop_sequences: Optional[List[str]] = None) -> Tuple[str, str]:
+    """Opening and closing code block tags of the CodeAgent that sent these stop sequences"""
+    for stop in stop_sequences or []:
+        if stop in CODE_BLOCK_TAGS:
+            return CODE_BLOCK_TAGS[stop]
+    return DEFAULT_CODE_BLOCK_TAGS
+
+
+def apply_stop_sequences(text: str, stop_sequences: Optional[List[str]] = None) -> str:
+    """Cut the text before the first stop sequence, as the API does"""
+    for stop in stop_sequences or []:
+        position = text.find(stop)
+        if position != -1:
+            text = text[:position]
+    return text
+
+
+def fake_answer(prompt: str, tokens: int, rng: random.Random, agentic: bool = False,
+                stop_sequences: Optional[List[str]] = None) -> str:
+    """Text of roughly `tokens` tokens built from the prompt's own words
+
+    Batch optimization prompts get a JSON array echoing every item's id, and
+    CodeAgent runs get a `final_answer` call in the agent's code block tags,
+    so every agent run ends after one model call.
+    """
+    batch = BATCH_ITEMS.search(prompt)
+    if batch:
+        try:
+            items = json.loads(batch.group(1))
+            answer = json.dumps([{"id": item["id"], "content": f"{item.get('content', '')} #AI"} for item in items])
+        except (ValueError, KeyError, TypeError):
+            answer = "[]"
+    else:
+        words = re.findall(r"[A-Za-z]{3,}", prompt) or ["content"]
+        lines = []
+        for _ in range(max(1, tokens // TOKENS_PER_LINE)):
+            lines.append("- " + " ".join(rng.choice(words) for _ in range(WORDS_PER_LINE)).capitalize() + ".")
+        answer = "\n".join(lines)
+    if agentic:
+        opening, closing = code_block_tags(stop_sequences)
+        return f"Thought: I have the answer.\n{opening}\nfinal_answer({answer!r})\n{closing}"
+    return answer
+
+
+def install_fake_models(agents: List[Any], **config) -> Dict[str, FakeModel]:
+    """Put a FakeModel beneath each agent's metering, tracing, rate limiting and cache layers
+
+    Returns the fakes by agent name, for reading their call counts.
+    """
+    fakes = {}
+    for agent in agents:
+        proxy = agent.model
+        if not isinstance(proxy, ModelProxy):
+            agent.model = fakes[agent.name] = FakeModel(agent.name, **config)
+            continue
+        while isinstance(proxy.wrapped, ModelProxy):
+            proxy = proxy.wrapped
+        proxy.wrapped = fakes[agent.name] = FakeModel(agent.name, **config)
+    return fakes
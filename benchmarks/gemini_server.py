@@ -0,0 +1,270 @@
+"""Local stand-in for the Gemini generateContent API, for load-testing the real LiteLLM path offline
+
+Answers generateContent and streamGenerateContent (SSE with alt=sse, else a
+JSON array of chunks) the way the Gemini API does, with scripted latency,
+per-API-key requests- and tokens-per-minute quotas that return 429 with
+Retry-After, and injectable 5xx errors. Response text is generated like
+benchmarks.fake_model's, so agents parse it as they would a real answer.
+
+    python -m benchmarks.gemini_server --port 8089 --rpm 15 --error-rate 0.02
+    GEMINI_API_BASE=http://127.0.0.1:8089 python main.py
+
+GET /stats reports requests, responses by status, and peak concurrency.
+"""
+import os
+import sys
+import json
+import time
+import math
+import asyncio
+import argparse
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from benchmarks.fake_model import (
+    Distribution, SeededDraws, apply_stop_sequences, estimate_tokens, fake_answer, is_code_agent_step
+)
+
+logger = logging.getLogger(__name__)
+
+# Characters of generated text per streamed chunk
+CHUNK_CHARS = 200
+ERROR_STATUSES = {
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    502: "UNAVAILABLE",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED"
+}
+
+
+def error_response(code: int, message: str, retry_after: Optional[float] = None) -> web.Response:
+    """Error in the Gemini API's JSON shape; quota errors carry RetryInfo and a Retry-After header"""
+    error: Dict[str, Any] = {"code": code, "message": message, "status": ERROR_STATUSES.get(code, "UNKNOWN")}
+    headers = {}
+    if retry_after is not None:
+        error["details"] = [{
+            "@type": "type.googleapis.com/google.rpc.RetryInfo",
+            "retryDelay": f"{math.ceil(retry_after)}s"
+        }]
+        headers["Retry-After"] = str(math.ceil(retry_after))
+    return web.json_response({"error": error}, status=code, headers=headers)
+
+
+def request_text(body: Dict[str, Any]) -> Tuple[str, str]:
+    """System instruction and conversation text of a generateContent request body"""
+    def parts_text(content: Dict[str, Any]) -> str:
+        return "\n".join(str(part.get("text", "")) for part in content.get("parts", []) if isinstance(part, dict))
+
+    system = parts_text(body.get("systemInstruction") or body.get("system_instruction") or {})
+    conversation = "\n".join(parts_text(content) for content in body.get("contents", []))
+    return system, conversation
+
+
+class QuotaWindow:
+    """Requests and tokens per API key over the last minute, as Gemini's per-key quotas count them"""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._calls: Dict[str, Deque[Tuple[float, int]]] = {}
+
+    def acquire(self, key: str, tokens: int) -> Optional[float]:
+        """Record a request, or return the seconds until it would fit within the quota"""
+        now = time.monotonic()
+        calls = self._calls.setdefault(key, deque())
+        while calls and calls[0][0] <= now - 60:
+            calls.popleft()
+        if self.rpm and len(calls) >= self.rpm:
+            return calls[0][0] + 60 - now
+        if self.tpm and calls and sum(count for _, count in calls) + tokens > self.tpm:
+            # Wait until enough of the window's tokens have aged out
+            used = sum(count for _, count in calls) + tokens
+            for started, count in calls:
+                used -= count
+                if used <= self.tpm:
+                    return started + 60 - now
+        calls.append((now, tokens))
+        return None
+
+
+class GeminiServer:
+    """Handlers and counters of the stand-in API"""
+
+    def __init__(self,
+                 latency: str = "lognormal:0.8,0.4",
+                 chunk_delay: str = "constant:0.05",
+                 completion_tokens: str = "uniform:150,600",
+                 rpm: int = 0,
+                 tpm: int = 0,
+                 error_rate: float = 0.0,
+                 error_codes: Optional[List[int]] = None,
+                 seed: int = 0):
+        self.latency = Distribution(latency)
+        self.chunk_delay = Distribution(chunk_delay)
+        self.completion_tokens = Distribution(completion_tokens)
+        self.quota = QuotaWindow(rpm, tpm)
+        self.error_rate = error_rate
+        self.error_codes = error_codes or [503]
+        self.draws = SeededDraws(seed)
+
+        self.requests = 0
+        self.responses: Dict[int, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/stats", self.handle_stats)
+        # Model paths contain a colon (models/gemini-2.0-flash-exp:generateContent), so match them whole
+        app.router.add_post("/{path:.*}", self.handle_generate)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "responses": {str(status): count for status, count in sorted(self.responses.items())},
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight
+        }
+
+    async def handle_generate(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await self._generate(request)
+        finally:
+            self.in_flight -= 1
+        self.responses[response.status] = self.responses.get(response.status, 0) + 1
+        return response
+
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        target, _, method = request.match_info["path"].rpartition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            return error_response(404, f"Method not found: {method or request.path}")
+        model = target.rsplit("/", 1)[-1]
+        key = request.headers.get("x-goog-api-key") or request.query.get("key")
+        if not key:
+            return error_response(400, "API key not valid. Please pass a valid API key.")
+        try:
+            body = await request.json()
+        except ValueError:
+            return error_response(400, "Invalid JSON payload received.")
+
+        system, conversation = request_text(body)
+        prompt = f"{system}\n{conversation}" if system else conversation
+        input_tokens = estimate_tokens(prompt)
+        retry_after = self.quota.acquire(key, input_tokens)
+        if retry_after is not None:
+            return error_response(429, "Resource has been exhausted (e.g. check quota).", retry_after)
+
+        rng = self.draws.rng(key, prompt)
+        latency = max(0.0, self.latency.sample(rng))
+        if rng.random() < self.error_rate:
+            await asyncio.sleep(latency)
+            code = rng.choice(self.error_codes)
+            return error_response(code, "The model is overloaded. Please try again later.")
+
+        output_tokens = max(1, int(self.completion_tokens.sample(rng)))
+        config = body.get("generationConfig") or {}
+        if config.get("maxOutputTokens"):
+            output_tokens = min(output_tokens, int(config["maxOutputTokens"]))
+        stop_sequences = config.get("stopSequences") or config.get("stop_sequences")
+        text = apply_stop_sequences(
+            fake_answer(conversation, output_tokens, rng, is_code_agent_step(system, stop_sequences), stop_sequences),
+            stop_sequences
+        )
+        usage = {
+            "promptTokenCount": input_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": input_tokens + output_tokens
+        }
+
+        if method == "generateContent":
+            await asyncio.sleep(latency)
+            return web.json_response(self._chunk(text, model, "STOP", usage))
+        return await self._stream(request, text, model, usage, latency, rng)
+
+    async def _stream(self, request: web.Request, text: str, model: str, usage: Dict[str, int],
+                      latency: float, rng: Any) -> web.StreamResponse:
+        """Send the answer in chunks: the first after the latency, the rest a chunk delay apart"""
+        sse = request.query.get("alt") == "sse"
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream" if sse else "application/json"
+        })
+        await response.prepare(request)
+        pieces = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)] or [""]
+        await asyncio.sleep(latency)
+        if not sse:
+            await response.write(b"[")
+        for index, piece in enumerate(pieces):
+            if index:
+                await asyncio.sleep(max(0.0, self.chunk_delay.sample(rng)))
+            last = index == len(pieces) - 1
+            chunk = json.dumps(self._chunk(piece, model, "STOP" if last else None, usage if last else None))
+            if sse:
+                await response.write(f"data: {chunk}\r\n\r\n".encode("utf-8"))
+            else:
+                await response.write(f"{',' if index else ''}{chunk}\r\n".encode("utf-8"))
+        if not sse:
+            await response.write(b"]")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _chunk(text: str, model: str, finish_reason: Optional[str],
+               usage: Optional[Dict[str, int]]) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        chunk: Dict[str, Any] = {"candidates": [candidate], "modelVersion": model}
+        if usage:
+            chunk["usageMetadata"] = usage
+        return chunk
+
+
+async def start_server(server: GeminiServer, host: str = "127.0.0.1", port: int = 8089) -> web.AppRunner:
+    """Serve on the running event loop; call `cleanup()` on the returned runner to stop"""
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Gemini stand-in listening on http://{host}:{port}")
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4",
+                        help="seconds to the first token: constant:X, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--chunk-delay", default="constant:0.05", help="seconds between streamed chunks, same forms")
+    parser.add_argument("--completion-tokens", default="uniform:150,600", help="completion size distribution, same forms")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute per API key; 0 for no limit")
+    parser.add_argument("--tpm", type=int, default=0, help="prompt tokens per minute per API key; 0 for no limit")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with a 5xx")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[503], help="5xx statuses to inject")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = GeminiServer(
+        latency=args.latency,
+        chunk_delay=args.chunk_delay,
+        completion_tokens=args.completion_tokens,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        error_rate=args.error_rate,
+        error_codes=args.error_codes,
+        seed=args.seed
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
@@ -0,0 +1,211 @@
+"""Local stand-in for the research links, for exercising LinkFetcher offline
+
+Serves pages with ETag and Last-Modified validators (answered with 304 when
+they match), a page larger than the fetch size cap, a page slower than the
+fetch timeout, a non-text download and error statuses, and counts requests
+per path.
+
+    python -m benchmarks.link_server --port 8090
+    python -m benchmarks.link_server --check
+
+GET /stats reports requests per path and responses by status. `--check`
+starts the server, runs a LinkFetcher against it and exits with status 1
+unless duplicate links share one request, unchanged pages come back as 304s,
+oversized bodies are truncated, slow pages time out and the HTTP cache evicts
+down to its byte budget.
+"""
+import os
+import sys
+import asyncio
+import hashlib
+import argparse
+import logging
+import tempfile
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+PAGE_COUNT = 10
+
+
+def page_body(index: int, size: int) -> bytes:
+    """HTML page of roughly `size` bytes"""
+    paragraph = f"<p>Paragraph about topic {index}: agents, research and content pipelines.</p>\n"
+    repeats = max(1, size // len(paragraph))
+    return f"<html><head><title>Page {index}</title></head><body>\n{paragraph * repeats}</body></html>".encode("utf-8")
+
+
+class LinkServer:
+    """Handlers and counters of the stand-in site"""
+
+    def __init__(self, page_bytes: int = 20_000, large_bytes: int = 4 * 1024 * 1024, slow_seconds: float = 5.0):
+        self.page_bytes = page_bytes
+        self.large_bytes = large_bytes
+        self.slow_seconds = slow_seconds
+        self.requests: Dict[str, int] = {}
+        self.responses: Dict[int, int] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_get("/page/{index:\\d+}", self.handle_page)
+        app.router.add_get("/unvalidated/{index:\\d+}", self.handle_unvalidated)
+        app.router.add_get("/large", self.handle_large)
+        app.router.add_get("/slow", self.handle_slow)
+        app.router.add_get("/binary", self.handle_binary)
+        app.router.add_get("/status/{code:\\d+}", self.handle_status)
+        return app
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(sorted(self.requests.items())),
+            "responses": {str(status): count for status, count in sorted(self.responses.items())}
+        }
+
+    def _count(self, request: web.Request, response: web.StreamResponse) -> web.StreamResponse:
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        self.responses[response.status] = self.responses.get(response.status, 0) + 1
+        return response
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        """Page with both validators; matching conditional requests get an empty 304"""
+        body = page_body(int(request.match_info["index"]), self.page_bytes)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        headers = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+        if request.headers.get("If-None-Match") == etag or request.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            return self._count(request, web.Response(status=304, headers=headers))
+        return self._count(request, web.Response(body=body, content_type="text/html", charset="utf-8",
+                                                 headers=headers))
+
+    async def handle_unvalidated(self, request: web.Request) -> web.Response:
+        """Page without validators, which the fetcher does not cache"""
+        body = page_body(int(request.match_info["index"]), self.page_bytes)
+        return self._count(request, web.Response(body=body, content_type="text/html", charset="utf-8"))
+
+    async def handle_large(self, request: web.Request) -> web.Response:
+        body = page_body(0, self.large_bytes)
+        return self._count(request, web.Response(body=body, content_type="text/html", charset="utf-8"))
+
+    async def handle_slow(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.slow_seconds)
+        return self._count(request, web.Response(text="<html><body>late</body></html>", content_type="text/html"))
+
+    async def handle_binary(self, request: web.Request) -> web.Response:
+        return self._count(request, web.Response(body=b"%PDF-1.4\n", content_type="application/pdf"))
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        code = int(request.match_info["code"])
+        return self._count(request, web.Response(status=code, text=f"status {code}"))
+
+
+async def start_server(server: LinkServer, host: str = "127.0.0.1", port: int = 8090) -> web.AppRunner:
+    """Serve on the running event loop; call `cleanup()` on the returned runner to stop"""
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Link stand-in listening on http://{host}:{port}")
+    return runner
+
+
+async def run_checks(host: str, port: int, timeout: float, max_bytes: int) -> List[str]:
+    """Run a LinkFetcher against a fresh server; returns the failed checks"""
+    from utils.disk_cache import DiskCache
+    from utils.link_fetcher import LinkFetcher
+
+    server = LinkServer(page_bytes=max_bytes // 8, large_bytes=max_bytes * 2, slow_seconds=timeout * 3)
+    runner = await start_server(server, host, port)
+    failures = []
+    base = f"http://{host}:{port}"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(os.path.join(directory, "http.sqlite"))
+            fetcher = LinkFetcher(cache=cache, timeout=timeout, max_bytes=max_bytes)
+            pages = [f"{base}/page/{index}" for index in range(PAGE_COUNT)]
+            # Same pages again, spelled differently: tracking parameters, fragments, upper-case scheme
+            duplicates = [f"{page}?utm_source=sheet#section" for page in pages]
+            duplicates += [page.replace("http://", "HTTP://") for page in pages]
+            extras = [f"{base}/unvalidated/0", f"{base}/large", f"{base}/slow", f"{base}/binary",
+                      f"{base}/status/404", f"{base}/status/503"]
+            try:
+                first = {doc["url"]: doc for doc in await fetcher.fetch_all(pages + duplicates + extras)}
+                # Concurrent fetches of one URL outside fetch_all share a request as well
+                await asyncio.gather(*(fetcher.fetch(f"{base}/unvalidated/1") for _ in range(5)))
+                second = await fetcher.fetch_all(pages)
+            finally:
+                await fetcher.close()
+
+            requests = server.requests
+            repeated = {path: count for path, count in requests.items()
+                        if path.startswith("/page/") and count != 2}
+            if len(first) != len(pages) + len(extras):
+                failures.append(f"dedupe: fetch_all returned {len(first)} documents for "
+                                f"{len(pages) + len(extras)} distinct links")
+            if repeated:
+                failures.append(f"dedupe/304: expected two requests per page, got {repeated}")
+            if requests.get("/unvalidated/1") != 1:
+                failures.append(f"dedupe: 5 concurrent fetches made {requests.get('/unvalidated/1')} requests")
+            if server.responses.get(304) != PAGE_COUNT or not all(doc.get("from_cache") for doc in second):
+                failures.append(f"304: {server.responses.get(304, 0)} not-modified responses for {PAGE_COUNT} "
+                                f"revalidated pages")
+
+            large = first[f"{base}/large"]
+            if not large.get("truncated") or len(large.get("text", "").encode("utf-8")) > max_bytes:
+                failures.append(f"size cap: /large came back with {len(large.get('text', ''))} characters, "
+                                f"truncated={large.get('truncated')}")
+            slow = first[f"{base}/slow"]
+            if slow.get("status") != "failed":
+                failures.append(f"timeout: /slow came back {slow.get('status')}")
+            for path in ("/binary", "/status/404", "/status/503"):
+                if first[f"{base}{path}"].get("status") != "failed":
+                    failures.append(f"errors: {path} came back {first[f'{base}{path}'].get('status')}")
+
+            logger.info(f"Fetcher: {fetcher.stats()}")
+
+            # A budget of a few pages keeps only the most recently stored ones
+            budget = max(1, int(cache.stats()["bytes"] / PAGE_COUNT * 3))
+            small = DiskCache(os.path.join(directory, "small.sqlite"), max_bytes=budget)
+            fetcher = LinkFetcher(cache=small, timeout=timeout, max_bytes=max_bytes)
+            try:
+                await fetcher.fetch_all(pages)
+            finally:
+                await fetcher.close()
+            small_stats = small.stats()
+            if small_stats["bytes"] > budget or not 0 < small_stats["entries"] < PAGE_COUNT:
+                failures.append(f"cache budget: {small_stats['entries']} pages in {small_stats['bytes']} bytes "
+                                f"under a {budget} byte cap")
+            logger.info(f"Server: {server.stats()}")
+    finally:
+        await runner.cleanup()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--page-bytes", type=int, default=20_000)
+    parser.add_argument("--large-bytes", type=int, default=4 * 1024 * 1024, help="size of /large")
+    parser.add_argument("--slow-seconds", type=float, default=5.0, help="delay of /slow")
+    parser.add_argument("--check", action="store_true", help="run the LinkFetcher checks and exit")
+    parser.add_argument("--timeout", type=float, default=1.0, help="fetch timeout for --check")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024, help="fetch size cap for --check")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        failed = asyncio.run(run_checks(args.host, args.port, args.timeout, args.max_bytes))
+        for failure in failed:
+            print(f"FAILED {failure}")
+        print("All checks passed" if not failed else f"{len(failed)} checks failed")
+        sys.exit(1 if failed else 0)
+
+    server = LinkServer(page_bytes=args.page_bytes, large_bytes=args.large_bytes, slow_seconds=args.slow_seconds)
+    web.run_app(server.app(), host=args.host, port=args.port)
@@ -0,0 +1,259 @@
+"""Run Orchestrator.run end to end against fake models and report throughput
+
+Every agent's LiteLLMModel is replaced by a FakeModel with scripted latency,
+completion sizes and 5xx/429 rates, underneath the real metering, tracing,
+rate limiting and caching layers. Each scenario generates a sheet of N
+topics (no source links, so nothing is fetched), runs one task through a
+fresh Orchestrator and reports wall time, event-loop lag, peak traced
+memory, and model calls and time per phase. Email is not sent. Offline; no
+credentials needed.
+
+With GEMINI_API_BASE set (see benchmarks.gemini_server), no fakes are
+installed and model calls go through LiteLLM to that server instead.
+
+    python -m benchmarks.pipeline_throughput --topics 1 10 100 --save-baseline baseline.json
+    python -m benchmarks.pipeline_throughput --baseline baseline.json --tolerance 0.2
+
+With --baseline the run exits with status 1 if any scenario regressed past
+the tolerance. GEMINI_RPM defaults to a limit high enough that the rate
+limiter stays out of the way; set it to include quota waits.
+"""
+import os
+import sys
+import time
+import json
+import shutil
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix="pipeline_throughput_")
+os.environ.update({
+    "LLM_CACHE_AGENTS": "",
+    "RESEARCH_STALE_HOURS": "0",
+    "RESEARCH_KB_PATH": os.path.join(WORK_DIR, "research_kb.sqlite"),
+    "HTTP_CACHE_PATH": os.path.join(WORK_DIR, "http.sqlite"),
+    "SEARCH_CACHE_PATH": os.path.join(WORK_DIR, "search_results.sqlite"),
+    "TRACE_PATH": os.path.join(WORK_DIR, "traces.jsonl"),
+    # Distinct keys so agents share rate limiters the way they do in production
+    "GEMINI_API_KEY_1": "benchmark-key-1",
+    "GEMINI_API_KEY_2": "benchmark-key-2",
+    "GEMINI_API_KEY_3": "benchmark-key-3",
+    "GEMINI_API_KEY_4": "benchmark-key-4"
+})
+os.environ.setdefault("GEMINI_RPM", "100000")
+
+import pandas as pd
+
+from benchmarks.fake_model import install_fake_models
+from orchestrator import Orchestrator
+from utils.agent_executor import executors
+from utils.loop_monitor import EventLoopMonitor
+from utils.metrics import AGENT_RUN_SECONDS, MODEL_CALL_SECONDS, MODEL_TOKENS, PHASE_SECONDS
+
+PHASES = ("spreadsheet", "research", "content", "blog_writing", "social_media", "optimization", "task")
+# Phase whose model calls each agent makes
+AGENT_PHASES = {
+    "research": "research",
+    "blog_writer": "blog_writing",
+    "twitter": "social_media",
+    "linkedin": "social_media",
+    "optimizing": "optimization"
+}
+# Loop lag below this is scheduler noise and never counts as a regression
+LAG_FLOOR_SECONDS = 0.1
+# Fake answers end every agent run on its first answered call; more means agents are looping
+MAX_CALLS_PER_AGENT_RUN = 1
+
+
+def write_sheet(path: str, topics: int):
+    """Content sheet of distinct topics without source links"""
+    pd.DataFrame({
+        "Topic": [f"Benchmark topic {i}: automating content workflow {i}" for i in range(topics)],
+        "Links": [""] * topics,
+        "Description": [f"How teams automate step {i} of their content workflow" for i in range(topics)],
+        "Keywords": ["AI, automation, content"] * topics
+    }).to_csv(path, index=False)
+
+
+def metric_totals() -> Dict[str, Dict[str, float]]:
+    """Cumulative phase time, and model calls and tokens per agent, for diffing around a run"""
+    totals = {}
+    for name in PHASES:
+        summary = PHASE_SECONDS.summary(phase=name)
+        totals[f"phase:{name}"] = {"count": summary["count"], "sum": summary["sum"]}
+    for agent in AGENT_PHASES:
+        totals[f"calls:{agent}"] = MODEL_CALL_SECONDS.summary(agent=agent)
+        for mode in ("agentic", "completion"):
+            totals[f"runs:{agent}:{mode}"] = AGENT_RUN_SECONDS.summary(agent=agent, mode=mode)
+        for kind in ("prompt", "completion"):
+            totals[f"{kind}:{agent}"] = MODEL_TOKENS.summary(agent=agent, kind=kind)
+    return totals
+
+
+async def run_scenario(topics: int, model_config: Dict[str, Any]) -> Dict[str, Any]:
+    """One task over a sheet of `topics` topics, measured"""
+    directory = os.path.join(WORK_DIR, f"topics_{topics}")
+    os.makedirs(directory)
+    sheet = os.path.join(directory, "sheet.csv")
+    write_sheet(sheet, topics)
+    os.environ["SHEET_SOURCE"] = sheet
+    os.environ["CHECKPOINT_DIR"] = os.path.join(directory, "checkpoints")
+    os.environ["ROW_LEDGER_PATH"] = os.path.join(directory, "row_ledger.json")
+
+    orchestrator = Orchestrator()
+    agents = [
+        orchestrator.research_agent,
+        orchestrator.blog_writer_agent,
+        orchestrator.twitter_agent,
+        orchestrator.linkedin_agent,
+        orchestrator.optimizing_agent
+    ]
+    fakes = {} if os.getenv("GEMINI_API_BASE") else install_fake_models(agents, **model_config)
+
+    async def skip_email(email_data: Dict[str, Any], attachments: List[Dict[str, Any]]):
+        pass
+
+    orchestrator.email_sender.send_results = skip_email
+
+    before = metric_totals()
+    monitor = EventLoopMonitor(threshold=LAG_FLOOR_SECONDS)
+    monitor.start()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        context = await orchestrator.run(f"benchmark_{topics}")
+    finally:
+        wall_seconds = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await monitor.stop()
+        await orchestrator.close()
+    after = metric_totals()
+
+    def delta(key: str, field: str = "count") -> float:
+        return after[key][field] - before[key][field]
+
+    results = context.results
+    calls_by_phase: Dict[str, int] = {}
+    for agent, phase in AGENT_PHASES.items():
+        calls_by_phase[phase] = calls_by_phase.get(phase, 0) + delta(f"calls:{agent}")
+    stats = [fake.stats() for fake in fakes.values()]
+    # Calls that got an answer (token usage is only reported for those) per agent run
+    calls_per_run = {}
+    for agent in AGENT_PHASES:
+        runs = delta(f"runs:{agent}:agentic") + delta(f"runs:{agent}:completion")
+        if runs:
+            calls_per_run[agent] = round(delta(f"prompt:{agent}") / runs, 2)
+    return {
+        "topics": topics,
+        "status": results["status"],
+        "wall_seconds": round(wall_seconds, 3),
+        "topics_per_minute": round(topics * 60 / wall_seconds, 2) if wall_seconds else None,
+        "max_loop_lag_seconds": round(monitor.max_lag, 4),
+        "loop_stalls": monitor.stall_count,
+        "peak_memory_mb": round(peak_bytes / 2 ** 20, 2),
+        "phase_seconds": {
+            name: round(delta(f"phase:{name}", "sum"), 3) for name in PHASES if delta(f"phase:{name}")
+        },
+        "model_calls": calls_by_phase,
+        "model_calls_total": sum(calls_by_phase.values()),
+        "calls_per_agent_run": calls_per_run,
+        # Only the fakes know which calls they failed; against a server, see its /stats
+        "model_failures": sum(item["failures"] + item["rate_limited"] for item in stats) if fakes else None,
+        "tokens": {
+            "input": round(sum(delta(f"prompt:{agent}", "sum") for agent in AGENT_PHASES)),
+            "output": round(sum(delta(f"completion:{agent}", "sum") for agent in AGENT_PHASES))
+        },
+        "items": {key: len(results.get(key) or []) for key in ("blog_posts", "tweets", "linkedin_posts")},
+        "errors": len(results["errors"])
+    }
+
+
+def excess_calls(scenario: Dict[str, Any]) -> List[str]:
+    """Agents whose runs took more answered model calls than a fake answer needs"""
+    return [
+        f"{scenario['topics']} topics: {agent} made {calls} answered model calls per run (expected {MAX_CALLS_PER_AGENT_RUN})"
+        for agent, calls in scenario["calls_per_agent_run"].items()
+        if calls > MAX_CALLS_PER_AGENT_RUN
+    ]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of each scenario against the baseline scenario with the same topic count"""
+    if baseline.get("config") != report["config"]:
+        print("Warning: baseline was recorded with a different fake model configuration")
+    previous = {scenario["topics"]: scenario for scenario in baseline.get("scenarios", [])}
+    regressions = []
+    for scenario in report["scenarios"]:
+        before = previous.get(scenario["topics"])
+        if before is None:
+            continue
+        for key in ("wall_seconds", "peak_memory_mb", "max_loop_lag_seconds", "model_calls_total"):
+            limit = before[key] * (1 + tolerance)
+            if key == "max_loop_lag_seconds":
+                limit = max(limit, LAG_FLOOR_SECONDS)
+            if scenario[key] > limit:
+                regressions.append(f"{scenario['topics']} topics: {key} {scenario[key]} > {before[key]} (+{tolerance:.0%})")
+        if before["status"] == "completed" and scenario["status"] != "completed":
+            regressions.append(f"{scenario['topics']} topics: status {scenario['status']}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    model_config = {
+        "latency": args.latency,
+        "completion_tokens": args.completion_tokens,
+        "failure_rate": args.failure_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "seed": args.seed
+    }
+    report = {"config": model_config, "scenarios": []}
+    try:
+        for topics in args.topics:
+            result = await run_scenario(topics, model_config)
+            report["scenarios"].append(result)
+            print(f"{topics} topics: {json.dumps(result)}")
+    finally:
+        executors.shutdown()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    looping = [problem for scenario in report["scenarios"] for problem in excess_calls(scenario)]
+    for problem in looping:
+        print(f"Invalid run: {problem}")
+    if looping:
+        # The numbers measure agents retrying unparsable answers, not the pipeline
+        return 1
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, nargs="+", default=[1, 10, 100], help="topic counts to run, one scenario each")
+    parser.add_argument("--latency", default="lognormal:0.8,0.4",
+                        help="model latency in seconds: constant:X, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--completion-tokens", default="uniform:150,600", help="completion size distribution, same forms")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of model calls failing with a 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of model calls failing with a 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="compare against this saved report; exit 1 on regression")
+    parser.add_argument("--save-baseline", help="write this run's report here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative increase over the baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,110 @@
+"""Replay a recorded run offline and compare it with the recording
+
+Record a real run first, with the response cache and research reuse off so
+every model call reaches the cassette:
+
+    LLM_CASSETTE_MODE=record LLM_CACHE_AGENTS= RESEARCH_STALE_HOURS=0 python main.py
+
+then replay it after a change:
+
+    python -m benchmarks.replay --cassette cassettes/llm.jsonl --time-scale 1 --tolerance 0.2
+
+Model calls are answered from the cassette with their recorded latency
+times --time-scale, and the sheet rows, fetched documents and web search
+results from the cassette as recorded, so nothing goes out to the network.
+GEMINI_RPM and GEMINI_TPM are raised so the rate limiter stays out of the
+way. The script exits with status 1 if any model call or input had no
+exact recording (the run took a different path than the one recorded), if
+the model calls per agent differ from the first recorded run's, or, at time
+scale 1, if a phase is slower than the tolerance allows.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Phase slowdowns smaller than this are timer noise, whatever the ratio
+PHASE_SLACK_SECONDS = 0.05
+
+
+def regressions(comparison: Dict[str, Any], cassette: Dict[str, Any], tolerance: float) -> List[str]:
+    """Differences that fail the replay"""
+    found = []
+    if cassette["approximate"]:
+        found.append(f"{cassette['approximate']} model calls replayed from a recording with a different prompt")
+    if cassette["misses"]:
+        found.append(f"{cassette['misses']} model calls with no recording to replay")
+    if cassette["input_misses"]:
+        found.append(f"{cassette['input_misses']} sheet reads, fetches or searches with no recording to replay")
+    if comparison["status"]["recorded"] == "completed" and comparison["status"]["replayed"] != "completed":
+        found.append(f"status {comparison['status']['replayed']}")
+    for agent, counts in comparison["model_calls"].items():
+        if counts["recorded"] != counts["replayed"]:
+            found.append(f"{agent} model calls {counts['replayed']} != {counts['recorded']}")
+    if comparison["time_scale"] == 1:
+        for name, timing in comparison["phases"].items():
+            before, after = timing["recorded_seconds"], timing["replayed_seconds"]
+            if before is not None and after is not None and after > before * (1 + tolerance) + PHASE_SLACK_SECONDS:
+                found.append(f"phase {name} {timing['replayed_seconds']}s > {timing['recorded_seconds']}s (+{tolerance:.0%})")
+    return found
+
+
+async def main(args: argparse.Namespace) -> int:
+    directory = tempfile.mkdtemp(prefix="replay_")
+    os.environ.update({
+        "LLM_CASSETTE_MODE": "replay",
+        "LLM_CASSETTE_PATH": args.cassette,
+        "LLM_REPLAY_TIME_SCALE": str(args.time_scale),
+        "LLM_CACHE_AGENTS": "",
+        "RESEARCH_STALE_HOURS": "0",
+        # A fresh checkpoint store and row ledger, so the replay neither resumes nor skips rows
+        "CHECKPOINT_DIR": os.path.join(directory, "checkpoints"),
+        "ROW_LEDGER_PATH": os.path.join(directory, "row_ledger.json"),
+        "TRACE_PATH": os.path.join(directory, "traces.jsonl")
+    })
+    # Replayed calls never reach the API, so keep the per-key quota from pacing them
+    os.environ["GEMINI_RPM"] = "100000"
+    os.environ["GEMINI_TPM"] = "1000000000"
+    # Imported once the cassette settings are in the environment they are read from
+    from orchestrator import Orchestrator
+    from utils.agent_executor import executors
+    from utils.cassette import get_cassette
+
+    orchestrator = Orchestrator()
+
+    async def skip_email(email_data: Dict[str, Any], attachments: List[Dict[str, Any]]):
+        pass
+
+    orchestrator.email_sender.send_results = skip_email
+    try:
+        context = await orchestrator.run("replay")
+    finally:
+        await orchestrator.close()
+        executors.shutdown()
+
+    comparison = context.results.get("replay")
+    cassette = get_cassette().stats()
+    print(json.dumps({"cassette": cassette, "comparison": comparison}, indent=2))
+    if comparison is None:
+        print("The cassette has no recorded run to compare with")
+        return 1
+    found = regressions(comparison, cassette, args.tolerance)
+    for regression in found:
+        print(f"Regression: {regression}")
+    if not found:
+        print("Replay matches the recording")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", default="cassettes/llm.jsonl", help="cassette recorded with LLM_CASSETTE_MODE=record")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="replayed latency as a multiple of the recorded one (0.1 is ten times faster, 0 instant)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative phase slowdown at time scale 1")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,72 @@
+"""Time spreadsheet ingestion from the local file sources
+
+Writes a synthetic content sheet with extra unused columns to CSV, XLSX and
+Parquet, then loads each through its sheet source. No credentials needed.
+
+    python -m benchmarks.sheet_ingest --rows 100000
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.sheet_sources import create_file_source
+
+
+def sample_frame(rows: int) -> pd.DataFrame:
+    """Content sheet with spreadsheet-style headers and columns the agents never read"""
+    return pd.DataFrame({
+        "Topic": [f"Topic {i % 500}" for i in range(rows)],
+        "Links": [f"https://example.com/{i},https://example.org/{i}" for i in range(rows)],
+        "Description": [f"Description of row {i}" for i in range(rows)],
+        "Keywords": ["AI, automation, content"] * rows,
+        "Owner": ["editor@example.com"] * rows,
+        "Notes": ["internal notes that are never projected"] * rows
+    })
+
+
+def measure(path: str, runs: int) -> Dict[str, Any]:
+    """Best-of-`runs` load time for one file"""
+    source = create_file_source(path)
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        loaded = source.load()
+        durations.append(time.perf_counter() - start)
+    return {"rows": len(loaded), "best_seconds": round(min(durations), 3)}
+
+
+def main(rows: int, runs: int, formats: list):
+    frame = sample_frame(rows)
+    writers = {
+        "csv": lambda path: frame.to_csv(path, index=False),
+        "xlsx": lambda path: frame.to_excel(path, index=False),
+        "parquet": lambda path: frame.to_parquet(path, index=False)
+    }
+
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in formats:
+            path = os.path.join(directory, f"sheet.{extension}")
+            writers[extension](path)
+            report[extension] = measure(path, runs)
+            print(f"{extension}: {json.dumps(report[extension])}")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the synthetic sheet")
+    parser.add_argument("--runs", type=int, default=3, help="loads per format")
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet", "xlsx"],
+                        choices=["csv", "xlsx", "parquet"], help="file formats to time")
+    args = parser.parse_args()
+    main(args.rows, args.runs, args.formats)
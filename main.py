@@ -1,92 +1,225 @@
-﻿import os
-import asyncio
-import logging
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from dotenv import load_dotenv
-import uvicorn
-
-from orchestrator import Orchestrator
-from utils.health_checker import HealthChecker
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# Initialize FastAPI app
-app = FastAPI(title="Agentic Loop Content Automation")
-
-# Initialize components
-health_checker = HealthChecker()
-orchestrator = Orchestrator()
-
-class StartResponse(BaseModel):
-    status: str
-    message: str
-    task_id: str
-
-@app.get("/health")
-async def health_check():
-    """Check health status of all agents"""
-    try:
-        health_status = await health_checker.check_all_agents()
-        if health_status["healthy"]:
-            return JSONResponse(content={"status": "healthy", "details": health_status})
-        else:
-            return JSONResponse(
-                status_code=503,
-                content={"status": "unhealthy", "details": health_status}
-            )
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
-            status_code=503,
-            content={"status": "error", "message": str(e)}
-        )
-
-@app.post("/start", response_model=StartResponse)
-async def start_automation(background_tasks: BackgroundTasks):
-    """Start the content automation process"""
-    try:
-        # Check health first
-        health_status = await health_checker.check_all_agents()
-        if not health_status["healthy"]:
-            raise HTTPException(
-                status_code=503,
-                detail="System is not healthy. Please check /health endpoint for details."
-            )
-        
-        # Generate task ID
-        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        # Start orchestrator in background
-        background_tasks.add_task(orchestrator.run, task_id)
-        
-        return StartResponse(
-            status="started",
-            message="Content automation process has been started",
-            task_id=task_id
-        )
-        
-    except Exception as e:
-        logger.error(f"Failed to start automation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/")
-async def root():
-    return {"message": "Agentic Loop Content Automation API", "endpoints": ["/health", "/start"]}
-
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+﻿import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import uvicorn
+
+from orchestrator import Orchestrator
+from utils.health_checker import HealthChecker
+from utils.agent_executor import executors
+from utils.loop_monitor import EventLoopMonitor
+from utils.metrics import metrics
+from utils.task_registry import RunContext, TaskRegistry
+from utils.tracing import render_critical_path
+from utils.sync_scheduler import SyncScheduler
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('logs/app.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Initialize FastAPI app
+app = FastAPI(title="Agentic Loop Content Automation")
+
+# Initialize components
+health_checker = HealthChecker()
+orchestrator = Orchestrator()
+loop_monitor = EventLoopMonitor()
+task_registry = TaskRegistry()
+
+def new_task_id() -> str:
+    """Task id; the suffix keeps ids unique for starts within the same second"""
+    return f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+def submit_run(context: RunContext):
+    """Hand a run context to the task registry"""
+    task_registry.submit(context, lambda ctx: orchestrator.run(ctx.task_id, ctx))
+
+async def scheduled_sync():
+    """Start an incremental run only if the sheet changed since the last completed sync"""
+    if any(task_registry.is_active(task["task_id"]) for task in task_registry.list() if task["incremental"]):
+        logger.info("Previous incremental run still active; skipping this sync")
+        return
+    if not await orchestrator.sheet_changed():
+        logger.info("Sheet unchanged since the last sync; skipping run")
+        return
+    context = task_registry.create(new_task_id(), incremental=True)
+    submit_run(context)
+    logger.info(f"Sheet changed; started incremental run {context.task_id}")
+
+sync_scheduler = SyncScheduler(scheduled_sync)
+
+class StartRequest(BaseModel):
+    sheet_id: Optional[str] = None
+    range_name: Optional[str] = None
+    # Only process rows that are new or edited since the last sync
+    incremental: bool = os.getenv("INCREMENTAL_SYNC", "false").lower() == "true"
+
+class StartResponse(BaseModel):
+    status: str
+    message: str
+    task_id: str
+
+@app.on_event("startup")
+async def startup():
+    """Start watching the event loop for blocking callbacks and the sheet sync schedule"""
+    loop_monitor.start()
+    sync_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the loop monitor and scheduler and release HTTP connections and executor threads"""
+    await sync_scheduler.stop()
+    await loop_monitor.stop()
+    await orchestrator.close()
+    executors.shutdown(wait=False)
+
+@app.get("/health")
+async def health_check():
+    """Check health status of all agents"""
+    try:
+        health_status = await health_checker.check_all_agents()
+        if health_status["healthy"]:
+            return JSONResponse(content={"status": "healthy", "details": health_status})
+        else:
+            return JSONResponse(
+                status_code=503,
+                content={"status": "unhealthy", "details": health_status}
+            )
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "message": str(e)}
+        )
+
+@app.post("/start", response_model=StartResponse)
+async def start_automation(request: Optional[StartRequest] = None):
+    """Start the content automation process"""
+    request = request or StartRequest()
+    try:
+        # Check health first
+        health_status = await health_checker.check_all_agents()
+        if not health_status["healthy"]:
+            raise HTTPException(
+                status_code=503,
+                detail="System is not healthy. Please check /health endpoint for details."
+            )
+        
+        # Generate task ID
+        task_id = new_task_id()
+        
+        # Start orchestrator in background with its own isolated run context
+        context = task_registry.create(
+            task_id,
+            sheet_id=request.sheet_id,
+            range_name=request.range_name,
+            incremental=request.incremental
+        )
+        submit_run(context)
+        
+        return StartResponse(
+            status="started",
+            message="Content automation process has been started",
+            task_id=task_id
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to start automation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/tasks")
+async def list_tasks():
+    """List all known tasks with their status"""
+    return {
+        "running": task_registry.running_count(),
+        "max_concurrent_tasks": task_registry.max_concurrent_tasks,
+        "tasks": task_registry.list()
+    }
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    """Get the status of a single task"""
+    context = task_registry.get(task_id)
+    if not context:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return context.summary()
+
+@app.post("/tasks/{task_id}/resume", response_model=StartResponse)
+async def resume_task(task_id: str):
+    """Resume a task from its first incomplete phase or item"""
+    try:
+        meta = await orchestrator.checkpoint_store.load_meta(task_id)
+    except ValueError:
+        meta = None
+    if meta is None:
+        raise HTTPException(status_code=404, detail=f"No checkpoint found for task {task_id}")
+    
+    try:
+        context = task_registry.create(
+            task_id,
+            replace=True,
+            sheet_id=meta.get("sheet_id"),
+            range_name=meta.get("range_name"),
+            resumed=True,
+            incremental=meta.get("incremental", False)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    submit_run(context)
+    
+    return StartResponse(
+        status="resumed",
+        message="Content automation process has been resumed from its last checkpoint",
+        task_id=task_id
+    )
+
+@app.get("/tasks/{task_id}/trace")
+async def get_task_trace(task_id: str, format: str = "json"):
+    """Critical path of a finished task's trace, as JSON or (format=text) as an indented listing"""
+    context = task_registry.get(task_id)
+    if not context:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    if context.trace is None:
+        raise HTTPException(status_code=404, detail=f"No trace recorded for task {task_id} yet")
+    if format == "text":
+        return PlainTextResponse(render_critical_path(context.trace))
+    return context.trace
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """LLM response cache hit/miss counters"""
+    return orchestrator.cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Latency, token, retry, cache and queue metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Agentic Loop Content Automation API",
+        "endpoints": ["/health", "/start", "/tasks", "/cache/stats", "/metrics"]
+    }
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
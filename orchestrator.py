@@ -1,284 +1,448 @@
-﻿import os
-import json
-import asyncio
-import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional
-from dotenv import load_dotenv
-
-from agents.research_agent import ResearchAgent
-from agents.blog_writer_agent import BlogWriterAgent
-from agents.twitter_agent import TwitterAgent
-from agents.linkedin_agent import LinkedinAgent
-from agents.optimizing_agent import OptimizingAgent
-from utils.spreadsheet_handler import SpreadsheetHandler
-from utils.email_sender import EmailSender
-import time
-load_dotenv()
-
-logger = logging.getLogger(__name__)
-
-class Orchestrator:
-    """Main orchestrator that coordinates all agents"""
-    
-    def __init__(self):
-        # Initialize API keys
-        self.api_keys = {
-            "research": os.getenv("GEMINI_API_KEY_1"),
-            "content": os.getenv("GEMINI_API_KEY_2"),
-            "optimization": os.getenv("GEMINI_API_KEY_3"),
-            "twitterlinkedin":os.getenv("GEMINI_API_KEY_4")
-        }
-        
-        # Initialize agents
-        self.research_agent = ResearchAgent(self.api_keys["research"])
-        self.blog_writer_agent = BlogWriterAgent(self.api_keys["content"])
-        self.twitter_agent = TwitterAgent(self.api_keys["twitterlinkedin"])
-        self.linkedin_agent = LinkedinAgent(self.api_keys["twitterlinkedin"])
-        self.optimizing_agent = OptimizingAgent(self.api_keys["optimization"])
-        
-        # Initialize utilities
-        self.spreadsheet_handler = SpreadsheetHandler()
-        self.email_sender = EmailSender()
-        
-        # Results storage
-        self.results = {
-            "task_id": None,
-            "status": "pending",
-            "spreadsheet_data": None,
-            "research_data": None,
-            "blog_posts": None,
-            "tweets": None,
-            "linkedin_posts": None,
-            "optimized_content": None,
-            "errors": []
-        }
-    
-    async def run(self, task_id: str):
-        """Main orchestration flow"""
-        self.results["task_id"] = task_id
-        self.results["start_time"] = datetime.now().isoformat()
-        
-        try:
-            logger.info(f"Starting orchestration for task {task_id}")
-            
-            # Step 1: Get spreadsheet data
-            await self._get_spreadsheet_data()
-            
-            # Step 2: Research phase
-            await self._research_phase()
-            
-            # Step 3: Blog writing phase
-            await self._blog_writing_phase()
-            
-            # Step 4: Social media content phase
-            await self._social_media_phase()
-            
-            # Step 5: Optimization phase
-            await self._optimization_phase()
-            
-            # Mark as completed
-            self.results["status"] = "completed"
-            self.results["end_time"] = datetime.now().isoformat()
-            logger.info(f"Orchestration completed for task {task_id}")
-            
-        except Exception as e:
-            logger.error(f"Orchestration failed for task {task_id}: {str(e)}")
-            self.results["status"] = "failed"
-            self.results["errors"].append({
-                "phase": "orchestration",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        finally:
-            # Always send email with results
-            await self._send_results_email()
-    
-    async def _get_spreadsheet_data(self):
-        """Get data from Google Sheets"""
-        try:
-            logger.info("Fetching spreadsheet data...")
-            self.results["spreadsheet_data"] = await self.spreadsheet_handler.get_data()
-            logger.info(f"Retrieved {len(self.results['spreadsheet_data'])} rows from spreadsheet")
-        except Exception as e:
-            logger.error(f"Failed to get spreadsheet data: {str(e)}")
-            self.results["errors"].append({
-                "phase": "spreadsheet",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-            raise
-    
-    async def _research_phase(self):
-        """Execute research phase"""
-        try:
-            logger.info("Starting research phase...")
-            research_prompt = self._build_research_prompt()
-            self.results["research_data"] = await self.research_agent.research(
-                research_prompt,
-                self.results["spreadsheet_data"]
-            )
-            logger.info("Research phase completed")
-        except Exception as e:
-            logger.error(f"Research phase failed: {str(e)}")
-            self.results["errors"].append({
-                "phase": "research",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-            raise
-    
-    async def _blog_writing_phase(self):
-        """Execute blog writing phase"""
-        try:
-            logger.info("Starting blog writing phase...")
-            self.results["blog_posts"] = await self.blog_writer_agent.write_blogs(
-                self.results["research_data"],
-                self.results["spreadsheet_data"]
-            )
-            logger.info(f"Generated {len(self.results['blog_posts'])} blog posts")
-        except Exception as e:
-            logger.error(f"Blog writing phase failed: {str(e)}")
-            self.results["errors"].append({
-                "phase": "blog_writing",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-            raise
-    
-    async def _social_media_phase(self):
-        """Execute social media content generation"""
-        try:
-            logger.info("Starting social media phase...")
-            
-            # Generate tweets
-            twitter_task = self.twitter_agent.generate_tweets(self.results["blog_posts"])
-            
-            logger.info("Waiting for 60 seconds to avoid rate limits...")
-            # Generate LinkedIn posts
-            time.sleep(60)  # Wait for 60 seconds to avoid rate limits
-            
-            linkedin_task = self.linkedin_agent.generate_posts(self.results["blog_posts"])
-            
-            # Wait for both to complete
-            self.results["tweets"], self.results["linkedin_posts"] = await asyncio.gather(
-                twitter_task, linkedin_task
-            )
-            
-            logger.info(f"Generated {len(self.results['tweets'])} tweets and {len(self.results['linkedin_posts'])} LinkedIn posts")
-        except Exception as e:
-            logger.error(f"Social media phase failed: {str(e)}")
-            self.results["errors"].append({
-                "phase": "social_media",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-            raise
-    
-    async def _optimization_phase(self):
-        """Execute content optimization"""
-        try:
-            logger.info("Starting optimization phase...")
-            
-            all_content = {
-                "blog_posts": self.results["blog_posts"],
-                "tweets": self.results["tweets"],
-                "linkedin_posts": self.results["linkedin_posts"]
-            }
-            
-            self.results["optimized_content"] = await self.optimizing_agent.optimize(all_content)
-            logger.info("Optimization phase completed")
-        except Exception as e:
-            logger.error(f"Optimization phase failed: {str(e)}")
-            self.results["errors"].append({
-                "phase": "optimization",
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            })
-            # Don't raise here - we want to send results even if optimization fails
-    
-    async def _send_results_email(self):
-        """Send results via email"""
-        try:
-            logger.info("Sending results email...")
-            
-            # Prepare email content
-            email_data = {
-                "task_id": self.results["task_id"],
-                "status": self.results["status"],
-                "start_time": self.results.get("start_time"),
-                "end_time": self.results.get("end_time"),
-                "errors": self.results["errors"]
-            }
-            
-            # Prepare attachments
-            attachments = []
-            
-            # Add blog posts
-            if self.results.get("optimized_content") and self.results["optimized_content"].get("blog_posts"):
-                attachments.append({
-                    "filename": f"blog_posts_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["optimized_content"]["blog_posts"], indent=2)
-                })
-            elif self.results.get("blog_posts"):
-                attachments.append({
-                    "filename": f"blog_posts_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["blog_posts"], indent=2)
-                })
-            
-            # Add tweets
-            if self.results.get("optimized_content") and self.results["optimized_content"].get("tweets"):
-                attachments.append({
-                    "filename": f"tweets_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["optimized_content"]["tweets"], indent=2)
-                })
-            elif self.results.get("tweets"):
-                attachments.append({
-                    "filename": f"tweets_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["tweets"], indent=2)
-                })
-            
-            # Add LinkedIn posts
-            if self.results.get("optimized_content") and self.results["optimized_content"].get("linkedin_posts"):
-                attachments.append({
-                    "filename": f"linkedin_posts_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["optimized_content"]["linkedin_posts"], indent=2)
-                })
-            elif self.results.get("linkedin_posts"):
-                attachments.append({
-                    "filename": f"linkedin_posts_{self.results['task_id']}.json",
-                    "content": json.dumps(self.results["linkedin_posts"], indent=2)
-                })
-            
-            await self.email_sender.send_results(email_data, attachments)
-            logger.info("Results email sent successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to send results email: {str(e)}")
-            # Log but don't raise - email failure shouldn't crash the system
-    
-    def _build_research_prompt(self):
-        """Build research prompt from spreadsheet data"""
-        topics = []
-        links = []
-        
-        for row in self.results["spreadsheet_data"]:
-            if row.get("topic"):
-                topics.append(row["topic"])
-            if row.get("links"):
-                links.extend(row["links"].split(","))
-        
-        prompt = f"""
-        Research the following topics deeply and comprehensively:
-        
-        Topics: {', '.join(topics)}
-        
-        Resources to analyze:
-        {chr(10).join(links)}
-        
-        Provide in-depth analysis, key insights, and relevant information for creating engaging blog content.
-        Focus on practical applications, recent developments, and unique perspectives.
-        """
-        
-        return prompt
+﻿import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Any, Optional, Set
+from dotenv import load_dotenv
+
+from agents.research_agent import ResearchAgent
+from agents.blog_writer_agent import BlogWriterAgent
+from agents.twitter_agent import TwitterAgent
+from agents.linkedin_agent import LinkedinAgent
+from agents.optimizing_agent import OptimizingAgent
+from pipeline import ContentPipeline, TopicBatch
+from utils.spreadsheet_handler import SpreadsheetHandler
+from utils.email_sender import EmailSender
+from utils.rate_limiter import RateLimiterRegistry
+from utils.llm_cache import get_llm_cache
+from utils.cassette import get_cassette
+from utils.metrics import PHASE_SECONDS
+from utils.search_cache import get_search_tool
+from utils.checkpoint_store import CheckpointStore
+from utils.row_ledger import RowLedger
+from utils.task_registry import RunContext
+from utils.tracing import critical_path, phase, render_critical_path, tracer
+from utils.agent_executor import executors
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Spreadsheet topics researched and written per streaming batch
+ROW_BATCH_SIZE = int(os.getenv("ROW_BATCH_SIZE", "10"))
+
+class Orchestrator:
+    """Main orchestrator that coordinates all agents"""
+    
+    def __init__(self):
+        # Initialize API keys
+        self.api_keys = {
+            "research": os.getenv("GEMINI_API_KEY_1"),
+            "content": os.getenv("GEMINI_API_KEY_2"),
+            "optimization": os.getenv("GEMINI_API_KEY_3"),
+            "twitterlinkedin":os.getenv("GEMINI_API_KEY_4")
+        }
+        
+        # One rate limiter per API key, shared by every agent using that key
+        self.rate_limiters = RateLimiterRegistry()
+        
+        # Initialize agents
+        self.research_agent = ResearchAgent(
+            self.api_keys["research"],
+            self.rate_limiters.get(self.api_keys["research"], "research")
+        )
+        self.blog_writer_agent = BlogWriterAgent(
+            self.api_keys["content"],
+            self.rate_limiters.get(self.api_keys["content"], "content")
+        )
+        self.twitter_agent = TwitterAgent(
+            self.api_keys["twitterlinkedin"],
+            self.rate_limiters.get(self.api_keys["twitterlinkedin"], "twitterlinkedin")
+        )
+        self.linkedin_agent = LinkedinAgent(
+            self.api_keys["twitterlinkedin"],
+            self.rate_limiters.get(self.api_keys["twitterlinkedin"], "twitterlinkedin")
+        )
+        self.optimizing_agent = OptimizingAgent(
+            self.api_keys["optimization"],
+            self.rate_limiters.get(self.api_keys["optimization"], "optimization")
+        )
+        
+        # Phase outputs and finished items are checkpointed so failed runs can resume
+        self.checkpoint_store = CheckpointStore()
+        
+        # Hashes of processed rows, so incremental runs skip rows already handled
+        self.row_ledger = RowLedger()
+        
+        # Blog, social and optimization stages run as one streaming pipeline
+        self.content_pipeline = ContentPipeline(
+            self.blog_writer_agent,
+            self.twitter_agent,
+            self.linkedin_agent,
+            self.optimizing_agent,
+            checkpoint_store=self.checkpoint_store
+        )
+        
+        self.row_batch_size = ROW_BATCH_SIZE
+        
+        # Initialize utilities
+        self.spreadsheet_handler = SpreadsheetHandler()
+        self.email_sender = EmailSender()
+    
+    async def close(self):
+        """Release the research agent's pooled HTTP connections and extraction processes"""
+        await self.research_agent.fetcher.close()
+        self.research_agent.extractor.shutdown(wait=False)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """LLM response cache counters, overall and per agent, plus web search, research link fetch and reuse counters"""
+        agents = [
+            self.research_agent,
+            self.blog_writer_agent,
+            self.twitter_agent,
+            self.linkedin_agent,
+            self.optimizing_agent
+        ]
+        enabled = {agent.name: agent.cache_stats() for agent in agents if agent.cache_stats() is not None}
+        return {
+            "agents": enabled,
+            "store": get_llm_cache().stats() if enabled else None,
+            "search": get_search_tool().stats(),
+            "http": self.research_agent.fetcher.stats(),
+            "research": self.research_agent.knowledge_base.stats()
+        }
+    
+    async def run(self, task_id: str, context: Optional[RunContext] = None) -> RunContext:
+        """Main orchestration flow; all run state lives in the task's own context"""
+        context = context or RunContext(task_id)
+        results = context.results
+        results["status"] = "running"
+        results["start_time"] = datetime.now().isoformat()
+        
+        with tracer.trace("task", task_id=task_id, resumed=context.resumed,
+                          incremental=context.incremental) as root:
+            started = time.perf_counter()
+            try:
+                logger.info(f"{'Resuming' if context.resumed else 'Starting'} orchestration for task {task_id}")
+                await self._save_meta(context)
+                
+                # Step 1: Get spreadsheet data
+                await self._get_spreadsheet_data(context)
+                
+                if context.incremental and not results["spreadsheet_data"]:
+                    logger.info(f"No new or edited rows for task {task_id}; nothing to generate")
+                    results["status"] = "skipped"
+                else:
+                    # Steps 2-5: Research, blog writing, social media and optimization,
+                    # streamed through the pipeline in batches of topics
+                    await self._content_phase(context)
+                    results["status"] = "completed"
+                
+                results["end_time"] = datetime.now().isoformat()
+                await self._record_sync(context)
+                logger.info(f"Orchestration {results['status']} for task {task_id}")
+                
+            except Exception as e:
+                logger.error(f"Orchestration failed for task {task_id}: {str(e)}")
+                results["status"] = "failed"
+                context.add_error("orchestration", e)
+            
+            finally:
+                await self._save_meta(context)
+                # Always send email with results, unless there was nothing to do
+                if results["status"] != "skipped":
+                    await self._send_results_email(context)
+                PHASE_SECONDS.observe(time.perf_counter() - started, phase="task")
+        await self._finish_trace(context, root)
+        await self._finish_cassette(context)
+        
+        return context
+    
+    async def _finish_trace(self, context: RunContext, root: Optional[Any]):
+        """Export a finished run's spans and keep its critical-path summary on the context"""
+        if root is None:
+            return
+        root.set(task_status=context.results["status"])
+        spans = [span.to_dict() for span in tracer.pop(root.trace_id)]
+        context.trace = critical_path(spans)
+        logger.info(f"Critical path of task {context.task_id}:\n{render_critical_path(context.trace)}")
+        try:
+            await executors.get("io").run(tracer.export, spans)
+        except Exception as e:
+            # Tracing is best effort and must not fail the run
+            logger.error(f"Failed to export trace of task {context.task_id}: {str(e)}")
+    
+    async def _finish_cassette(self, context: RunContext):
+        """Record a finished run's timings to the model cassette, or compare a replayed run with its recording"""
+        cassette = get_cassette()
+        if cassette is None:
+            return
+        try:
+            comparison = await executors.get("io").run(
+                cassette.finish_run, context.task_id, context.results["status"], context.trace
+            )
+        except Exception as e:
+            logger.error(f"Failed to record run of task {context.task_id} to the cassette: {str(e)}")
+            return
+        if comparison is not None:
+            context.results["replay"] = comparison
+            logger.info(f"Replay of task {context.task_id} against recorded task "
+                        f"{comparison['recorded_task_id']}: {json.dumps(comparison)}")
+    
+    async def _save_meta(self, context: RunContext):
+        """Checkpoint the run parameters and current status"""
+        try:
+            await self.checkpoint_store.save_meta(context.task_id, {
+                "task_id": context.task_id,
+                "sheet_id": context.sheet_id,
+                "range_name": context.range_name,
+                "incremental": context.incremental,
+                "status": context.results["status"],
+                "updated_at": datetime.now().isoformat()
+            })
+        except Exception as e:
+            # Checkpointing is best effort and must not fail the run
+            logger.error(f"Failed to checkpoint task {context.task_id}: {str(e)}")
+    
+    async def _load_phase(self, context: RunContext, phase: str) -> Optional[Any]:
+        """Checkpointed output of a phase when resuming, otherwise None"""
+        if not context.resumed:
+            return None
+        data = await self.checkpoint_store.load_phase(context.task_id, phase)
+        if data is not None:
+            logger.info(f"Reusing checkpointed {phase} phase for task {context.task_id}")
+        return data
+    
+    async def _get_spreadsheet_data(self, context: RunContext):
+        """Get data from Google Sheets"""
+        try:
+            version = None
+            with phase("spreadsheet") as span:
+                spreadsheet_data = await self._load_phase(context, "spreadsheet")
+                if spreadsheet_data is None:
+                    if context.incremental:
+                        # Read the change token first so edits made during the fetch show up next sync
+                        version = await self.spreadsheet_handler.get_version(context.sheet_id)
+                    logger.info("Fetching spreadsheet data...")
+                    # An incremental sync records which rows it processed, so it must never run on mock rows
+                    spreadsheet_data = await self.spreadsheet_handler.get_data(
+                        sheet_id=context.sheet_id,
+                        range_name=context.range_name,
+                        use_mock=not context.incremental
+                    )
+                    await self.checkpoint_store.save_phase(context.task_id, "spreadsheet", spreadsheet_data)
+                if context.incremental:
+                    spreadsheet_data = await self._changed_rows(context, spreadsheet_data, version)
+                if span is not None:
+                    span.set(rows=len(spreadsheet_data))
+            context.results["spreadsheet_data"] = spreadsheet_data
+            logger.info(f"Retrieved {len(context.results['spreadsheet_data'])} rows from spreadsheet")
+        except Exception as e:
+            logger.error(f"Failed to get spreadsheet data: {str(e)}")
+            context.add_error("spreadsheet", e)
+            raise
+    
+    async def sheet_changed(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> bool:
+        """Cheap poll: whether the sheet may have changed since the last completed sync"""
+        if self.spreadsheet_handler.source is None:
+            # Only mock data is available, and incremental runs never use it
+            return False
+        version = await self.spreadsheet_handler.get_version(sheet_id)
+        if version is None:
+            # No change token available; let the run compare row hashes instead
+            return True
+        sheet_key = self.spreadsheet_handler.sheet_key(sheet_id, range_name)
+        return version != await self.row_ledger.get_version(sheet_key)
+    
+    async def _changed_rows(self, context: RunContext, rows: List[Dict[str, Any]],
+                            version: Optional[str]) -> List[Dict[str, Any]]:
+        """Keep only rows that are new or edited since the last completed sync"""
+        sheet_key = self.spreadsheet_handler.sheet_key(context.sheet_id, context.range_name)
+        context.sync = {
+            "sheet_key": sheet_key,
+            "version": version,
+            "row_topics": {self.row_ledger.row_hash(row): str(row.get("topic") or "").strip() for row in rows}
+        }
+        changed = await self.row_ledger.changed_rows(sheet_key, rows)
+        logger.info(f"{len(changed)} of {len(rows)} rows are new or edited since the last sync")
+        return changed
+    
+    async def _record_sync(self, context: RunContext):
+        """Mark the rows of a finished incremental run as processed"""
+        if not context.sync or not context.sync["row_topics"]:
+            # Nothing was read (an empty sheet); keep the ledger as it is
+            return
+        # Rows with a failure in any phase stay unprocessed so the next sync retries them
+        failed_topics = self._failed_topics(context)
+        row_hashes = [
+            row_hash for row_hash, topic in context.sync["row_topics"].items()
+            if topic not in failed_topics
+        ]
+        try:
+            await self.row_ledger.record(
+                context.sync["sheet_key"],
+                row_hashes,
+                context.sync["version"] if not failed_topics else None
+            )
+        except Exception as e:
+            # The next sync then simply reprocesses these rows
+            logger.error(f"Failed to record sync for task {context.task_id}: {str(e)}")
+    
+    def _failed_topics(self, context: RunContext) -> Set[str]:
+        """Topics with a research, blog, social media or optimization failure in this run"""
+        failed_topics = set((context.results.get("research_data") or {}).get("failed_topics", []))
+        # Errors without a topic (web search tweets, entertaining posts) belong to no row
+        failed_topics.update(error["topic"] for error in context.results["errors"] if error.get("topic"))
+        return failed_topics
+    
+    async def _research_batches(self, context: RunContext) -> AsyncIterator[TopicBatch]:
+        """Research the spreadsheet topics batch by batch, staying one batch ahead of blog writing"""
+        subtasks = self.research_agent.plan_topics(context.results["spreadsheet_data"])
+        batches = [
+            subtasks[start:start + self.row_batch_size]
+            for start in range(0, len(subtasks), self.row_batch_size)
+        ]
+        logger.info(f"Processing {len(subtasks)} topics in {len(batches)} batches of up to {self.row_batch_size}")
+        
+        completed = {}
+        if context.resumed:
+            completed = await self.checkpoint_store.load_items(context.task_id, "research")
+        summary = context.results["research_data"] = {
+            "topics_analyzed": 0,
+            "failed_topics": [],
+            "batches": len(batches),
+            "status": "running"
+        }
+        
+        upcoming = None
+        try:
+            for n, batch in enumerate(batches):
+                current = upcoming or asyncio.create_task(self._research_phase(context, batch, completed))
+                upcoming = None
+                research_data = await current
+                if n + 1 < len(batches):
+                    upcoming = asyncio.create_task(self._research_phase(context, batches[n + 1], completed))
+                if len(research_data["failed_topics"]) == len(batch):
+                    # Nothing to write about; the other batches still go ahead
+                    logger.warning(f"Research failed for every topic in batch {n+1}; skipping it")
+                    continue
+                yield n * self.row_batch_size, [subtask["topic"] for subtask in batch], research_data
+            if subtasks and len(summary["failed_topics"]) == len(subtasks):
+                error = RuntimeError(f"Research failed for all {len(subtasks)} topics")
+                context.add_error("research", error)
+                raise error
+            summary["status"] = "partial" if summary["failed_topics"] else "completed"
+        finally:
+            if upcoming:
+                upcoming.cancel()
+                await asyncio.gather(upcoming, return_exceptions=True)
+    
+    async def _research_phase(self, context: RunContext, batch: List[Dict[str, Any]],
+                              completed: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Research one batch of topics concurrently, checkpointing topics as they finish"""
+        try:
+            logger.info(f"Starting research on a batch of {len(batch)} topics...")
+            
+            async def checkpoint_topic(result: Dict[str, Any]):
+                await self.checkpoint_store.save_item(context.task_id, "research", result)
+            
+            with phase("research", topics=len(batch)):
+                research_data = await self.research_agent.research_subtasks(
+                    batch,
+                    completed=completed,
+                    on_result=checkpoint_topic,
+                    # Whether every topic failed is decided per task, once all batches are in
+                    require_success=False
+                )
+        except Exception as e:
+            logger.error(f"Research phase failed: {str(e)}")
+            context.add_error("research", e)
+            raise
+        
+        for topic in research_data["failed_topics"]:
+            context.add_error("research", RuntimeError(research_data["topics"][topic]["error"]), topic=topic)
+        for topic_research in research_data["topics"].values():
+            context.research_index.add_research(topic_research)
+        summary = context.results["research_data"]
+        summary["topics_analyzed"] += research_data["topics_analyzed"]
+        summary["failed_topics"].extend(research_data["failed_topics"])
+        logger.info("Research batch completed")
+        return research_data
+    
+    async def _content_phase(self, context: RunContext):
+        """Execute research, blog writing, social media and optimization as a streaming pipeline"""
+        try:
+            logger.info("Starting content pipeline...")
+            with phase("content"):
+                await self.content_pipeline.run(context, self._research_batches(context))
+            logger.info(
+                f"Generated {len(context.results['blog_posts'])} blog posts, "
+                f"{len(context.results['tweets'])} tweets and "
+                f"{len(context.results['linkedin_posts'])} LinkedIn posts"
+            )
+        except Exception as e:
+            # Stage errors are already recorded against their own phase
+            logger.error(f"Content pipeline failed: {str(e)}")
+            raise
+    
+    async def _send_results_email(self, context: RunContext):
+        """Send results via email"""
+        try:
+            logger.info("Sending results email...")
+            
+            # Prepare email content
+            email_data = {
+                "task_id": context.results["task_id"],
+                "status": context.results["status"],
+                "start_time": context.results.get("start_time"),
+                "end_time": context.results.get("end_time"),
+                "errors": context.results["errors"]
+            }
+            
+            # Prepare attachments
+            attachments = []
+            
+            # Add blog posts
+            if context.results.get("optimized_content") and context.results["optimized_content"].get("blog_posts"):
+                attachments.append({
+                    "filename": f"blog_posts_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["optimized_content"]["blog_posts"], indent=2)
+                })
+            elif context.results.get("blog_posts"):
+                attachments.append({
+                    "filename": f"blog_posts_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["blog_posts"], indent=2)
+                })
+            
+            # Add tweets
+            if context.results.get("optimized_content") and context.results["optimized_content"].get("tweets"):
+                attachments.append({
+                    "filename": f"tweets_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["optimized_content"]["tweets"], indent=2)
+                })
+            elif context.results.get("tweets"):
+                attachments.append({
+                    "filename": f"tweets_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["tweets"], indent=2)
+                })
+            
+            # Add LinkedIn posts
+            if context.results.get("optimized_content") and context.results["optimized_content"].get("linkedin_posts"):
+                attachments.append({
+                    "filename": f"linkedin_posts_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["optimized_content"]["linkedin_posts"], indent=2)
+                })
+            elif context.results.get("linkedin_posts"):
+                attachments.append({
+                    "filename": f"linkedin_posts_{context.results['task_id']}.json",
+                    "content": json.dumps(context.results["linkedin_posts"], indent=2)
+                })
+            
+            with phase("email"):
+                await self.email_sender.send_results(email_data, attachments)
+            logger.info("Results email sent successfully")
+            
+        except Exception as e:
+            logger.error(f"Failed to send results email: {str(e)}")
+            # Log but don't raise - email failure shouldn't crash the system
@@ -0,0 +1,423 @@
+import os
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from utils.checkpoint_store import CheckpointStore
+from utils.metrics import watch_queue
+from utils.task_registry import RunContext
+from utils.tracing import phase
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", "2"))
+OPTIMIZATION_BATCH_WAIT = float(os.getenv("OPTIMIZATION_BATCH_WAIT", "2.0"))
+
+# Research passages retrieved for each blog's tweets and LinkedIn posts
+SOCIAL_RESEARCH_PASSAGES = int(os.getenv("SOCIAL_RESEARCH_PASSAGES", "3"))
+
+# Content types short enough to optimize several items per call
+BATCHED_CONTENT_TYPES = ("tweets", "linkedin_posts")
+
+# Checkpoint id of the tweet batch that does not come from a blog
+WEB_TWEET_BATCH_ID = "web"
+
+# (index of the first topic, topics, research for those topics)
+TopicBatch = Tuple[int, List[str], Dict[str, Any]]
+
+# Marks the end of a stage's output on a queue
+_STAGE_DONE = object()
+
+
+class ContentPipeline:
+    """Streams blogs into social generation and every finished item into optimization
+
+    Topics arrive in batches along with their research, so a sheet of any
+    size is processed with only one batch of full research held at a time;
+    earlier batches stay searchable through the task's passage index. Stages
+    are connected by bounded queues, so a blog's tweets and LinkedIn posts
+    start as soon as that blog exists, and each item is optimized as soon as it
+    is written (tweets and LinkedIn posts in small batches). End-to-end
+    latency follows the longest single chain instead of the sum of the phases.
+
+    Every finished item is checkpointed; a resumed run reuses those items and
+    only calls the agents for what is still missing.
+    """
+
+    def __init__(self, blog_writer_agent, twitter_agent, linkedin_agent, optimizing_agent,
+                 checkpoint_store: Optional[CheckpointStore] = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, optimizer_workers: int = OPTIMIZER_WORKERS,
+                 batch_wait: float = OPTIMIZATION_BATCH_WAIT):
+        self.blog_writer_agent = blog_writer_agent
+        self.twitter_agent = twitter_agent
+        self.linkedin_agent = linkedin_agent
+        self.optimizing_agent = optimizing_agent
+        self.checkpoint_store = checkpoint_store
+        self.queue_size = queue_size
+        self.optimizer_workers = optimizer_workers
+        self.batch_wait = batch_wait
+
+    async def run(self, context: RunContext, topic_batches: AsyncIterator[TopicBatch]):
+        """Run all content stages for a task, filling in its results"""
+        results = context.results
+        state = _PipelineState()
+        if context.resumed and self.checkpoint_store:
+            await self._load_checkpoints(context, state)
+
+        blog_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        optimize_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        watch_queue("blog", blog_queue)
+        watch_queue("optimize", optimize_queue)
+
+        optimizer = asyncio.create_task(self._optimize_stage(context, optimize_queue, state))
+        producers = [
+            asyncio.create_task(self._blog_stage(context, topic_batches, blog_queue, optimize_queue, state)),
+            asyncio.create_task(self._social_stage(context, blog_queue, optimize_queue, state)),
+            asyncio.create_task(self._standalone_social_stage(context, optimize_queue, state))
+        ]
+
+        try:
+            await asyncio.gather(*producers)
+            await optimize_queue.put(_STAGE_DONE)
+            await optimizer
+        except BaseException:
+            await _cancel(producers + [optimizer])
+            raise
+        finally:
+            # Partial output still reaches the results email when a stage fails
+            self._collect_results(results, state)
+
+    async def _blog_stage(self, context: RunContext, topic_batches: AsyncIterator[TopicBatch],
+                          blog_queue: asyncio.Queue, optimize_queue: asyncio.Queue, state: "_PipelineState"):
+        """Write each batch's blogs concurrently and hand each one downstream as soon as it exists"""
+        logger.info("Starting blog writing stage...")
+        try:
+            with phase("blog_writing"):
+                # Errors while producing a batch belong to its producer, which records them
+                async for first_index, topics, research_data in topic_batches:
+                    await self._write_batch(context, first_index, topics, research_data,
+                                            blog_queue, optimize_queue, state)
+        finally:
+            # Stops the producer's look-ahead work when this stage is cancelled
+            await topic_batches.aclose()
+        await blog_queue.put(_STAGE_DONE)
+        logger.info(f"Blog writing stage finished with {len(state.blogs)} blog posts")
+
+    async def _write_batch(self, context: RunContext, first_index: int, topics: List[str],
+                           research_data: Dict[str, Any], blog_queue: asyncio.Queue,
+                           optimize_queue: asyncio.Queue, state: "_PipelineState"):
+        """Write one batch of blogs; the batch's research is released once this returns"""
+        plan = self.blog_writer_agent.plan_blogs(topics, first_index)
+        for _, topic in plan:
+            state.open_blogs[topic] = state.open_blogs.get(topic, 0) + 1
+        
+        def blog_failed(index: int, topic: str, error: Exception):
+            # The other blogs, and the content that follows them, still go ahead
+            logger.error(f"Blog post {index+1} about {topic} failed: {str(error)}")
+            context.add_error("blog_writing", error, topic=topic)
+            self._release_topic(context, topic, state)
+        
+        blogs = self.blog_writer_agent.iter_blogs(
+            plan, research_data,
+            completed=state.done["blog_posts"],
+            research_index=context.research_index,
+            on_error=blog_failed
+        )
+        try:
+            async for i, blog in blogs:
+                if blog["id"] not in state.done["blog_posts"]:
+                    await self._checkpoint(context, "blog_posts", blog)
+                state.blogs[i] = blog
+                logger.info(f"Generated blog post {i+1} ({len(state.blogs)} written so far)")
+                await blog_queue.put((i, blog))
+                await optimize_queue.put(("blog_posts", blog))
+        except Exception as e:
+            logger.error(f"Blog writing stage failed: {str(e)}")
+            context.add_error("blog_writing", e)
+            raise
+        finally:
+            # Stops blogs still being written when this stage is cancelled
+            await blogs.aclose()
+
+    async def _social_stage(self, context: RunContext, blog_queue: asyncio.Queue,
+                            optimize_queue: asyncio.Queue, state: "_PipelineState"):
+        """Start tweets and a LinkedIn post for each blog as it arrives"""
+        tasks = []
+        try:
+            with phase("social_media"):
+                while True:
+                    entry = await blog_queue.get()
+                    if entry is _STAGE_DONE:
+                        break
+                    index, blog = entry
+                    tasks.append(asyncio.create_task(
+                        self._social_for_blog(context, index, blog, optimize_queue, state)
+                    ))
+                await asyncio.gather(*tasks)
+        except BaseException as e:
+            await _cancel(tasks)
+            if isinstance(e, Exception):
+                logger.error(f"Social media stage failed: {str(e)}")
+                context.add_error("social_media", e)
+            raise
+
+    async def _social_for_blog(self, context: RunContext, index: int, blog: Dict[str, Any],
+                               optimize_queue: asyncio.Queue, state: "_PipelineState"):
+        """Generate the blog-based tweets and educational posts for one blog"""
+        try:
+            tweets, posts = await asyncio.gather(
+                self._contained(context, f"Tweets for blog post {index+1}",
+                                self._blog_tweets(context, index, blog, state), [], blog.get("topic")),
+                asyncio.gather(*(
+                    self._contained(context, f"LinkedIn post {variant+1} for blog post {index+1}",
+                                    self._educational_post(context, index, variant, blog, state), None,
+                                    blog.get("topic"))
+                    for variant in range(self.linkedin_agent.posts_per_blog)
+                ))
+            )
+        finally:
+            self._release_topic(context, blog.get("topic"), state)
+        posts = [post for post in posts if post is not None]
+        state.blog_tweets[index] = tweets
+        state.educational_posts[index] = posts
+
+        for tweet in tweets:
+            await optimize_queue.put(("tweets", tweet))
+        for post in posts:
+            await optimize_queue.put(("linkedin_posts", post))
+
+    def _release_topic(self, context: RunContext, topic: Optional[str], state: "_PipelineState"):
+        """Count one of a topic's blogs as done; its research leaves the index after the last one
+
+        Only blog writing and the social posts written from blogs search the
+        index, so the topic is released before its items are optimized.
+        """
+        if topic not in state.open_blogs:
+            return
+        state.open_blogs[topic] -= 1
+        if state.open_blogs[topic] <= 0:
+            del state.open_blogs[topic]
+            context.research_index.remove_topic(topic)
+
+    async def _contained(self, context: RunContext, description: str, work: Awaitable[Any], default: Any,
+                         topic: Optional[str] = None) -> Any:
+        """Await one social item's generation; a failure is recorded against the run and gives `default`"""
+        try:
+            return await work
+        except Exception as e:
+            logger.error(f"{description} failed: {str(e)}")
+            context.add_error("social_media", e, topic=topic)
+            return default
+    
+    def _blog_passages(self, context: RunContext, blog: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Research passages from the blog's topic that best match what the blog says"""
+        query = f"{blog.get('topic', '')} {str(blog.get('content', ''))[:1000]}"
+        return context.research_index.search(query, SOCIAL_RESEARCH_PASSAGES, topic=blog.get("topic"))
+    
+    async def _blog_tweets(self, context: RunContext, index: int, blog: Dict[str, Any],
+                           state: "_PipelineState") -> List[Dict[str, Any]]:
+        """Blog-based tweets, reused from a checkpoint when available"""
+        batch = state.done["tweet_batches"].get(blog["id"])
+        if batch is not None:
+            return batch["tweets"]
+        tweets = await self.twitter_agent.generate_blog_tweets(index, blog, self._blog_passages(context, blog))
+        # Tweets from one call are checkpointed together so a resume never sees half a batch
+        await self._checkpoint(context, "tweet_batches", {"id": blog["id"], "tweets": tweets})
+        return tweets
+
+    async def _educational_post(self, context: RunContext, index: int, variant: int, blog: Dict[str, Any],
+                                state: "_PipelineState") -> Dict[str, Any]:
+        """Educational LinkedIn post, reused from a checkpoint when available"""
+        post = state.done["linkedin_posts"].get(self.linkedin_agent.educational_post_id(index, variant))
+        if post is not None:
+            return post
+        post = await self.linkedin_agent.generate_educational_post(
+            index, blog, variant, self._blog_passages(context, blog)
+        )
+        await self._checkpoint(context, "linkedin_posts", post)
+        return post
+
+    async def _web_tweets(self, context: RunContext, state: "_PipelineState") -> List[Dict[str, Any]]:
+        """Web search tweets, reused from a checkpoint when available"""
+        batch = state.done["tweet_batches"].get(WEB_TWEET_BATCH_ID)
+        if batch is not None:
+            return batch["tweets"]
+        tweets = await self.twitter_agent.generate_web_tweets()
+        await self._checkpoint(context, "tweet_batches", {"id": WEB_TWEET_BATCH_ID, "tweets": tweets})
+        return tweets
+
+    async def _entertaining_posts(self, context: RunContext, state: "_PipelineState") -> List[Dict[str, Any]]:
+        """Entertaining LinkedIn posts, generating only those not yet checkpointed"""
+        posts = []
+        for i in range(self.linkedin_agent.entertaining_post_count()):
+            post = state.done["linkedin_posts"].get(self.linkedin_agent.entertaining_post_id(i))
+            if post is None:
+                post = await self._contained(context, f"Entertaining LinkedIn post {i+1}",
+                                             self.linkedin_agent.generate_entertaining_post(i), None)
+                if post is None:
+                    continue
+                await self._checkpoint(context, "linkedin_posts", post)
+            posts.append(post)
+        return posts
+
+    async def _standalone_social_stage(self, context: RunContext, optimize_queue: asyncio.Queue,
+                                       state: "_PipelineState"):
+        """Generate the content that does not depend on any blog"""
+        try:
+            state.web_tweets, state.entertaining_posts = await asyncio.gather(
+                self._contained(context, "Web search tweets", self._web_tweets(context, state), []),
+                self._entertaining_posts(context, state)
+            )
+            for tweet in state.web_tweets:
+                await optimize_queue.put(("tweets", tweet))
+            for post in state.entertaining_posts:
+                await optimize_queue.put(("linkedin_posts", post))
+        except Exception as e:
+            logger.error(f"Standalone social media stage failed: {str(e)}")
+            context.add_error("social_media", e)
+            raise
+
+    async def _optimize_stage(self, context: RunContext, optimize_queue: asyncio.Queue,
+                              state: "_PipelineState"):
+        """Dispatch items to the optimizer as they arrive
+
+        Tweets and LinkedIn posts are grouped into batches of up to the
+        optimizer's batch size; a partial batch goes out once no new item has
+        arrived for `batch_wait` seconds. Blogs are always optimized alone.
+        """
+        slots = asyncio.Semaphore(self.optimizer_workers)
+        pending: Dict[str, List[Dict[str, Any]]] = {content_type: [] for content_type in BATCHED_CONTENT_TYPES}
+        tasks: List[asyncio.Task] = []
+
+        def dispatch(content_type: str, items: List[Dict[str, Any]]):
+            tasks.append(asyncio.create_task(self._optimize_items(context, content_type, items, slots, state)))
+
+        def flush():
+            for content_type, items in pending.items():
+                if items:
+                    dispatch(content_type, items)
+                    pending[content_type] = []
+
+        # A timed-out get is kept for the next round rather than cancelled, so no item is lost;
+        # asyncio.wait, unlike wait_for, never swallows a cancellation of this stage
+        getter: Optional[asyncio.Task] = None
+        try:
+            with phase("optimization"):
+                while True:
+                    if getter is None:
+                        getter = asyncio.create_task(optimize_queue.get())
+                    linger = self.batch_wait if any(pending.values()) else None
+                    done, _ = await asyncio.wait({getter}, timeout=linger)
+                    if not done:
+                        flush()
+                        continue
+                    entry = getter.result()
+                    getter = None
+                    if entry is _STAGE_DONE:
+                        break
+                    content_type, item = entry
+                    if item["id"] in state.done["optimized"]:
+                        state.optimized[item["id"]] = state.done["optimized"][item["id"]]
+                        continue
+                    if content_type in pending and self.optimizing_agent.batch_size > 1:
+                        pending[content_type].append(item)
+                        if len(pending[content_type]) >= self.optimizing_agent.batch_size:
+                            dispatch(content_type, pending[content_type])
+                            pending[content_type] = []
+                    else:
+                        dispatch(content_type, [item])
+                flush()
+                await asyncio.gather(*tasks)
+        except BaseException:
+            await _cancel(tasks + ([getter] if getter else []))
+            raise
+
+    async def _optimize_items(self, context: RunContext, content_type: str, items: List[Dict[str, Any]],
+                              slots: asyncio.Semaphore, state: "_PipelineState"):
+        """Optimize a batch, retrying invalid results one by one; a failed item keeps its original content"""
+        async with slots:
+            # Listed by id rather than arrival order, so the same batch always makes the same prompt
+            items = sorted(items, key=lambda item: item["id"])
+            optimized = {}
+            if len(items) > 1:
+                optimized = await self.optimizing_agent.optimize_batch(content_type, items)
+            for item in items:
+                if item["id"] not in optimized:
+                    try:
+                        optimized[item["id"]] = await self.optimizing_agent.optimize_item(content_type, item)
+                    except Exception as e:
+                        logger.error(f"Optimization of {item['id']} failed: {str(e)}")
+                        context.add_error("optimization", e, topic=self._item_topic(item, state))
+                        state.optimized[item["id"]] = {**item, "optimization_status": "failed"}
+                        continue
+                state.optimized[item["id"]] = optimized[item["id"]]
+                await self._checkpoint(context, "optimized", optimized[item["id"]])
+
+    @staticmethod
+    def _item_topic(item: Dict[str, Any], state: "_PipelineState") -> Optional[str]:
+        """Spreadsheet topic of a blog, or of the blog a tweet or LinkedIn post was written from"""
+        if item.get("topic"):
+            return item["topic"]
+        for blog in state.blogs.values():
+            if blog["id"] == item.get("source_blog_id"):
+                return blog.get("topic")
+        return None
+
+    async def _checkpoint(self, context: RunContext, kind: str, item: Dict[str, Any]):
+        """Persist a finished item so a resumed run can skip it"""
+        if self.checkpoint_store:
+            await self.checkpoint_store.save_item(context.task_id, kind, item)
+
+    async def _load_checkpoints(self, context: RunContext, state: "_PipelineState"):
+        """Load the items finished by the previous attempt of this task"""
+        for kind in state.done:
+            state.done[kind] = await self.checkpoint_store.load_items(context.task_id, kind)
+        logger.info(
+            f"Resuming task {context.task_id} with "
+            + ", ".join(f"{len(items)} {kind}" for kind, items in state.done.items())
+        )
+
+    def _collect_results(self, results: Dict[str, Any], state: "_PipelineState"):
+        """Assemble the stage outputs in their original order"""
+        results["blog_posts"] = [state.blogs[i] for i in sorted(state.blogs)]
+        results["tweets"] = (
+            [tweet for i in sorted(state.blog_tweets) for tweet in state.blog_tweets[i]] + state.web_tweets
+        )
+        results["linkedin_posts"] = (
+            [post for i in sorted(state.educational_posts) for post in state.educational_posts[i]]
+            + state.entertaining_posts
+        )
+        results["optimized_content"] = {
+            content_type: [state.optimized.get(item["id"], item) for item in results[content_type]]
+            for content_type in ("blog_posts", "tweets", "linkedin_posts")
+        }
+
+
+class _PipelineState:
+    """Per-run outputs keyed by blog index, so results stay ordered whatever order items finish in"""
+
+    def __init__(self):
+        self.blogs: Dict[int, Dict[str, Any]] = {}
+        self.blog_tweets: Dict[int, List[Dict[str, Any]]] = {}
+        self.educational_posts: Dict[int, List[Dict[str, Any]]] = {}
+        self.web_tweets: List[Dict[str, Any]] = []
+        self.entertaining_posts: List[Dict[str, Any]] = []
+        self.optimized: Dict[str, Dict[str, Any]] = {}
+        # Blogs per topic not yet written or not yet through the social stage
+        self.open_blogs: Dict[str, int] = {}
+
+        # Items checkpointed by a previous attempt, keyed by kind then item id
+        self.done: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "blog_posts": {},
+            "tweet_batches": {},
+            "linkedin_posts": {},
+            "optimized": {}
+        }
+
+
+async def _cancel(tasks: List[asyncio.Task]):
+    """Cancel tasks and wait for them to finish unwinding"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
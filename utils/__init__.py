@@ -1 +1 @@
-﻿# Utils module
+﻿# Utils module
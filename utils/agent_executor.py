@@ -0,0 +1,65 @@
+import os
+import asyncio
+import logging
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from utils.metrics import EXECUTOR_CALLS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.getenv("AGENT_WORKERS", "2"))
+
+
+class AgentExecutor:
+    """Bounded thread pool that keeps blocking agent work off the event loop"""
+
+    def __init__(self, name: str, max_workers: int = DEFAULT_WORKERS):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"agent-{name}"
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on this executor and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables into the worker thread, as asyncio.to_thread does
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        EXECUTOR_CALLS.inc(executor=self.name)
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            EXECUTOR_CALLS.dec(executor=self.name)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+
+class ExecutorRegistry:
+    """One executor per agent, sized from <NAME>_WORKERS or AGENT_WORKERS"""
+
+    def __init__(self):
+        self._executors: Dict[str, AgentExecutor] = {}
+
+    def get(self, name: str) -> AgentExecutor:
+        """Return the executor for an agent, creating it on first use"""
+        if name not in self._executors:
+            max_workers = int(os.getenv(f"{name.upper()}_WORKERS", str(DEFAULT_WORKERS)))
+            self._executors[name] = AgentExecutor(name, max_workers)
+            logger.info(f"Created executor '{name}' with {max_workers} workers")
+        return self._executors[name]
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every executor created so far"""
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait)
+        self._executors.clear()
+
+
+executors = ExecutorRegistry()
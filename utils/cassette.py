@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from smolagents.models import ChatMessage, MessageRole
+
+try:
+    from smolagents.monitoring import TokenUsage
+except ImportError:
+    # Older smolagents releases report usage on the model instead of the response
+    TokenUsage = None
+
+from utils.llm_cache import make_cache_key, normalize_prompt
+from utils.model_proxy import ModelProxy, message_text, token_usage
+from utils.passage_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# "record" captures every model call to the cassette, "replay" answers model calls from it
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "").strip().lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.jsonl")
+# Replayed calls take their recorded latency times this: 1 as recorded, 0.1 ten times faster, 0 instantly
+LLM_REPLAY_TIME_SCALE = float(os.getenv("LLM_REPLAY_TIME_SCALE", "1.0"))
+# Changed prompts replay the closest recording only if this similar (Jaccard over words); 1 allows exact matches only
+LLM_REPLAY_MIN_SIMILARITY = float(os.getenv("LLM_REPLAY_MIN_SIMILARITY", "0.8"))
+
+CASSETTE_MODES = ("record", "replay")
+
+_cassette: Optional["Cassette"] = None
+
+
+class CassetteMiss(LookupError):
+    """A replayed model call or input has no recording left to answer it"""
+
+
+class ReplayedError(Exception):
+    """A model call that failed when it was recorded, failing again on replay"""
+
+    def __init__(self, message: str, error_type: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status_code = status_code
+
+
+def get_cassette() -> Optional["Cassette"]:
+    """Process-wide cassette when LLM_CASSETTE_MODE is set, otherwise None"""
+    global _cassette
+    if _cassette is None and LLM_CASSETTE_MODE:
+        _cassette = Cassette(LLM_CASSETTE_PATH, LLM_CASSETTE_MODE, LLM_REPLAY_TIME_SCALE, LLM_REPLAY_MIN_SIMILARITY)
+    return _cassette
+
+
+class Cassette:
+    """Model calls, run inputs and run summaries recorded to a JSONL file, and served back from it
+
+    In record mode every call that reaches an agent's model is appended
+    with its prompt, response (or error), token usage and latency, every
+    sheet read, fetched document and web search result the run used, and
+    every finished run with its phase timings and model calls per agent.
+    In replay mode calls are answered from the recordings: the recording
+    of the same agent, model and prompt first, in recorded order, else
+    that agent's unused recording with the most similar prompt, if it is
+    at least `min_similarity` alike. Inputs are answered by kind and key
+    without touching the network. Replayed runs are compared with the
+    recorded run in the same position.
+    """
+
+    def __init__(self, path: str, mode: str, time_scale: float = 1.0, min_similarity: float = 0.8):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.exact = 0
+        self.approximate = 0
+        self.misses = 0
+        self.inputs = 0
+        self.input_misses = 0
+
+        # Replay state: unused recordings by (agent, key), and by agent for approximate matches
+        self._by_key: Dict[tuple, Deque[Dict[str, Any]]] = {}
+        self._by_agent: Dict[str, List[Dict[str, Any]]] = {}
+        self._used: Set[int] = set()
+        self._inputs: Dict[tuple, Deque[Any]] = {}
+        self._runs: List[Dict[str, Any]] = []
+        self._replayed_runs = 0
+
+        if mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger.info(f"Recording model calls to {path}")
+        else:
+            self._load()
+            logger.info(f"Replaying {sum(len(entries) for entries in self._by_agent.values())} model calls, "
+                        f"{sum(len(values) for values in self._inputs.values())} inputs "
+                        f"and {len(self._runs)} runs from {path} (time scale {time_scale:g})")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                entry = json.loads(line)
+                if entry["type"] == "run":
+                    self._runs.append(entry)
+                    continue
+                if entry["type"] == "input":
+                    self._inputs.setdefault((entry["kind"], entry["key"]), deque()).append(entry["value"])
+                    continue
+                entry["_id"] = number
+                self._by_key.setdefault((entry["agent"], entry["key"]), deque()).append(entry)
+                self._by_agent.setdefault(entry["agent"], []).append(entry)
+
+    def _append(self, entry: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def record_call(self, agent: str, model_id: str, key: str, messages: List[Any], latency: float,
+                    response: Optional[Dict[str, Any]] = None, error: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self.calls += 1
+        self._append({
+            "type": "call",
+            "agent": agent,
+            "model_id": model_id,
+            "key": key,
+            "messages": normalize_prompt(messages),
+            "response": response,
+            "error": error,
+            "latency": round(latency, 4),
+            "recorded_at": time.time()
+        })
+
+    def record_input(self, kind: str, key: str, value: Any):
+        """Record something a run read from outside: a "sheet", a "fetch"ed document or a "search" result"""
+        with self._lock:
+            self.inputs += 1
+        self._append({"type": "input", "kind": kind, "key": key, "value": value, "recorded_at": time.time()})
+
+    def take_input(self, kind: str, key: str) -> Any:
+        """The recorded input for a replayed read, in recorded order; the last one answers any repeats"""
+        with self._lock:
+            self.inputs += 1
+            pending = self._inputs.get((kind, key))
+            if not pending:
+                self.input_misses += 1
+                raise CassetteMiss(f"No recorded {kind} for {key}")
+            return pending.popleft() if len(pending) > 1 else pending[0]
+
+    def take(self, agent: str, key: str, messages: List[Any]) -> Dict[str, Any]:
+        """The recording that answers a replayed call; each recording answers once"""
+        with self._lock:
+            self.calls += 1
+            pending = self._by_key.get((agent, key))
+            while pending:
+                entry = pending.popleft()
+                if entry["_id"] not in self._used:
+                    self._used.add(entry["_id"])
+                    self.exact += 1
+                    return entry
+
+            # The prompt changed (new code, different fetched pages): take the closest unused recording
+            words = set(tokenize("\n".join(message_text(message) for message in messages)))
+            best, best_score = None, -1.0
+            for entry in self._by_agent.get(agent, []):
+                if entry["_id"] in self._used:
+                    continue
+                if "_words" not in entry:
+                    entry["_words"] = set(tokenize("\n".join(message["content"] for message in entry["messages"])))
+                union = words | entry["_words"]
+                score = len(words & entry["_words"]) / len(union) if union else 0.0
+                if score > best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded model call left for {agent}")
+            if best_score < self.min_similarity:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded model call for {agent} is similar enough to replay "
+                                   f"(closest {best_score:.2f}, minimum {self.min_similarity:g})")
+            self._used.add(best["_id"])
+            self.approximate += 1
+        logger.debug(f"Replaying closest recording for {agent} (similarity {best_score:.2f})")
+        return best
+
+    def finish_run(self, task_id: str, status: str, trace: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Record a finished run's timings, or compare a replayed run with its recording"""
+        summary = {
+            "type": "run",
+            "task_id": task_id,
+            "status": status,
+            "duration_seconds": trace["duration_seconds"] if trace else None,
+            "phase_seconds": trace["phase_seconds"] if trace else {},
+            "model_calls": trace["model_calls"] if trace else {}
+        }
+        if self.mode == "record":
+            self._append(summary)
+            return None
+        with self._lock:
+            index = self._replayed_runs
+            self._replayed_runs += 1
+        if index >= len(self._runs):
+            logger.warning(f"No recorded run to compare replayed task {task_id} with")
+            return None
+        return compare_runs(self._runs[index], summary, self.time_scale)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "calls": self.calls,
+            "exact": self.exact,
+            "approximate": self.approximate,
+            "misses": self.misses,
+            "inputs": self.inputs,
+            "input_misses": self.input_misses
+        }
+
+
+def compare_runs(recorded: Dict[str, Any], replayed: Dict[str, Any], time_scale: float = 1.0) -> Dict[str, Any]:
+    """Phase timings and model calls of a replayed run next to those of its recording
+
+    Recorded phase time is scaled by the replay time scale, which
+    compresses the model latency but not the rest of the work, so scaled
+    ratios above 1 are expected when compressing.
+    """
+    phases = {}
+    for name in sorted(set(recorded["phase_seconds"]) | set(replayed["phase_seconds"])):
+        before = recorded["phase_seconds"].get(name)
+        after = replayed["phase_seconds"].get(name)
+        expected = before * time_scale if before is not None else None
+        phases[name] = {
+            "recorded_seconds": before,
+            "replayed_seconds": after,
+            "ratio": round(after / expected, 3) if after is not None and expected else None
+        }
+    calls = {
+        agent: {"recorded": recorded["model_calls"].get(agent, 0), "replayed": replayed["model_calls"].get(agent, 0)}
+        for agent in sorted(set(recorded["model_calls"]) | set(replayed["model_calls"]))
+    }
+    return {
+        "recorded_task_id": recorded["task_id"],
+        "status": {"recorded": recorded["status"], "replayed": replayed["status"]},
+        "time_scale": time_scale,
+        "phases": phases,
+        "model_calls": calls,
+        "calls_changed": any(counts["recorded"] != counts["replayed"] for counts in calls.values())
+    }
+
+
+class CassetteModel(ModelProxy):
+    """Records calls to the wrapped model, or answers them from the cassette without calling it
+
+    Wrapped innermost, so metering, tracing, rate limiting and the response
+    cache all run as usual above it, and see replayed latency as call time.
+    """
+
+    def __init__(self, wrapped: Any, cassette: Cassette, agent_name: str):
+        super().__init__(wrapped)
+        self.cassette = cassette
+        self.agent_name = agent_name
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        model_id = getattr(self.wrapped, "model_id", "")
+        key = make_cache_key(model_id, messages, {**getattr(self.wrapped, "kwargs", {}), **kwargs})
+        if self.cassette.mode == "replay":
+            return self._replay(key, messages)
+
+        start = time.perf_counter()
+        try:
+            response = self._call_wrapped(messages, **kwargs)
+        except Exception as e:
+            self.cassette.record_call(self.agent_name, model_id, key, messages, time.perf_counter() - start, error={
+                "type": type(e).__name__,
+                "message": str(e),
+                "status_code": getattr(e, "status_code", None)
+            })
+            raise
+        input_tokens, output_tokens = token_usage(response, self.wrapped)
+        self.cassette.record_call(self.agent_name, model_id, key, messages, time.perf_counter() - start, response={
+            "content": message_text(response),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens
+        })
+        return response
+
+    def _replay(self, key: str, messages: List[Any]) -> Any:
+        entry = self.cassette.take(self.agent_name, key, messages)
+        time.sleep(entry["latency"] * self.cassette.time_scale)
+        error = entry.get("error")
+        if error:
+            raise ReplayedError(error["message"], error["type"], error.get("status_code"))
+
+        response = entry["response"]
+        # Read back by the metering and tracing layers, as they would be from LiteLLMModel
+        self.last_input_token_count = response.get("input_tokens")
+        self.last_output_token_count = response.get("output_tokens")
+        if TokenUsage is not None and response.get("input_tokens") is not None:
+            return ChatMessage(role=MessageRole.ASSISTANT, content=response["content"], token_usage=TokenUsage(
+                input_tokens=response["input_tokens"],
+                output_tokens=response.get("output_tokens") or 0
+            ))
+        return ChatMessage(role=MessageRole.ASSISTANT, content=response["content"])
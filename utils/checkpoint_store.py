@@ -0,0 +1,94 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from utils.agent_executor import executors
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Persists phase outputs and finished items per task so failed runs can resume
+
+    Layout: <base_dir>/<task_id>/meta.json, phase_<name>.json and
+    items/<kind>/<item_id>.json. Every file is written atomically.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or os.getenv("CHECKPOINT_DIR", "checkpoints")
+
+    def _task_dir(self, task_id: str) -> str:
+        # Task ids come from the API, so never let them escape the checkpoint directory
+        safe_id = os.path.basename(task_id)
+        if not safe_id or safe_id != task_id:
+            raise ValueError(f"Invalid task id: {task_id}")
+        return os.path.join(self.base_dir, safe_id)
+
+    def exists(self, task_id: str) -> bool:
+        """Whether any checkpoint was written for the task"""
+        return os.path.exists(os.path.join(self._task_dir(task_id), "meta.json"))
+
+    async def save_meta(self, task_id: str, meta: Dict[str, Any]):
+        """Store run parameters and status"""
+        await self._write(os.path.join(self._task_dir(task_id), "meta.json"), meta)
+
+    async def load_meta(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Load run parameters and status, if checkpointed"""
+        return await self._read(os.path.join(self._task_dir(task_id), "meta.json"))
+
+    async def save_phase(self, task_id: str, phase: str, data: Any):
+        """Store the complete output of a phase"""
+        await self._write(os.path.join(self._task_dir(task_id), f"phase_{phase}.json"), data)
+
+    async def load_phase(self, task_id: str, phase: str) -> Optional[Any]:
+        """Load a phase's output, or None if the phase never completed"""
+        return await self._read(os.path.join(self._task_dir(task_id), f"phase_{phase}.json"))
+
+    async def save_item(self, task_id: str, kind: str, item: Dict[str, Any]):
+        """Store one finished item (a blog, tweet, post or optimized version)"""
+        path = os.path.join(self._task_dir(task_id), "items", kind, f"{item['id']}.json")
+        await self._write(path, item)
+
+    async def load_items(self, task_id: str, kind: str) -> Dict[str, Dict[str, Any]]:
+        """Load every finished item of a kind, keyed by item id"""
+        directory = os.path.join(self._task_dir(task_id), "items", kind)
+        return await executors.get("io").run(self._read_dir_blocking, directory)
+
+    async def _write(self, path: str, data: Any):
+        await executors.get("io").run(self._write_blocking, path, data)
+
+    async def _read(self, path: str) -> Optional[Any]:
+        return await executors.get("io").run(self._read_blocking, path)
+
+    @staticmethod
+    def _write_blocking(path: str, data: Any):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_blocking(path: str) -> Optional[Any]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _read_dir_blocking(directory: str) -> Dict[str, Dict[str, Any]]:
+        items = {}
+        if not os.path.isdir(directory):
+            return items
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            item = CheckpointStore._read_blocking(os.path.join(directory, filename))
+            if item and "id" in item:
+                items[item["id"]] = item
+        return items
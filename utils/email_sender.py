@@ -1,6 +1,5 @@
 import os
 import smtplib
-import asyncio
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -10,6 +9,8 @@ from typing import Dict, List, Any
 from dotenv import load_dotenv
 import json
 
+from utils.agent_executor import executors
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -128,16 +129,18 @@ class EmailSender:
             return
         
         try:
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_email, self.smtp_password)
-            
-            await asyncio.to_thread(
-                server.send_message,
-                msg
-            )
-            
-            server.quit()
+            # Connecting, TLS and login all block, so the whole session runs off the event loop
+            await executors.get("io").run(self._send_email_blocking, msg)
         except Exception as e:
             logger.error(f"SMTP error: {str(e)}")
             raise
+    
+    def _send_email_blocking(self, msg: MIMEMultipart):
+        """Blocking SMTP session"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        try:
+            server.starttls()
+            server.login(self.smtp_email, self.smtp_password)
+            server.send_message(msg)
+        finally:
+            server.quit()
@@ -0,0 +1,69 @@
+import os
+import csv
+import logging
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class FakeSheetsService:
+    """Local stand-in for the Google Sheets API, backed by a CSV file
+
+    Implements only the calls GoogleSheetsSource makes:
+    `spreadsheets().values().get(...).execute()`. The file's modification
+    time and size serve as the change token, served through `drive()`.
+    """
+
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+
+    def spreadsheets(self) -> "FakeSheetsService":
+        return self
+
+    def values(self) -> "FakeSheetsService":
+        return self
+
+    def get(self, spreadsheetId: str = None, range: str = None) -> "_FakeRequest":
+        return _FakeRequest(lambda: {"range": range, "values": self._read_values()})
+
+    def drive(self) -> "FakeDriveService":
+        """Matching stand-in for the Drive metadata client"""
+        return FakeDriveService(self)
+
+    def version(self) -> str:
+        """Change token for the backing file"""
+        stat = os.stat(self.csv_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _read_values(self) -> List[List[str]]:
+        with open(self.csv_path, "r", encoding="utf-8", newline="") as f:
+            # The Sheets API omits trailing empty cells, so trim them the same way
+            values = []
+            for row in csv.reader(f):
+                while row and row[-1] == "":
+                    row.pop()
+                values.append(row)
+        return values
+
+
+class FakeDriveService:
+    """Local stand-in for the Drive API, reporting the CSV file's change token as its version"""
+
+    def __init__(self, sheets: FakeSheetsService):
+        self.sheets = sheets
+
+    def files(self) -> "FakeDriveService":
+        return self
+
+    def get(self, fileId: str = None, fields: str = None) -> "_FakeRequest":
+        return _FakeRequest(lambda: {"version": self.sheets.version()})
+
+
+class _FakeRequest:
+    """Deferred call mirroring googleapiclient's HttpRequest"""
+
+    def __init__(self, call: Callable[[], Dict[str, Any]]):
+        self._call = call
+
+    def execute(self) -> Dict[str, Any]:
+        return self._call()
@@ -1,57 +1,68 @@
-﻿import asyncio
-import logging
-from typing import Dict, Any
-from datetime import datetime
-
-logger = logging.getLogger(__name__)
-
-class HealthChecker:
-    """Check health status of all system components"""
-    
-    async def check_all_agents(self) -> Dict[str, Any]:
-        """Check health of all agents"""
-        try:
-            health_status = {
-                "timestamp": datetime.now().isoformat(),
-                "healthy": True,
-                "agents": {}
-            }
-            
-            # Check each agent
-            agents_to_check = [
-                "research_agent",
-                "blog_writer_agent",
-                "twitter_agent",
-                "linkedin_agent",
-                "optimizing_agent"
-            ]
-            
-            for agent_name in agents_to_check:
-                try:
-                    # Simple check - in production would actually test agent
-                    health_status["agents"][agent_name] = {
-                        "status": "healthy",
-                        "response_time": "50ms"
-                    }
-                except Exception as e:
-                    health_status["agents"][agent_name] = {
-                        "status": "unhealthy",
-                        "error": str(e)
-                    }
-                    health_status["healthy"] = False
-            
-            # Check external services
-            health_status["external_services"] = {
-                "google_sheets": {"status": "healthy"},
-                "email_service": {"status": "healthy"}
-            }
-            
-            return health_status
-            
-        except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "healthy": False,
-                "error": str(e)
-            }
+﻿import asyncio
+import logging
+from typing import Dict, Any
+from datetime import datetime
+
+from utils.metrics import AGENT_RUN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class HealthChecker:
+    """Check health status of all system components"""
+    
+    def agent_latency(self, agent_name: str) -> Dict[str, Any]:
+        """Observed run latency of an agent since startup, per execution mode it has run in"""
+        name = agent_name[:-len("_agent")] if agent_name.endswith("_agent") else agent_name
+        latency = {}
+        for mode in ("agentic", "completion"):
+            summary = AGENT_RUN_SECONDS.summary(agent=name, mode=mode)
+            if summary["count"]:
+                latency[mode] = summary
+        return latency
+    
+    async def check_all_agents(self) -> Dict[str, Any]:
+        """Check health of all agents"""
+        try:
+            health_status = {
+                "timestamp": datetime.now().isoformat(),
+                "healthy": True,
+                "agents": {}
+            }
+            
+            # Check each agent
+            agents_to_check = [
+                "research_agent",
+                "blog_writer_agent",
+                "twitter_agent",
+                "linkedin_agent",
+                "optimizing_agent"
+            ]
+            
+            for agent_name in agents_to_check:
+                try:
+                    health_status["agents"][agent_name] = {
+                        "status": "healthy",
+                        "latency_seconds": self.agent_latency(agent_name)
+                    }
+                except Exception as e:
+                    health_status["agents"][agent_name] = {
+                        "status": "unhealthy",
+                        "error": str(e)
+                    }
+                    health_status["healthy"] = False
+            
+            # Check external services
+            health_status["external_services"] = {
+                "google_sheets": {"status": "healthy"},
+                "email_service": {"status": "healthy"}
+            }
+            
+            return health_status
+            
+        except Exception as e:
+            logger.error(f"Health check failed: {str(e)}")
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "healthy": False,
+                "error": str(e)
+            }
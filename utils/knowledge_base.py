@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.link_fetcher import dedupe_links
+from utils.metrics import CACHE_LOOKUPS
+from utils.passage_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_KB_PATH = os.getenv("RESEARCH_KB_PATH", "cache/research_kb.sqlite")
+# Research younger than this is reused instead of redone; 0 turns reuse off
+RESEARCH_STALE_HOURS = float(os.getenv("RESEARCH_STALE_HOURS", "168"))
+# Reports older than this are deleted
+RESEARCH_KB_RETENTION_DAYS = float(os.getenv("RESEARCH_KB_RETENTION_DAYS", "90"))
+# "embedding" (hashed word and bigram vectors, cosine) or "lexical" (word-set Jaccard)
+RESEARCH_KB_MATCH = os.getenv("RESEARCH_KB_MATCH", "embedding")
+RESEARCH_KB_SIMILARITY = float(os.getenv("RESEARCH_KB_SIMILARITY", "0.8"))
+
+EMBEDDING_DIMENSIONS = 512
+
+
+def topic_key(topic: str) -> str:
+    """Exact-match key of a topic: its tokens, ignoring case, punctuation and stopwords"""
+    return " ".join(tokenize(topic))
+
+
+def sources_key(links: List[str]) -> str:
+    """Identifies a set of source URLs regardless of order or spelling variants"""
+    payload = "\n".join(sorted(dedupe_links(links)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """Unit vector of the text's words and word pairs, feature-hashed into a fixed size
+
+    Uses a stable hash, so vectors stored by one process compare with those
+    computed by another.
+    """
+    tokens = tokenize(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    for feature in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % EMBEDDING_DIMENSIONS] += 1.0 if (digest >> 63) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def lexical_similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the two texts' word sets"""
+    words_a, words_b = set(tokenize(a)), set(tokenize(b))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ResearchKnowledgeBase:
+    """Research reports kept across tasks, keyed by topic and source URLs
+
+    A report is reused for a topic when one was researched from the same
+    set of links within the staleness window, and its topic matches exactly
+    or is similar enough (hashed-embedding cosine or word-set Jaccard).
+    Anything else is researched again and replaces the stored report.
+    """
+
+    def __init__(self, path: str = RESEARCH_KB_PATH,
+                 stale_hours: float = RESEARCH_STALE_HOURS,
+                 match: str = RESEARCH_KB_MATCH,
+                 similarity: float = RESEARCH_KB_SIMILARITY,
+                 retention_days: float = RESEARCH_KB_RETENTION_DAYS):
+        if match not in ("embedding", "lexical"):
+            raise ValueError(f"Unknown research knowledge base match mode: {match}")
+        self.path = path
+        self.stale_seconds = stale_hours * 3600
+        self.match = match
+        self.similarity = similarity
+        self.retention_seconds = retention_days * 86400
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Research tasks call in from several io threads, so one connection is shared under a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS reports (
+                topic_key TEXT NOT NULL,
+                sources_key TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                report TEXT NOT NULL,
+                researched_at REAL NOT NULL,
+                PRIMARY KEY (topic_key, sources_key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS reports_sources ON reports (sources_key, researched_at)")
+        self._conn.commit()
+
+    def lookup(self, topic: str, links: List[str]) -> Optional[Dict[str, Any]]:
+        """A fresh stored report for the topic and links, or None if it must be researched"""
+        if self.stale_seconds <= 0:
+            return None
+        key = topic_key(topic)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic_key, topic, embedding, report, researched_at FROM reports "
+                "WHERE sources_key = ? AND researched_at >= ?",
+                (sources_key(links), time.time() - self.stale_seconds)
+            ).fetchall()
+
+        best, best_score = None, 0.0
+        if rows:
+            query = hashed_embedding(topic) if self.match == "embedding" else None
+            for row in rows:
+                if row[0] == key:
+                    best, best_score = row, 1.0
+                    break
+                if self.match == "embedding":
+                    score = float(np.dot(query, np.frombuffer(row[2], dtype=np.float32)))
+                else:
+                    score = lexical_similarity(topic, row[1])
+                if score >= self.similarity and score > best_score:
+                    best, best_score = row, score
+
+        with self._lock:
+            if best is None:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(cache="research", result="miss")
+                return None
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="research", result="hit")
+        report = json.loads(best[3])
+        report["reused_research"] = {
+            "topic": best[1],
+            "similarity": round(best_score, 4),
+            "researched_at": best[4]
+        }
+        return report
+
+    def store(self, topic_research: Dict[str, Any]):
+        """Keep a completed topic's research, replacing older research of the same topic and links"""
+        topic = topic_research["topic"]
+        links = topic_research.get("links", [])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports "
+                "(topic_key, sources_key, topic, sources, embedding, report, researched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    topic_key(topic),
+                    sources_key(links),
+                    topic,
+                    json.dumps(dedupe_links(links)),
+                    hashed_embedding(topic).tobytes(),
+                    json.dumps(topic_research, default=str),
+                    now
+                )
+            )
+            self._conn.execute("DELETE FROM reports WHERE researched_at < ?", (now - self.retention_seconds,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reuse counters and stored report count"""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "reports": count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
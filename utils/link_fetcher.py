@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+
+from utils.agent_executor import executors
+from utils.cassette import get_cassette
+from utils.disk_cache import DiskCache
+from utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "16"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "20"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "cache/http.sqlite")
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "2000"))
+# Bodies are up to FETCH_MAX_BYTES each, so the entry count alone does not bound the file
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+USER_AGENT = "AgenticLoopContentBot/1.0 (+https://github.com/agenticloop)"
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TEXT_CONTENT_TYPES = ("text/", "application/xhtml", "application/xml", "application/json")
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Canonical form of a link, or None if it is not an http(s) URL
+
+    Lower-cases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the query so equivalent links compare equal.
+    """
+    url = url.strip()
+    if not url:
+        return None
+    if "://" not in url:
+        url = f"https://{url}"
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def dedupe_links(links: List[str]) -> List[str]:
+    """Canonical links in first-seen order, without duplicates or unusable entries"""
+    seen = {}
+    for link in links:
+        canonical = canonicalize_url(link)
+        if canonical and canonical not in seen:
+            seen[canonical] = None
+    return list(seen)
+
+
+def _decode(body: bytes, charset: Optional[str]) -> str:
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset label in the Content-Type header
+        return body.decode("utf-8", errors="replace")
+
+
+class LinkFetcher:
+    """Async HTTP fetcher for the research links
+
+    One pooled aiohttp session serves every fetch, with a global and a
+    per-host connection limit. Responses land in an on-disk cache and are
+    revalidated with If-None-Match / If-Modified-Since, so unchanged pages
+    come back as 304s instead of full downloads. Concurrent fetches of the
+    same URL share one request.
+    """
+
+    def __init__(self, cache: Optional[DiskCache] = None,
+                 concurrency: int = FETCH_CONCURRENCY,
+                 per_host: int = FETCH_PER_HOST,
+                 timeout: float = FETCH_TIMEOUT,
+                 max_bytes: int = FETCH_MAX_BYTES):
+        self.cache = cache or DiskCache(HTTP_CACHE_PATH, max_entries=HTTP_CACHE_MAX_ENTRIES,
+                                        max_bytes=HTTP_CACHE_MAX_BYTES)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._counts = {"fetched": 0, "not_modified": 0, "failed": 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Session bound to the running loop, created on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT}
+            )
+        return self._session
+
+    def stats(self) -> Dict[str, Any]:
+        """Fetch outcome counters and HTTP cache size"""
+        return {**self._counts, "cache": self.cache.stats()}
+
+    async def close(self):
+        """Release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_all(self, links: List[str]) -> List[Dict[str, Any]]:
+        """Fetch the canonical, deduplicated links concurrently, in link order"""
+        return await asyncio.gather(*(self.fetch(url) for url in dedupe_links(links)))
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """Fetch one link; failures come back as documents with status "failed" instead of raising"""
+        canonical = canonicalize_url(url)
+        if canonical is None:
+            return {"url": url, "status": "failed", "error": "Not an http(s) URL", "text": ""}
+
+        # A replayed run reads the documents its recording fetched, without the network
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.take_input("fetch", canonical)
+
+        if canonical in self._inflight:
+            CACHE_LOOKUPS.inc(cache="http", result="deduplicated")
+            return await asyncio.shield(self._inflight[canonical])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[canonical] = future
+        try:
+            document = await self._fetch(canonical)
+            if cassette is not None:
+                await executors.get("io").run(cassette.record_input, "fetch", canonical, document)
+            future.set_result(document)
+            return document
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so a fetch with no other waiters does not log it again
+            future.exception()
+            raise
+        finally:
+            del self._inflight[canonical]
+
+    async def _fetch(self, url: str) -> Dict[str, Any]:
+        cached = await executors.get("io").run(self.cache.get, url)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304 and cached:
+                    self._counts["not_modified"] += 1
+                    CACHE_LOOKUPS.inc(cache="http", result="hit")
+                    return {**cached, "from_cache": True}
+                if response.status >= 400:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=response.reason or ""
+                    )
+
+                content_type = response.headers.get("Content-Type", "")
+                if not content_type.lower().startswith(TEXT_CONTENT_TYPES):
+                    raise ValueError(f"Unsupported content type {content_type or 'unknown'}")
+                body, truncated = await self._read_capped(response)
+                document = {
+                    "url": url,
+                    "final_url": str(response.url),
+                    "status": "fetched",
+                    "http_status": response.status,
+                    "content_type": content_type,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "truncated": truncated,
+                    "fetched_at": time.time(),
+                    "text": _decode(body, response.charset)
+                }
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._counts["failed"] += 1
+            error = str(e) or type(e).__name__
+            logger.warning(f"Fetching {url} failed: {error}")
+            return {"url": url, "status": "failed", "error": error, "text": ""}
+
+        self._counts["fetched"] += 1
+        CACHE_LOOKUPS.inc(cache="http", result="miss")
+        if document["etag"] or document["last_modified"]:
+            # Only validatable responses are worth keeping; others are refetched anyway
+            await executors.get("io").run(self.cache.set, url, document)
+        return {**document, "from_cache": False}
+
+    async def _read_capped(self, response: aiohttp.ClientResponse) -> tuple:
+        """Body up to max_bytes, and whether it was cut off"""
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return b"".join(chunks)[:self.max_bytes], True
+        return b"".join(chunks), False
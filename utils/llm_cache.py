@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from smolagents.models import ChatMessage, MessageRole
+
+from utils.disk_cache import DiskCache
+from utils.metrics import CACHE_LOOKUPS
+from utils.model_proxy import ModelProxy, message_role, message_text
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+_llm_cache: Optional[DiskCache] = None
+
+
+def get_llm_cache() -> DiskCache:
+    """Process-wide response cache shared by every cached agent"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = DiskCache(
+            LLM_CACHE_PATH,
+            ttl_seconds=LLM_CACHE_TTL_HOURS * 3600,
+            max_entries=LLM_CACHE_MAX_ENTRIES
+        )
+    return _llm_cache
+
+
+def cache_enabled_for(agent_name: str) -> bool:
+    """Agents opt in through LLM_CACHE_AGENTS (comma-separated names, or 'all')"""
+    enabled = {name.strip() for name in os.getenv("LLM_CACHE_AGENTS", "").split(",") if name.strip()}
+    return "all" in enabled or agent_name in enabled
+
+
+def normalize_prompt(messages: List[Any]) -> List[Dict[str, str]]:
+    """Role/text pairs with indentation and trailing whitespace stripped from every line"""
+    normalized = []
+    for message in messages:
+        text = message_text(message)
+        lines = [line.strip() for line in text.strip().splitlines()]
+        normalized.append({"role": message_role(message), "content": "\n".join(lines)})
+    return normalized
+
+
+def make_cache_key(model_id: str, messages: List[Any], params: Dict[str, Any]) -> str:
+    """Content address for a completion: model id, normalized prompt and generation parameters"""
+    tools = params.get("tools_to_call_from")
+    if tools:
+        params = {**params, "tools_to_call_from": sorted(getattr(tool, "name", str(tool)) for tool in tools)}
+
+    payload = json.dumps(
+        {"model_id": model_id, "messages": normalize_prompt(messages), "params": params},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedModel(ModelProxy):
+    """Serves repeated completions from the on-disk cache"""
+
+    def __init__(self, wrapped: Any, cache: DiskCache, agent_name: str):
+        super().__init__(wrapped)
+        self.cache = cache
+        self.agent_name = agent_name
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        params = {**getattr(self.wrapped, "kwargs", {}), **kwargs}
+        key = make_cache_key(getattr(self.wrapped, "model_id", ""), messages, params)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="llm", result="hit")
+            logger.debug(f"LLM cache hit for {self.agent_name}")
+            return ChatMessage(role=MessageRole.ASSISTANT, content=cached["content"])
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="llm", result="miss")
+        response = self._call_wrapped(messages, **kwargs)
+
+        # Tool-call responses are not plain text, so only text completions are stored
+        if not getattr(response, "tool_calls", None):
+            self.cache.set(key, {"content": message_text(response)})
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this agent"""
+        return {"hits": self.hits, "misses": self.misses}
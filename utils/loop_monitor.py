@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_CALLBACK_THRESHOLD = float(os.getenv("SLOW_CALLBACK_THRESHOLD", "0.25"))
+
+
+class EventLoopMonitor:
+    """Detects callbacks that hold the event loop longer than a threshold
+
+    A heartbeat coroutine ticks on the loop while a watchdog thread watches it.
+    When the heartbeat stalls, the watchdog logs the loop thread's current
+    stack, which names the coroutine that is blocking.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_SLOW_CALLBACK_THRESHOLD, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval or min(0.1, threshold / 2)
+        self.max_lag = 0.0
+        self.stall_count = 0
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        loop = asyncio.get_running_loop()
+        # Also let asyncio's own debug machinery report slow callbacks
+        loop.slow_callback_duration = self.threshold
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (threshold {self.threshold:.3f}s)")
+
+    async def stop(self):
+        """Stop the heartbeat and watchdog"""
+        self._stopped.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _heartbeat(self):
+        """Tick on the loop and record how late each tick was"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._last_beat = now
+
+    def _watch(self):
+        """Log the loop thread's stack whenever the heartbeat stalls"""
+        reported = False
+        while not self._stopped.wait(self.interval):
+            stalled_for = time.monotonic() - self._last_beat
+            if stalled_for <= self.threshold + self.interval:
+                reported = False
+                continue
+            if reported:
+                continue
+
+            reported = True
+            self.stall_count += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+            logger.warning(
+                f"Event loop blocked for {stalled_for:.2f}s (threshold {self.threshold:.2f}s). "
+                f"Loop thread stack:\n{stack}"
+            )
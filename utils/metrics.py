@@ -0,0 +1,332 @@
+import os
+import time
+import bisect
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from utils.model_proxy import ModelProxy, token_usage
+
+logger = logging.getLogger(__name__)
+
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "agentic")
+
+# Seconds; agent runs and phases range from sub-second cache hits to many-minute research batches
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """A named metric family with fixed label names; children are keyed by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Current value that goes up and down, set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def track(self, function: Callable[[], float], **labels):
+        """Report the function's return value for these labels whenever metrics are collected"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return float(self._functions[key]())
+        return self._values.get(key, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception as e:
+                logger.warning(f"Collecting gauge {self.name} failed: {str(e)}")
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: count per bucket (not cumulative), sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the block, whether it succeeds or raises"""
+        self._key(labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summary(self, **labels) -> Dict[str, Any]:
+        """Count, sum, mean and bucket-interpolated median and 95th percentile for one label set"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            counts, total = (list(series[0]), series[1][0]) if series else ([], 0.0)
+        count = sum(counts)
+        if not count:
+            return {"count": 0, "sum": 0.0, "mean": None, "p50": None, "p95": None}
+        return {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4),
+            "p50": self._quantile(counts, count, 0.5),
+            "p95": self._quantile(counts, count, 0.95)
+        }
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                if upper == float("inf"):
+                    return lower
+                return round(lower + (upper - lower) * (rank - seen) / bucket_count, 4)
+            seen += bucket_count
+        return self.buckets[-2]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metric families, rendered in the Prometheus text exposition format"""
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _full_name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self._full_name(name), documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self._full_name(name), documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(self._full_name(name), documentation, labels, buckets))
+
+    def render(self) -> str:
+        """Every metric family as Prometheus text"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+metrics = MetricsRegistry()
+
+PHASE_SECONDS = metrics.histogram(
+    "phase_duration_seconds",
+    "Wall time of each orchestration phase and pipeline stage",
+    ["phase"]
+)
+AGENT_RUN_SECONDS = metrics.histogram(
+    "agent_run_seconds",
+    "Latency of one agent run (CodeAgent loop or single completion), including executor queueing",
+    ["agent", "mode"]
+)
+MODEL_CALL_SECONDS = metrics.histogram(
+    "model_call_seconds",
+    "Latency of one model API call, excluding rate limiting and cache hits",
+    ["agent"]
+)
+MODEL_TOKENS = metrics.histogram(
+    "model_tokens",
+    "Prompt and completion tokens per model API call, as reported by the provider",
+    ["agent", "kind"],
+    buckets=TOKEN_BUCKETS
+)
+RATE_LIMIT_WAIT_SECONDS = metrics.histogram(
+    "rate_limiter_wait_seconds",
+    "Time a model call waited for rate limiter capacity",
+    ["limiter"]
+)
+RETRIES = metrics.counter(
+    "retries_total",
+    "Operations retried, by operation and reason",
+    ["operation", "reason"]
+)
+CIRCUIT_OPEN = metrics.gauge(
+    "circuit_open",
+    "1 while an API key's circuit breaker holds back model calls, else 0",
+    ["limiter"]
+)
+CACHE_LOOKUPS = metrics.counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss, or deduplicated onto an in-flight request)",
+    ["cache", "result"]
+)
+TASKS = metrics.gauge(
+    "tasks",
+    "Tasks waiting for a run slot (queued) or running",
+    ["state"]
+)
+QUEUE_DEPTH = metrics.gauge(
+    "queue_depth",
+    "Items waiting in the content pipeline's stage queues, summed over running tasks",
+    ["queue"]
+)
+EXECUTOR_CALLS = metrics.gauge(
+    "executor_calls",
+    "Calls queued or running on each agent executor",
+    ["executor"]
+)
+
+_watched_queues: Dict[str, "weakref.WeakSet"] = {}
+
+
+def watch_queue(name: str, queue: Any):
+    """Count a queue's items towards the queue depth gauge for as long as the queue exists"""
+    if name not in _watched_queues:
+        queues = _watched_queues[name] = weakref.WeakSet()
+        QUEUE_DEPTH.track(lambda: sum(item.qsize() for item in list(queues)), queue=name)
+    _watched_queues[name].add(queue)
+
+
+class MeteredModel(ModelProxy):
+    """Records the latency and token usage of every call that reaches the model API
+
+    Wrapped innermost, beneath rate limiting and the response cache, so it
+    only sees real API calls.
+    """
+
+    def __init__(self, wrapped: Any, agent_name: str):
+        super().__init__(wrapped)
+        self.agent_name = agent_name
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        with MODEL_CALL_SECONDS.time(agent=self.agent_name):
+            response = self._call_wrapped(messages, **kwargs)
+        prompt_tokens, completion_tokens = token_usage(response, self.wrapped)
+        if prompt_tokens is not None:
+            MODEL_TOKENS.observe(prompt_tokens, agent=self.agent_name, kind="prompt")
+        if completion_tokens is not None:
+            MODEL_TOKENS.observe(completion_tokens, agent=self.agent_name, kind="completion")
+        return response
@@ -0,0 +1,65 @@
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelProxy:
+    """Wraps a smolagents model and forwards everything it does not override
+
+    Subclasses override `generate`. Both the `generate` entry point used by
+    newer smolagents releases and the `__call__` entry point used by older
+    ones route through it, so wrappers can be stacked around LiteLLMModel.
+    """
+
+    def __init__(self, wrapped: Any):
+        self.wrapped = wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes the proxy itself lacks
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def __call__(self, messages: List[Any], **kwargs) -> Any:
+        return self.generate(messages, **kwargs)
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        return self._call_wrapped(messages, **kwargs)
+
+    def _call_wrapped(self, messages: List[Any], **kwargs) -> Any:
+        """Invoke the wrapped model through whichever entry point it provides"""
+        generate = getattr(self.wrapped, "generate", None)
+        if generate is not None:
+            return generate(messages, **kwargs)
+        return self.wrapped(messages, **kwargs)
+
+
+def message_text(message: Any) -> str:
+    """Flatten a chat message's content (str or list of text parts) into plain text"""
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if isinstance(part, dict):
+            parts.append(str(part.get("text", "")))
+        else:
+            parts.append(str(part))
+    return "\n".join(parts)
+
+
+def message_role(message: Any) -> str:
+    """Role of a chat message as a plain string"""
+    role = message.get("role") if isinstance(message, dict) else getattr(message, "role", "")
+    return str(getattr(role, "value", role))
+
+
+def token_usage(response: Any, model: Any) -> Tuple[Optional[int], Optional[int]]:
+    """Prompt and completion tokens of a response, from whichever field this smolagents release fills"""
+    usage = getattr(response, "token_usage", None)
+    if usage is not None:
+        return getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+    return getattr(model, "last_input_token_count", None), getattr(model, "last_output_token_count", None)
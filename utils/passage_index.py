@@ -0,0 +1,177 @@
+import os
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words per research passage
+RESEARCH_PASSAGE_WORDS = int(os.getenv("RESEARCH_PASSAGE_WORDS", "80"))
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how if in into is it its of on or our so "
+    "than that the their them then there these they this to was we were what when which while who "
+    "will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords; a trailing plural "s" is dropped so agents matches agent"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def chunk_text(text: str, max_words: int = RESEARCH_PASSAGE_WORDS) -> List[str]:
+    """Split a report into passages of whole sentences, at most max_words each where possible"""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current: List[str] = []
+        count = 0
+        for sentence in re.split(r"(?<=[.!?])\s+|\n", paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            words = len(sentence.split())
+            if current and count + words > max_words:
+                passages.append(" ".join(current))
+                current, count = [], 0
+            current.append(sentence)
+            count += words
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+
+def render_passages(passages: List[Dict[str, Any]]) -> str:
+    """Passages as a prompt-ready bullet list, with sources where known"""
+    lines = []
+    for passage in passages:
+        source = f" ({passage['source']})" if passage.get("source") else ""
+        lines.append(f"- {passage['text']}{source}")
+    return "\n".join(lines)
+
+
+class PassageIndex:
+    """In-memory BM25 index over one task's research passages
+
+    Passages are tokenized once when added. Search builds (on first use
+    after an add) a postings layout sorted by term, with the BM25 weight of
+    every (term, passage) pair precomputed, so a query is a handful of
+    array slices and one bincount. Each passage carries its topic, so
+    searches can stay within one topic's research, and a topic that will not
+    be searched again can be removed. Document frequencies and lengths are
+    counted per topic, so a topic's scores do not depend on which other
+    topics happen to be indexed.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._reset()
+
+    def _reset(self):
+        self.passages: List[Dict[str, Any]] = []
+        self._vocabulary: Dict[str, int] = {}
+        self._topic_ids: Dict[str, int] = {}
+        self._passage_terms: List[np.ndarray] = []
+        self._passage_topics: List[int] = []
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def has_topic(self, topic: str) -> bool:
+        return topic in self._topic_ids
+
+    def add(self, text: str, topic: str, source: Optional[str] = None, kind: str = "report"):
+        """Index one passage"""
+        terms = [self._vocabulary.setdefault(token, len(self._vocabulary)) for token in tokenize(text)]
+        if not terms:
+            return
+        self.passages.append({"text": text, "topic": topic, "source": source, "kind": kind})
+        self._passage_terms.append(np.array(terms, dtype=np.int64))
+        self._passage_topics.append(self._topic_ids.setdefault(topic, len(self._topic_ids)))
+        self._built = False
+
+    def add_research(self, topic_research: Dict[str, Any]):
+        """Index a researched topic: its source facts and its report, split into passages"""
+        topic = topic_research.get("topic")
+        if not topic or self.has_topic(topic) or topic_research.get("status") != "completed":
+            return
+        for item in (topic_research.get("digest") or {}).get("facts", []):
+            self.add(item["fact"], topic, item.get("source"), kind="fact")
+        for passage in chunk_text(str(topic_research.get("raw_research") or "")):
+            self.add(passage, topic, kind="report")
+
+    def remove_topic(self, topic: str):
+        """Drop a topic's passages; the rest are indexed again so the vocabulary shrinks with them"""
+        if topic not in self._topic_ids:
+            return
+        remaining = [passage for passage in self.passages if passage["topic"] != topic]
+        self._reset()
+        for passage in remaining:
+            self.add(passage["text"], passage["topic"], passage["source"], passage["kind"])
+
+    def _build(self):
+        count = len(self.passages)
+        lengths = np.array([len(terms) for terms in self._passage_terms], dtype=np.int64)
+        passage_ids = np.repeat(np.arange(count, dtype=np.int64), lengths)
+        term_ids = np.concatenate(self._passage_terms)
+
+        # One posting per distinct (term, passage) pair, sorted by term, with its term frequency
+        pairs, frequencies = np.unique(term_ids * count + passage_ids, return_counts=True)
+        self._posting_terms = pairs // count
+        self._posting_passages = pairs % count
+
+        postings_per_term = np.bincount(self._posting_terms, minlength=len(self._vocabulary))
+        self._offsets = np.concatenate(([0], np.cumsum(postings_per_term)))
+
+        self._topics = np.array(self._passage_topics, dtype=np.int64)
+        posting_topics = self._topics[self._posting_passages]
+        _, topic_term, document_frequency = np.unique(
+            posting_topics * len(self._vocabulary) + self._posting_terms, return_inverse=True, return_counts=True
+        )
+        topic_sizes = np.bincount(self._topics, minlength=len(self._topic_ids))
+        topic_lengths = np.bincount(self._topics, weights=lengths, minlength=len(self._topic_ids))
+        mean_lengths = topic_lengths / np.maximum(topic_sizes, 1)
+        idf = np.log1p(
+            (topic_sizes[posting_topics] - document_frequency[topic_term] + 0.5)
+            / (document_frequency[topic_term] + 0.5)
+        )
+        length_norm = self.k1 * (1 - self.b + self.b * lengths / mean_lengths[self._topics])
+        self._posting_weights = (
+            idf * frequencies * (self.k1 + 1)
+            / (frequencies + length_norm[self._posting_passages])
+        )
+        self._built = True
+
+    def search(self, query: str, k: int = 5, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k passages for the query, optionally only from one topic's research"""
+        if not self.passages or (topic is not None and topic not in self._topic_ids):
+            return []
+        if not self._built:
+            self._build()
+
+        term_ids = sorted({self._vocabulary[token] for token in tokenize(query) if token in self._vocabulary})
+        if not term_ids:
+            return []
+        postings = np.concatenate([np.arange(self._offsets[term], self._offsets[term + 1]) for term in term_ids])
+        scores = np.bincount(
+            self._posting_passages[postings],
+            weights=self._posting_weights[postings],
+            minlength=len(self.passages)
+        )
+        if topic is not None:
+            scores[self._topics != self._topic_ids[topic]] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        best = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return [{**self.passages[i], "score": round(float(scores[i]), 4)} for i in best]
@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+from utils.metrics import RATE_LIMIT_WAIT_SECONDS
+from utils.model_proxy import ModelProxy, message_text
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_RPM", "10"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TPM", "1000000"))
+DEFAULT_COMPLETION_TOKENS = 2048
+
+# Expected completion size of the current agent run, set by the agent before it runs
+completion_budget: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "completion_budget", default=DEFAULT_COMPLETION_TOKENS
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for a prompt (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucketRateLimiter:
+    """Token bucket enforcing requests-per-minute and tokens-per-minute budgets
+
+    Callers reserve capacity up front, so waiters queue in arrival order. The
+    same limiter serves coroutines (`acquire`) and executor threads
+    (`acquire_blocking`).
+    """
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE, name: str = "default"):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        # Both buckets start full so the first calls go out immediately
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Top up both buckets for the time elapsed since the last refill"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        """Claim one request and `tokens` tokens, returning how long the caller must wait"""
+        # A single call larger than the whole minute budget can never fit, so cap it
+        tokens = min(max(1, tokens), self.tokens_per_minute)
+
+        with self._lock:
+            self._refill()
+            request_deficit = max(0.0, 1.0 - self._request_allowance)
+            token_deficit = max(0.0, tokens - self._token_allowance)
+
+            # Allowances may go negative; later callers then wait behind this reservation
+            self._request_allowance -= 1.0
+            self._token_allowance -= tokens
+
+        return max(
+            request_deficit * 60.0 / self.requests_per_minute,
+            token_deficit * 60.0 / self.tokens_per_minute
+        )
+
+    async def acquire(self, tokens: int = 1) -> float:
+        """Wait asynchronously until the call fits the budget; returns seconds waited"""
+        delay = self._reserve(tokens)
+        RATE_LIMIT_WAIT_SECONDS.observe(delay, limiter=self.name)
+        if delay > 0:
+            logger.info(f"Rate limiter '{self.name}' delaying call by {delay:.2f}s")
+            with tracer.span("rate_limiter.wait", kind="wait", limiter=self.name, tokens=tokens):
+                await asyncio.sleep(delay)
+        return delay
+
+    def acquire_blocking(self, tokens: int = 1) -> float:
+        """Blocking variant for code already running on an executor thread"""
+        delay = self._reserve(tokens)
+        RATE_LIMIT_WAIT_SECONDS.observe(delay, limiter=self.name)
+        if delay > 0:
+            logger.info(f"Rate limiter '{self.name}' delaying call by {delay:.2f}s")
+            with tracer.span("rate_limiter.wait", kind="wait", limiter=self.name, tokens=tokens):
+                time.sleep(delay)
+        return delay
+
+
+class RateLimitedModel(ModelProxy):
+    """Charges every model call against the API key's limiter
+
+    CodeAgent makes several model calls per run, so the budget is charged per
+    call rather than per run. Wrapped beneath the response cache, cache hits
+    never touch the quota.
+    """
+
+    def __init__(self, wrapped: Any, rate_limiter: TokenBucketRateLimiter):
+        super().__init__(wrapped)
+        self.rate_limiter = rate_limiter
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        prompt_tokens = sum(estimate_tokens(message_text(message)) for message in messages)
+        # Model calls run on executor threads, never on the event loop
+        self.rate_limiter.acquire_blocking(prompt_tokens + completion_budget.get())
+        return self._call_wrapped(messages, **kwargs)
+
+
+class RateLimiterRegistry:
+    """Shares one limiter per Gemini API key across all agents"""
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._limiters: Dict[str, TokenBucketRateLimiter] = {}
+
+    def get(self, api_key: Optional[str], name: Optional[str] = None) -> TokenBucketRateLimiter:
+        """Return the limiter for an API key, creating it on first use"""
+        # Agents configured with the same key draw from the same quota
+        key = api_key or "__no_key__"
+        if key not in self._limiters:
+            self._limiters[key] = TokenBucketRateLimiter(
+                self.requests_per_minute,
+                self.tokens_per_minute,
+                name=name or "unnamed"
+            )
+        return self._limiters[key]
@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from utils.passage_index import render_passages
+from utils.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Token budget of the merged fact list kept per topic
+RESEARCH_DIGEST_TOKENS = int(os.getenv("RESEARCH_DIGEST_TOKENS", "800"))
+# Facts sharing this fraction of their words count as the same fact
+DUPLICATE_FACT_OVERLAP = 0.8
+
+
+def parse_facts(result: Any) -> List[str]:
+    """Fact strings from a map-stage answer: a JSON array, or a bulleted or numbered list"""
+    if isinstance(result, list):
+        return [str(fact).strip() for fact in result if str(fact).strip()]
+
+    text = str(result)
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if match:
+        try:
+            parsed = json.loads(match.group(0))
+            if isinstance(parsed, list):
+                return [str(fact).strip() for fact in parsed if str(fact).strip()]
+        except ValueError:
+            pass
+
+    facts = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip()
+        if line:
+            facts.append(line)
+    return facts
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def reduce_facts(summaries: List[Dict[str, Any]], budget_tokens: int = RESEARCH_DIGEST_TOKENS) -> Dict[str, Any]:
+    """Merge per-document fact lists into one list that fits the token budget
+
+    The map stage lists each document's facts most important first, so
+    facts are taken round-robin by rank: every source contributes its best
+    facts before any source contributes its weaker ones. Near-duplicates
+    are dropped in favor of the first (higher ranked) occurrence.
+    """
+    merged = []
+    seen: List[set] = []
+    used_tokens = 0
+    depth = max((len(summary["facts"]) for summary in summaries), default=0)
+
+    for rank in range(depth):
+        for summary in summaries:
+            if rank >= len(summary["facts"]):
+                continue
+            fact = summary["facts"][rank]
+            words = _words(fact)
+            if not words or any(len(words & other) / len(words | other) >= DUPLICATE_FACT_OVERLAP for other in seen):
+                continue
+            tokens = estimate_tokens(fact)
+            if used_tokens + tokens > budget_tokens:
+                continue
+            merged.append({"fact": fact, "source": summary["url"]})
+            seen.append(words)
+            used_tokens += tokens
+
+    return {
+        "facts": merged,
+        "sources": [summary["url"] for summary in summaries],
+        "facts_considered": sum(len(summary["facts"]) for summary in summaries),
+        "tokens": used_tokens
+    }
+
+
+def render_facts(digest: Dict[str, Any]) -> str:
+    """A digest's facts as a prompt-ready bullet list with their sources"""
+    return "\n".join(f"- {item['fact']} ({item['source']})" for item in digest.get("facts", []))
+
+
+def _within_budget(lines: List[str], budget_chars: int) -> List[str]:
+    kept = []
+    used = 0
+    for line in lines:
+        if used + len(line) > budget_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return kept
+
+
+def research_context(topic_research: Dict[str, Any], budget_tokens: int,
+                     passages: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Prompt text for one topic's research, within a token budget
+
+    With passages retrieved for the prompt, those are used, best first.
+    Otherwise source facts come first, then as much of the research report
+    as the remaining budget allows. Research without a digest (checkpointed
+    by older releases) falls back to its JSON form.
+    """
+    budget_chars = budget_tokens * 4
+    if passages:
+        lines = _within_budget(render_passages(passages).splitlines(), budget_chars)
+        return "Most relevant research:\n" + "\n".join(lines)
+    if "digest" not in topic_research and "raw_research" not in topic_research:
+        return json.dumps(topic_research, indent=2)[:budget_chars]
+
+    sections = []
+    facts = _within_budget(render_facts(topic_research.get("digest") or {}).splitlines(), budget_chars)
+    if facts:
+        sections.append("Key facts from the sources:\n" + "\n".join(facts))
+    remaining = budget_chars - sum(len(section) for section in sections)
+    report = str(topic_research.get("raw_research") or "").strip()
+    if report and remaining > 0:
+        sections.append(f"Research report:\n{report[:remaining]}")
+    return "\n\n".join(sections)
@@ -0,0 +1,243 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from utils.metrics import CIRCUIT_OPEN, RETRIES
+from utils.model_proxy import ModelProxy
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+MODEL_MAX_ATTEMPTS = int(os.getenv("MODEL_MAX_ATTEMPTS", "5"))
+MODEL_TIMEOUT_SECONDS = float(os.getenv("MODEL_TIMEOUT_SECONDS", "120"))
+# Exponential backoff with full jitter for failures that name no retry time
+MODEL_BACKOFF_BASE_SECONDS = float(os.getenv("MODEL_BACKOFF_BASE_SECONDS", "1"))
+MODEL_BACKOFF_MAX_SECONDS = float(os.getenv("MODEL_BACKOFF_MAX_SECONDS", "60"))
+# A Retry-After longer than this (e.g. an exhausted daily quota) fails the call instead of waiting
+MODEL_MAX_RETRY_AFTER_SECONDS = float(os.getenv("MODEL_MAX_RETRY_AFTER_SECONDS", "300"))
+# Consecutive transient failures that open an API key's circuit, and how long it first stays open
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "30"))
+CIRCUIT_MAX_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_MAX_COOLDOWN_SECONDS", "300"))
+
+# Transient failure kinds; anything else is not retried
+RATE_LIMIT = "rate_limit"
+SERVER_ERROR = "server_error"
+TIMEOUT = "timeout"
+
+# Gemini names the wait in its error body (RetryInfo), which LiteLLM keeps in the message
+RETRY_DELAY = re.compile(r"retryDelay[\"']?\s*:\s*[\"']?(\d+(?:\.\d+)?)s")
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_breakers_lock = threading.Lock()
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Transient kind of a failed model call (rate limit, server error, timeout), or None if retrying cannot help"""
+    if any("Timeout" in cls.__name__ for cls in type(error).__mro__) or isinstance(error, TimeoutError):
+        return TIMEOUT
+    status = _status_code(error)
+    if status == 429:
+        return RATE_LIMIT
+    if status == 408:
+        return TIMEOUT
+    if status is not None and status >= 500:
+        return SERVER_ERROR
+    if status is None:
+        # Wrapped errors may keep only the provider's status name in the message
+        message = str(error)
+        if "RESOURCE_EXHAUSTED" in message or "RateLimitError" in message:
+            return RATE_LIMIT
+        if "UNAVAILABLE" in message or "ServiceUnavailableError" in message or "InternalServerError" in message:
+            return SERVER_ERROR
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked to wait before retrying, from Retry-After or Gemini's RetryInfo"""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        try:
+            # Retry-After may also be an HTTP date
+            return max(0.0, (parsedate_to_datetime(str(value)) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    match = RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(attempt: int, base: float = MODEL_BACKOFF_BASE_SECONDS,
+                  cap: float = MODEL_BACKOFF_MAX_SECONDS) -> float:
+    """Full-jitter exponential backoff: uniform between 0 and base * 2^attempt, capped"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def get_circuit_breaker(api_key: Optional[str], name: Optional[str] = None) -> "CircuitBreaker":
+    """The circuit breaker of an API key, shared by every agent using that key"""
+    key = api_key or "__no_key__"
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(name=name or "unnamed")
+        return _breakers[key]
+
+
+class CircuitBreaker:
+    """Stops calls to an API key that is throttled or failing, until it has had time to recover
+
+    Closed, calls go out. A Retry-After from the provider, or
+    CIRCUIT_FAILURE_THRESHOLD consecutive transient failures, opens the
+    circuit: calls on every thread wait, for exactly the Retry-After or for
+    a cooldown that doubles with each consecutive trip. Then one call probes
+    the key (half-open) while the rest keep waiting; its success closes the
+    circuit and its failure opens it again.
+    """
+
+    def __init__(self, name: str = "default",
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN_SECONDS,
+                 max_cooldown: float = CIRCUIT_MAX_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._condition = threading.Condition()
+
+    def wait_blocking(self) -> float:
+        """Block until this call may go out; returns seconds waited (calls run on executor threads)"""
+        start = time.monotonic()
+        with self._condition:
+            if self.state == "closed":
+                return 0.0
+            with tracer.span("circuit_breaker.wait", kind="wait", limiter=self.name):
+                while True:
+                    now = time.monotonic()
+                    if self.state == "closed":
+                        break
+                    if self.state == "open":
+                        if now < self._open_until:
+                            self._condition.wait(self._open_until - now)
+                            continue
+                        self.state = "half_open"
+                        self._probing = False
+                    if not self._probing:
+                        self._probing = True
+                        logger.info(f"Circuit for '{self.name}' half-open; probing with one call")
+                        break
+                    self._condition.wait()
+        return time.monotonic() - start
+
+    def record_success(self):
+        with self._condition:
+            if self.state == "open":
+                # A call that went out before the circuit opened says nothing about now
+                return
+            if self.state == "half_open":
+                logger.info(f"Circuit for '{self.name}' closed")
+            self.state = "closed"
+            self._failures = 0
+            self._trips = 0
+            self._probing = False
+            CIRCUIT_OPEN.set(0, limiter=self.name)
+            self._condition.notify_all()
+
+    def record_failure(self, kind: str, wait: Optional[float] = None):
+        """Count a transient failure; open the circuit for `wait` seconds if the provider named a wait"""
+        with self._condition:
+            self._failures += 1
+            if wait is not None:
+                open_for = wait
+            elif self.state == "half_open" or self._failures >= self.failure_threshold:
+                open_for = min(self.max_cooldown, self.cooldown * 2 ** self._trips)
+                self._trips += 1
+            else:
+                return
+            self._open_until = max(self._open_until, time.monotonic() + open_for)
+            self.state = "open"
+            self._probing = False
+            CIRCUIT_OPEN.set(1, limiter=self.name)
+            logger.warning(f"Circuit for '{self.name}' open for {open_for:.1f}s after {kind} "
+                           f"({self._failures} consecutive failures)")
+            self._condition.notify_all()
+
+
+class ResilientModel(ModelProxy):
+    """Retries transient model call failures, sharing an API key's circuit breaker with other agents
+
+    429s, 5xx errors and timeouts are retried up to MODEL_MAX_ATTEMPTS
+    times. A provider-named wait (Retry-After, RetryInfo) is honored through
+    the circuit breaker, so every caller on the key pauses exactly that
+    long; other failures back off exponentially with jitter. Wrapped above
+    rate limiting, so each retry is charged to the quota again.
+    """
+
+    def __init__(self, wrapped: Any, breaker: CircuitBreaker, agent_name: str,
+                 max_attempts: int = MODEL_MAX_ATTEMPTS, timeout: Optional[float] = MODEL_TIMEOUT_SECONDS):
+        super().__init__(wrapped)
+        self.breaker = breaker
+        self.agent_name = agent_name
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        if self.timeout:
+            # Passed through to LiteLLM, so a hung request fails as a timeout instead of blocking a worker
+            kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_attempts):
+            self.breaker.wait_blocking()
+            try:
+                response = self._call_wrapped(messages, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None:
+                    # The key answered; the request itself is at fault, and retrying will not help
+                    self.breaker.record_success()
+                    raise
+                wait = retry_after(e)
+                if wait is not None and wait > MODEL_MAX_RETRY_AFTER_SECONDS:
+                    self.breaker.record_failure(kind)
+                    logger.error(f"{self.agent_name} model call asked to wait {wait:.0f}s; not retrying: {str(e)}")
+                    raise
+                self.breaker.record_failure(kind, wait)
+                if attempt + 1 >= self.max_attempts:
+                    logger.error(f"{self.agent_name} model call failed after {attempt + 1} attempts: {str(e)}")
+                    raise
+                RETRIES.inc(operation="model_call", reason=kind)
+                if wait is not None:
+                    logger.warning(f"{self.agent_name} model call hit {kind}; retrying after the requested {wait:.1f}s")
+                    continue
+                delay = backoff_delay(attempt)
+                logger.warning(f"{self.agent_name} model call hit {kind}; retry {attempt + 2} of "
+                               f"{self.max_attempts} in {delay:.1f}s")
+                with tracer.span("model.backoff", kind="wait", agent=self.agent_name, reason=kind):
+                    time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return response
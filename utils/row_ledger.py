@@ -0,0 +1,73 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from utils.agent_executor import executors
+
+logger = logging.getLogger(__name__)
+
+
+class RowLedger:
+    """Remembers which spreadsheet rows were already processed, by content hash
+
+    Layout: one JSON file mapping a sheet key (sheet id and range) to the
+    sheet's last seen change token and the hashes of its processed rows. An
+    edited row hashes differently, so it counts as new.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("ROW_LEDGER_PATH", "cache/row_ledger.json")
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def row_hash(row: Dict[str, Any]) -> str:
+        """Content hash of a row, ignoring surrounding whitespace in its values"""
+        normalized = {key: str(value).strip() for key, value in row.items()}
+        payload = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_version(self, sheet_key: str) -> Optional[str]:
+        """Change token recorded at the last completed sync"""
+        entry = (await self._load()).get(sheet_key, {})
+        return entry.get("version")
+
+    async def changed_rows(self, sheet_key: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rows that are new or edited since the last completed sync"""
+        seen = set((await self._load()).get(sheet_key, {}).get("rows", []))
+        return [row for row in rows if self.row_hash(row) not in seen]
+
+    async def record(self, sheet_key: str, row_hashes: List[str], version: Optional[str]):
+        """Mark the sheet's current rows as processed"""
+        async with self._lock:
+            ledger = await self._load()
+            ledger[sheet_key] = {"version": version, "rows": sorted(set(row_hashes))}
+            await executors.get("io").run(self._write_blocking, self.path, ledger)
+        logger.info(f"Recorded {len(row_hashes)} processed rows for {sheet_key}")
+
+    async def _load(self) -> Dict[str, Any]:
+        return await executors.get("io").run(self._read_blocking, self.path)
+
+    @staticmethod
+    def _read_blocking(path: str) -> Dict[str, Any]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            # Losing the ledger only means the next sync reprocesses every row
+            logger.warning(f"Ignoring unreadable row ledger {path}: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _write_blocking(path: str, data: Dict[str, Any]):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,126 @@
+import os
+import logging
+import threading
+import unicodedata
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from smolagents import DuckDuckGoSearchTool, Tool
+
+from utils.cassette import get_cassette
+from utils.disk_cache import DiskCache
+from utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "cache/search_results.sqlite")
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "24"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+_search_tool: Optional["CachedSearchTool"] = None
+_search_tool_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a search query
+
+    Only Unicode form, case and spacing are ignored, so "AI  Agents" and
+    "ai agents" share an entry; word order and symbols are kept, since
+    "C++ tutorial" and "C# tutorial" are different searches.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+def get_search_tool() -> "CachedSearchTool":
+    """Process-wide cached web search shared by every agent and task"""
+    global _search_tool
+    # Agents are built on executor threads, which must all share one tool
+    with _search_tool_lock:
+        if _search_tool is None:
+            _search_tool = CachedSearchTool()
+    return _search_tool
+
+
+class CachedSearchTool(Tool):
+    """DuckDuckGo web search with a TTL cache and in-flight query deduplication
+
+    Agents run on executor threads, so a query that is already being
+    searched by another thread waits for that search instead of sending its
+    own. Results are kept on disk for SEARCH_CACHE_TTL_HOURS; failed
+    searches are not cached.
+    """
+
+    name = DuckDuckGoSearchTool.name
+    description = DuckDuckGoSearchTool.description
+    inputs = DuckDuckGoSearchTool.inputs
+    output_type = DuckDuckGoSearchTool.output_type
+
+    def __init__(self, search_tool: Optional[Tool] = None, cache: Optional[DiskCache] = None):
+        super().__init__()
+        self.search_tool = search_tool or DuckDuckGoSearchTool()
+        self.cache = cache or DiskCache(
+            SEARCH_CACHE_PATH,
+            ttl_seconds=SEARCH_CACHE_TTL_HOURS * 3600,
+            max_entries=SEARCH_CACHE_MAX_ENTRIES
+        )
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    def forward(self, query: str) -> str:
+        key = normalize_query(query)
+        # A replayed run sees the results its recording saw, without searching
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.take_input("search", key)
+        results = self._search(query, key)
+        if cassette is not None:
+            cassette.record_input("search", key, results)
+        return results
+
+    def _search(self, query: str, key: str) -> str:
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            CACHE_LOOKUPS.inc(cache="search", result="hit")
+            return cached["results"]
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.deduplicated += 1
+        CACHE_LOOKUPS.inc(cache="search", result="miss" if owner else "deduplicated")
+        if not owner:
+            logger.debug(f"Waiting for in-flight search: {key}")
+            return pending.result()
+
+        try:
+            results = self.search_tool(query)
+            self.cache.set(key, {"query": query, "results": results})
+            pending.set_result(results)
+            return results
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Searches served from the cache, shared with a concurrent identical query, or sent"""
+        lookups = self.hits + self.misses + self.deduplicated
+        return {
+            "hits": self.hits,
+            "deduplicated": self.deduplicated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.deduplicated) / lookups, 4) if lookups else 0.0,
+            "entries": self.cache.stats()["entries"]
+        }
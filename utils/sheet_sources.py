@@ -0,0 +1,155 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# The only spreadsheet columns the agents read
+CONTENT_COLUMNS = ["topic", "links", "description", "keywords"]
+
+
+def normalize_header(header: Any) -> str:
+    """Column name as the agents expect it: lower case, underscores for spaces"""
+    return str(header).strip().lower().replace(" ", "_")
+
+
+def frame_to_rows(frame: pd.DataFrame) -> List[Dict[str, str]]:
+    """Project the content columns of a frame with normalized headers into row dicts
+
+    Conversion runs column by column; columns the source lacks come back as
+    empty strings.
+    """
+    columns = []
+    for name in CONTENT_COLUMNS:
+        if name in frame.columns:
+            column = frame[name]
+            if isinstance(column, pd.DataFrame):
+                # Duplicate headers: the first column wins
+                column = column.iloc[:, 0]
+            columns.append(column.fillna("").astype(str).str.strip().tolist())
+        else:
+            columns.append([""] * len(frame))
+    return [dict(zip(CONTENT_COLUMNS, values)) for values in zip(*columns)]
+
+
+class SheetSource:
+    """A table of content rows; methods block, so callers run them on the io executor"""
+
+    def key(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> str:
+        """Identifies the source in the row ledger"""
+        raise NotImplementedError
+
+    def version(self, sheet_id: Optional[str] = None) -> Optional[str]:
+        """Cheap change token, or None if the data must be read to tell"""
+        return None
+
+    def load(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> List[Dict[str, str]]:
+        """Read every row, projected to the content columns"""
+        raise NotImplementedError
+
+
+class GoogleSheetsSource(SheetSource):
+    """Rows from the Google Sheets API, with Drive file metadata as the change token"""
+
+    def __init__(self, service: Any, sheet_id: Optional[str], range_name: str, drive_service: Any = None):
+        self.service = service
+        self.drive_service = drive_service
+        self.sheet_id = sheet_id
+        self.range_name = range_name
+
+    def key(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> str:
+        return f"{sheet_id or self.sheet_id}:{range_name or self.range_name}"
+
+    def version(self, sheet_id: Optional[str] = None) -> Optional[str]:
+        if not self.drive_service:
+            return None
+        metadata = self.drive_service.files().get(
+            fileId=sheet_id or self.sheet_id,
+            fields="version,modifiedTime"
+        ).execute()
+        return str(metadata.get("version") or metadata.get("modifiedTime"))
+
+    def load(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> List[Dict[str, str]]:
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=sheet_id or self.sheet_id,
+            range=range_name or self.range_name
+        ).execute()
+        values = result.get("values", [])
+        if not values:
+            return []
+
+        headers = [normalize_header(header) for header in values[0]]
+        # Sheets omits trailing empty cells, so rows are ragged; from_records pads them
+        frame = pd.DataFrame.from_records(values[1:]) if len(values) > 1 else pd.DataFrame()
+        frame = frame.iloc[:, :len(headers)]
+        frame.columns = headers[:frame.shape[1]]
+        return frame_to_rows(frame)
+
+
+class FileSource(SheetSource):
+    """Rows from a local file, with its modification time and size as the change token"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def key(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> str:
+        return f"file:{os.path.abspath(self.path)}"
+
+    def version(self, sheet_id: Optional[str] = None) -> Optional[str]:
+        stat = os.stat(self.path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def load(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> List[Dict[str, str]]:
+        frame = self._read_frame(range_name)
+        frame.columns = [normalize_header(column) for column in frame.columns]
+        return frame_to_rows(frame)
+
+    def _read_frame(self, range_name: Optional[str]) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @staticmethod
+    def _wanted(column: Any) -> bool:
+        return normalize_header(column) in CONTENT_COLUMNS
+
+
+class CsvSource(FileSource):
+    """CSV file with a header row"""
+
+    def _read_frame(self, range_name: Optional[str]) -> pd.DataFrame:
+        return pd.read_csv(self.path, dtype=str, keep_default_na=False, usecols=self._wanted)
+
+
+class XlsxSource(FileSource):
+    """Excel workbook; a range such as "Sheet1!A:Z" selects the worksheet, otherwise the first"""
+
+    def _read_frame(self, range_name: Optional[str]) -> pd.DataFrame:
+        sheet_name = range_name.split("!")[0] if range_name and "!" in range_name else 0
+        return pd.read_excel(self.path, sheet_name=sheet_name, dtype=str, usecols=self._wanted)
+
+
+class ParquetSource(FileSource):
+    """Parquet file; only the content columns are read from disk"""
+
+    def _read_frame(self, range_name: Optional[str]) -> pd.DataFrame:
+        # pyarrow is only needed for Parquet sources
+        import pyarrow.parquet as pq
+
+        columns = [name for name in pq.read_schema(self.path).names if self._wanted(name)]
+        return pd.read_parquet(self.path, columns=columns)
+
+
+FILE_SOURCES = {
+    ".csv": CsvSource,
+    ".xlsx": XlsxSource,
+    ".parquet": ParquetSource
+}
+
+
+def create_file_source(path: str) -> FileSource:
+    """File source for a path, chosen by extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_SOURCES:
+        raise ValueError(f"Unsupported sheet source {path}; expected one of {', '.join(FILE_SOURCES)}")
+    return FILE_SOURCES[extension](path)
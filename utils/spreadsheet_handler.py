@@ -1,103 +1,158 @@
-﻿import os
-import asyncio
-import logging
-from typing import List, Dict, Any
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from dotenv import load_dotenv
-
-load_dotenv()
-
-logger = logging.getLogger(__name__)
-
-class SpreadsheetHandler:
-    """Handle Google Sheets operations"""
-    
-    def __init__(self):
-        self.sheet_id = os.getenv("GOOGLE_SHEETS_ID")
-        self.range_name = os.getenv("GOOGLE_SHEETS_RANGE", "Sheet1!A:Z")
-        
-        # Initialize Google Sheets API
-        try:
-            credentials_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY")
-            if credentials_path and os.path.exists(credentials_path):
-                self.creds = service_account.Credentials.from_service_account_file(
-                    credentials_path,
-                    scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-                )
-                self.service = build('sheets', 'v4', credentials=self.creds)
-            else:
-                logger.warning("Google service account key not found. Using mock data.")
-                self.service = None
-        except Exception as e:
-            logger.error(f"Failed to initialize Google Sheets: {str(e)}")
-            self.service = None
-    
-    async def get_data(self) -> List[Dict[str, Any]]:
-        """Get data from Google Sheets"""
-        try:
-            if not self.service:
-                # Return mock data if no service
-                return self._get_mock_data()
-            
-            # Get data from Google Sheets
-            sheet = self.service.spreadsheets()
-            result = await asyncio.to_thread(
-                sheet.values().get(
-                    spreadsheetId=self.sheet_id,
-                    range=self.range_name
-                ).execute
-            )
-            
-            values = result.get('values', [])
-            
-            if not values:
-                logger.warning("No data found in spreadsheet")
-                return self._get_mock_data()
-            
-            # Convert to list of dicts
-            headers = values[0]
-            data = []
-            
-            for row in values[1:]:
-                row_dict = {}
-                for i, header in enumerate(headers):
-                    if i < len(row):
-                        row_dict[header.lower().replace(' ', '_')] = row[i]
-                    else:
-                        row_dict[header.lower().replace(' ', '_')] = ""
-                data.append(row_dict)
-            
-            logger.info(f"Retrieved {len(data)} rows from spreadsheet")
-            return data
-            
-        except HttpError as e:
-            logger.error(f"Google Sheets API error: {str(e)}")
-            return self._get_mock_data()
-        except Exception as e:
-            logger.error(f"Failed to get spreadsheet data: {str(e)}")
-            return self._get_mock_data()
-    
-    def _get_mock_data(self) -> List[Dict[str, Any]]:
-        """Return mock data for testing"""
-        return [
-            {
-                "topic": "AI Agents and Automation",
-                "links": "https://arxiv.org/papers/ai-agents,https://openai.com/research",
-                "description": "Latest developments in autonomous AI agents",
-                "keywords": "AI agents, automation, LLM, multi-agent systems"
-            },
-            {
-                "topic": "Machine Learning in Production",
-                "links": "https://ml-ops.org/,https://papers.nips.cc/",
-                "description": "Best practices for deploying ML models",
-                "keywords": "MLOps, production ML, model deployment"
-            },
-            {
-                "topic": "Future of Human-AI Collaboration",
-                "links": "https://hai.stanford.edu/research,https://deepmind.com/blog",
-                "description": "How humans and AI will work together",
-                "keywords": "human-AI collaboration, augmented intelligence"
-            }
-        ]
+﻿import os
+import logging
+from typing import List, Dict, Any, Optional
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from dotenv import load_dotenv
+
+from utils.agent_executor import executors
+from utils.cassette import get_cassette
+from utils.fake_sheets import FakeSheetsService
+from utils.sheet_sources import SheetSource, GoogleSheetsSource, create_file_source
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class SpreadsheetHandler:
+    """Handle Google Sheets operations"""
+    
+    def __init__(self):
+        self.sheet_id = os.getenv("GOOGLE_SHEETS_ID")
+        self.range_name = os.getenv("GOOGLE_SHEETS_RANGE", "Sheet1!A:Z")
+        
+        self.service = None
+        self.drive_service = None
+        self.source: Optional[SheetSource] = None
+        
+        # Initialize the row source
+        try:
+            credentials_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY")
+            csv_path = os.getenv("GOOGLE_SHEETS_CSV")
+            source_path = os.getenv("SHEET_SOURCE")
+            if source_path:
+                # Local CSV, XLSX or Parquet file in place of Google Sheets
+                logger.info(f"Reading content rows from {source_path}")
+                self.source = create_file_source(source_path)
+            elif csv_path:
+                # Local testing: serve the sheet from a CSV file through a fake Sheets client
+                logger.info(f"Using CSV file {csv_path} in place of Google Sheets")
+                self.service = FakeSheetsService(csv_path)
+                self.drive_service = self.service.drive()
+            elif credentials_path and os.path.exists(credentials_path):
+                self.creds = service_account.Credentials.from_service_account_file(
+                    credentials_path,
+                    scopes=[
+                        'https://www.googleapis.com/auth/spreadsheets.readonly',
+                        'https://www.googleapis.com/auth/drive.metadata.readonly'
+                    ]
+                )
+                self.service = build('sheets', 'v4', credentials=self.creds)
+                # Drive file metadata gives a cheap change token without reading the sheet
+                self.drive_service = build('drive', 'v3', credentials=self.creds)
+            else:
+                logger.warning("Google service account key not found. Using mock data.")
+            
+            if self.service:
+                self.source = GoogleSheetsSource(self.service, self.sheet_id, self.range_name, self.drive_service)
+        except Exception as e:
+            logger.error(f"Failed to initialize Google Sheets: {str(e)}")
+            self.source = None
+    
+    def sheet_key(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None) -> str:
+        """Identifies a sheet and range in the row ledger"""
+        if not self.source:
+            return "mock"
+        return self.source.key(sheet_id, range_name)
+    
+    async def get_version(self, sheet_id: Optional[str] = None) -> Optional[str]:
+        """Cheap change token for the sheet, or None if it cannot be read without fetching the data"""
+        # Replayed runs see the sheet as it was recorded
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.take_input("sheet_version", str(sheet_id))
+        version = await self._get_version(sheet_id)
+        if cassette is not None:
+            cassette.record_input("sheet_version", str(sheet_id), version)
+        return version
+    
+    async def _get_version(self, sheet_id: Optional[str] = None) -> Optional[str]:
+        try:
+            if not self.source:
+                # Mock data never changes
+                return "mock"
+            return await executors.get("io").run(self.source.version, sheet_id)
+            
+        except Exception as e:
+            logger.warning(f"Sheet change detection failed, a full fetch is needed: {str(e)}")
+            return None
+    
+    async def get_data(self, sheet_id: Optional[str] = None, range_name: Optional[str] = None,
+                       use_mock: bool = True) -> List[Dict[str, Any]]:
+        """Get the content rows, optionally overriding the configured sheet and range
+        
+        With `use_mock` False (incremental syncs), a missing source or failed
+        read raises and an empty sheet gives no rows, instead of mock data.
+        """
+        cassette = get_cassette()
+        key = f"{sheet_id}|{range_name}|{use_mock}"
+        if cassette is not None and cassette.replaying:
+            return cassette.take_input("sheet", key)
+        data = await self._get_data(sheet_id, range_name, use_mock)
+        if cassette is not None:
+            cassette.record_input("sheet", key, data)
+        return data
+    
+    async def _get_data(self, sheet_id: Optional[str], range_name: Optional[str],
+                        use_mock: bool) -> List[Dict[str, Any]]:
+        try:
+            if not self.source:
+                if not use_mock:
+                    raise RuntimeError("No spreadsheet source configured")
+                # Return mock data if no source
+                return self._get_mock_data()
+            
+            # Headers are normalized and the content columns projected by the source
+            data = await executors.get("io").run(self.source.load, sheet_id, range_name)
+            
+            if not data:
+                logger.warning("No data found in spreadsheet")
+                return self._get_mock_data() if use_mock else []
+            
+            logger.info(f"Retrieved {len(data)} rows from spreadsheet")
+            return data
+            
+        except HttpError as e:
+            logger.error(f"Google Sheets API error: {str(e)}")
+            if not use_mock:
+                raise
+            return self._get_mock_data()
+        except Exception as e:
+            logger.error(f"Failed to get spreadsheet data: {str(e)}")
+            if not use_mock:
+                raise
+            return self._get_mock_data()
+    
+    def _get_mock_data(self) -> List[Dict[str, Any]]:
+        """Return mock data for testing"""
+        return [
+            {
+                "topic": "AI Agents and Automation",
+                "links": "https://arxiv.org/papers/ai-agents,https://openai.com/research",
+                "description": "Latest developments in autonomous AI agents",
+                "keywords": "AI agents, automation, LLM, multi-agent systems"
+            },
+            {
+                "topic": "Machine Learning in Production",
+                "links": "https://ml-ops.org/,https://papers.nips.cc/",
+                "description": "Best practices for deploying ML models",
+                "keywords": "MLOps, production ML, model deployment"
+            },
+            {
+                "topic": "Future of Human-AI Collaboration",
+                "links": "https://hai.stanford.edu/research,https://deepmind.com/blog",
+                "description": "How humans and AI will work together",
+                "keywords": "human-AI collaboration, augmented intelligence"
+            }
+        ]
@@ -0,0 +1,48 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_INTERVAL_MINUTES = float(os.getenv("SYNC_INTERVAL_MINUTES", "0"))
+
+
+class SyncScheduler:
+    """Runs a sync callback on a fixed interval
+
+    The callback polls the sheet's change token and starts an incremental run
+    only when something changed, so ticks against an idle sheet cost one
+    metadata request. An interval of 0 disables scheduling.
+    """
+
+    def __init__(self, sync: Callable[[], Awaitable[None]],
+                 interval_minutes: float = DEFAULT_SYNC_INTERVAL_MINUTES):
+        self.sync = sync
+        self.interval = interval_minutes * 60
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start ticking on the running event loop, if scheduling is enabled"""
+        if self.interval <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Scheduled sheet sync every {self.interval / 60:g} minutes")
+
+    async def stop(self):
+        """Stop scheduling further syncs"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                # One failed poll must not stop the schedule
+                logger.error(f"Scheduled sync failed: {str(e)}")
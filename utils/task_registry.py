@@ -0,0 +1,153 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils.metrics import TASKS
+from utils.passage_index import PassageIndex
+
+logger = logging.getLogger(__name__)
+
+
+class RunContext:
+    """Isolated state for a single orchestration run"""
+
+    def __init__(self, task_id: str, sheet_id: Optional[str] = None, range_name: Optional[str] = None,
+                 resumed: bool = False, incremental: bool = False):
+        self.task_id = task_id
+        self.sheet_id = sheet_id
+        self.range_name = range_name
+        self.resumed = resumed
+        # Incremental runs only process rows that are new or edited since the last sync
+        self.incremental = incremental
+        self.sync: Optional[Dict[str, Any]] = None
+        # Research passages of every topic researched so far, searched by the writing phases
+        self.research_index = PassageIndex()
+        # Critical-path summary of the run's trace, once the run has finished
+        self.trace: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.now().isoformat()
+        self.results: Dict[str, Any] = {
+            "task_id": task_id,
+            "status": "pending",
+            "spreadsheet_data": None,
+            "research_data": None,
+            "blog_posts": None,
+            "tweets": None,
+            "linkedin_posts": None,
+            "optimized_content": None,
+            "errors": []
+        }
+
+    def add_error(self, phase: str, error: Exception, topic: Optional[str] = None):
+        """Record a phase error against this run, and the spreadsheet topic it belongs to if any"""
+        entry = {
+            "phase": phase,
+            "error": str(error),
+            "timestamp": datetime.now().isoformat()
+        }
+        if topic:
+            entry["topic"] = topic
+        self.results["errors"].append(entry)
+
+    def summary(self) -> Dict[str, Any]:
+        """Status view of the run without the generated content"""
+        return {
+            "task_id": self.task_id,
+            "status": self.results["status"],
+            "sheet_id": self.sheet_id,
+            "resumed": self.resumed,
+            "incremental": self.incremental,
+            "created_at": self.created_at,
+            "start_time": self.results.get("start_time"),
+            "end_time": self.results.get("end_time"),
+            "counts": {
+                key: len(self.results[key] or [])
+                for key in ("spreadsheet_data", "blog_posts", "tweets", "linkedin_posts")
+            },
+            "errors": self.results["errors"]
+        }
+
+
+class TaskRegistry:
+    """Tracks runs by task id and caps how many execute at once
+
+    Only the most recent `max_finished_tasks` finished runs are kept; older
+    ones are forgotten (a checkpointed task can still be resumed).
+    """
+
+    def __init__(self, max_concurrent_tasks: Optional[int] = None, max_finished_tasks: Optional[int] = None):
+        self.max_concurrent_tasks = max_concurrent_tasks or int(os.getenv("MAX_CONCURRENT_TASKS", "2"))
+        self.max_finished_tasks = (
+            max_finished_tasks if max_finished_tasks is not None else int(os.getenv("MAX_FINISHED_TASKS", "100"))
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self._contexts: Dict[str, RunContext] = {}
+        self._handles: Dict[str, asyncio.Task] = {}
+        TASKS.track(lambda: self._count_active("queued"), state="queued")
+        TASKS.track(lambda: self.running_count() - self._count_active("queued"), state="running")
+
+    def create(self, task_id: str, replace: bool = False, **params) -> RunContext:
+        """Register a new run context for a task id; `replace` starts a fresh attempt of a finished task"""
+        if task_id in self._contexts:
+            if not replace:
+                raise ValueError(f"Task {task_id} already exists")
+            if self.is_active(task_id):
+                raise ValueError(f"Task {task_id} is still running")
+        context = RunContext(task_id, **params)
+        # A fresh attempt counts as the newest task
+        self._contexts.pop(task_id, None)
+        self._handles.pop(task_id, None)
+        self._contexts[task_id] = context
+        self._prune()
+        return context
+
+    def get(self, task_id: str) -> Optional[RunContext]:
+        """Look up a task's run context"""
+        return self._contexts.get(task_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of every known task"""
+        return [context.summary() for context in self._contexts.values()]
+
+    def is_active(self, task_id: str) -> bool:
+        """Whether the task is queued or running"""
+        handle = self._handles.get(task_id)
+        return handle is not None and not handle.done()
+
+    def running_count(self) -> int:
+        """Number of tasks that have not finished yet"""
+        return sum(1 for handle in self._handles.values() if not handle.done())
+
+    def _prune(self):
+        """Forget the oldest finished runs beyond `max_finished_tasks`"""
+        finished = [task_id for task_id, handle in self._handles.items() if handle.done()]
+        for task_id in finished[:max(0, len(finished) - self.max_finished_tasks)]:
+            del self._handles[task_id]
+            del self._contexts[task_id]
+
+    def _count_active(self, status: str) -> int:
+        return sum(
+            1 for task_id, handle in self._handles.items()
+            if not handle.done() and self._contexts[task_id].results["status"] == status
+        )
+
+    def submit(self, context: RunContext, runner: Callable[[RunContext], Awaitable[Any]]) -> asyncio.Task:
+        """Schedule a run; it waits for a free slot if the concurrency cap is reached"""
+        context.results["status"] = "queued"
+        handle = asyncio.create_task(self._run(context, runner))
+        self._handles[context.task_id] = handle
+        handle.add_done_callback(lambda _: self._prune())
+        return handle
+
+    async def _run(self, context: RunContext, runner: Callable[[RunContext], Awaitable[Any]]):
+        """Hold a concurrency slot for the duration of the run"""
+        async with self._semaphore:
+            logger.info(f"Task {context.task_id} acquired a run slot")
+            context.results["status"] = "running"
+            try:
+                await runner(context)
+            except Exception as e:
+                logger.error(f"Task {context.task_id} crashed: {str(e)}")
+                context.results["status"] = "failed"
+                context.add_error("task", e)
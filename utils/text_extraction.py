@@ -0,0 +1,171 @@
+import os
+import re
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "20000"))
+
+# Elements that never hold article content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form",
+                    "nav", "header", "footer", "aside", "button", "select"]
+# class/id fragments of navigation, cookie banners, share bars and similar chrome
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|consent|banner|breadcrumb|sidebar|menu|navbar|footer|header|share|social|"
+    r"related|comment|advert|promo|newsletter|subscribe|popup|modal",
+    re.IGNORECASE
+)
+# A main-content candidate shorter than this falls back to the whole page text
+MIN_CONTENT_CHARS = 200
+
+
+def extract_main_text(html: str, max_chars: int = EXTRACT_MAX_CHARS) -> Dict[str, Any]:
+    """Title and main-content text of an HTML page, capped at max_chars
+
+    Runs in extraction worker processes, so it must stay a module-level
+    function of plain arguments.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    for element in soup.find_all(_is_boilerplate):
+        # Nested matches go away with their ancestor
+        if not element.decomposed:
+            element.decompose()
+
+    text = _main_content(soup)
+    text = re.sub(r"\s+", " ", text).strip()
+    return {"title": title, "text": text[:max_chars], "truncated": len(text) > max_chars}
+
+
+def _is_boilerplate(element: Any) -> bool:
+    if element.name in ("html", "body", "main", "article"):
+        return False
+    attributes = " ".join(element.get("class") or []) + " " + (element.get("id") or "")
+    return bool(attributes.strip()) and bool(BOILERPLATE_PATTERN.search(attributes))
+
+
+def _main_content(soup: BeautifulSoup) -> str:
+    """Text of the element most likely to hold the article"""
+    for candidate in (soup.find("article"), soup.find("main"), soup.find(attrs={"role": "main"})):
+        if candidate is not None:
+            text = candidate.get_text(" ", strip=True)
+            if len(text) >= MIN_CONTENT_CHARS:
+                return text
+
+    # Otherwise the container whose direct paragraphs carry the most text
+    scores: Dict[int, int] = {}
+    containers: Dict[int, Any] = {}
+    for paragraph in soup.find_all("p"):
+        parent = paragraph.parent
+        if parent is None:
+            continue
+        scores[id(parent)] = scores.get(id(parent), 0) + len(paragraph.get_text(strip=True))
+        containers[id(parent)] = parent
+    if scores:
+        best = containers[max(scores, key=scores.get)]
+        text = best.get_text(" ", strip=True)
+        if len(text) >= MIN_CONTENT_CHARS:
+            return text
+
+    body = soup.body or soup
+    return body.get_text(" ", strip=True)
+
+
+def _process_context() -> Any:
+    # Forking the threaded server process can deadlock the child; forkserver
+    # forks workers from a clean single-threaded process instead
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class TextExtractor:
+    """HTML-to-text stage that parses fetched documents in a process pool
+
+    BeautifulSoup parsing is CPU-bound and would hold the event loop (and
+    the GIL) that serves the API, so pages are parsed in worker processes.
+    Non-HTML documents are only capped, and failed fetches pass through.
+    """
+
+    def __init__(self, max_workers: int = EXTRACT_WORKERS, max_chars: int = EXTRACT_MAX_CHARS):
+        self.max_workers = max_workers
+        self.max_chars = max_chars
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_process_context())
+            logger.info(f"Started text extraction pool with {self.max_workers} processes")
+        return self._pool
+
+    async def extract_stream(self, documents: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each document with its extracted text as soon as it is ready"""
+        loop = asyncio.get_running_loop()
+        pending = []
+        for document in documents:
+            if document.get("status") != "fetched":
+                yield document
+            elif "html" in document.get("content_type", ""):
+                pending.append(loop.create_task(self._extract_html(loop, document)))
+            else:
+                yield self._with_text(document, {"text": document["text"][:self.max_chars],
+                                                 "truncated": len(document["text"]) > self.max_chars})
+
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def extract_all(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Every document with extracted text, in completion order"""
+        return [document async for document in self.extract_stream(documents)]
+
+    async def _extract_html(self, loop: asyncio.AbstractEventLoop, document: Dict[str, Any]) -> Dict[str, Any]:
+        # A worker that dies (out of memory, parser crash) breaks the whole pool; the
+        # document gets one more try on a fresh pool
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                extracted = await loop.run_in_executor(pool, extract_main_text, document["text"], self.max_chars)
+            except BrokenProcessPool as e:
+                self._discard_pool(pool)
+                if attempt == 0:
+                    logger.warning(f"Text extraction pool broke while parsing {document['url']}; retrying on a new pool")
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            else:
+                return self._with_text(document, extracted)
+            logger.warning(f"Text extraction failed for {document['url']}: {str(error)}")
+            return {**document, "status": "failed", "error": f"Text extraction failed: {str(error)}", "text": ""}
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool so the next document starts a new one"""
+        if self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.warning("Text extraction pool broke; it will be restarted")
+
+    @staticmethod
+    def _with_text(document: Dict[str, Any], extracted: Dict[str, Any]) -> Dict[str, Any]:
+        # The raw markup is dropped; only the extracted text travels on
+        return {**document, **extracted, "extracted": True}
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
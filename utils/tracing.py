@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.metrics import PHASE_SECONDS
+from utils.model_proxy import ModelProxy, token_usage
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_PATH = os.getenv("TRACE_PATH", "traces/traces.jsonl")
+# Attribute strings longer than this are cut, so prompts never end up in the trace file whole
+TRACE_ATTRIBUTE_CHARS = 200
+
+# Span the current code runs under; executor threads inherit it with the rest of the context
+current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _attribute(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= TRACE_ATTRIBUTE_CHARS else text[:TRACE_ATTRIBUTE_CHARS] + "..."
+
+
+class Span:
+    """One timed operation within a task's trace; times are epoch seconds"""
+
+    def __init__(self, trace_id: str, name: str, kind: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, start: Optional[float] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {key: _attribute(value) for key, value in (attributes or {}).items()}
+        self.start = start if start is not None else time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def set(self, **attributes):
+        """Add attributes once they are known, e.g. token counts after a call"""
+        self.attributes.update({key: _attribute(value) for key, value in attributes.items()})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class Tracer:
+    """Collects the spans of each task's trace and exports them when the task's root span ends
+
+    Spans nest through a context variable, so anything started under a
+    task's root span (phases, agent runs on executor threads, tool and model
+    calls) joins that task's trace. Work outside any task is not traced.
+    """
+
+    def __init__(self, path: str = TRACE_PATH, enabled: bool = TRACING_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[Span]] = {}
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Open the root span of a new trace"""
+        if not self.enabled:
+            yield None
+            return
+        root = Span(uuid.uuid4().hex, name, "task", attributes=attributes)
+        with self._lock:
+            self._spans[root.trace_id] = []
+        try:
+            with self._activate(root):
+                yield root
+        except BaseException:
+            # A trace that never finishes normally is never exported, so do not keep its spans
+            self.pop(root.trace_id)
+            raise
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Optional[Span]]:
+        """Open a child span of the current span; a no-op outside a trace"""
+        parent = current_span.get()
+        if parent is None or not self.enabled:
+            yield None
+            return
+        span = Span(parent.trace_id, name, kind, parent.span_id, attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[None]:
+        token = current_span.set(span)
+        try:
+            yield
+        except BaseException as e:
+            span.status = "error"
+            span.error = _attribute(str(e) or type(e).__name__)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end = time.time()
+            self._finish(span)
+
+    def record(self, name: str, kind: str, start: float, end: float,
+               status: str = "ok", error: Optional[str] = None, **attributes) -> Optional[Span]:
+        """Add an already finished span under the current span
+
+        Finished spans of the same parent that fall inside its time window
+        (the model and tool calls of an agent step, reported only once the
+        step is over) become its children.
+        """
+        parent = current_span.get()
+        if parent is None or not self.enabled:
+            return None
+        span = Span(parent.trace_id, name, kind, parent.span_id, attributes, start=start)
+        span.end = end
+        span.status = status
+        span.error = _attribute(error) if error else None
+        with self._lock:
+            for other in self._spans.get(span.trace_id, []):
+                if other.parent_id == parent.span_id and other.start >= start and other.end <= end:
+                    other.parent_id = span.span_id
+        self._finish(span)
+        return span
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._spans.get(span.trace_id)
+            if spans is None:
+                # The trace already ended, e.g. a cancelled task still unwinding on a thread
+                return
+            spans.append(span)
+
+    def pop(self, trace_id: str) -> List[Span]:
+        """Take a finished trace's spans out of memory"""
+        with self._lock:
+            return self._spans.pop(trace_id, [])
+
+    def export(self, spans: List[Dict[str, Any]]):
+        """Append exported spans to the JSONL trace file, one span per line"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chain of spans that determined a trace's end-to-end time, with the time each held it
+
+    Starting from the root, each span's critical children are found by
+    walking back from its end: the child that finished last, then the child
+    that finished last before that one started, and so on. A span's self
+    time on the path is its duration minus that of its critical children;
+    it is the time nothing deeper explains (waiting, code between calls).
+    Also totals the trace's phase span time per phase and its model calls
+    per agent, on or off the path.
+    """
+    if not spans:
+        return {"duration_seconds": 0.0, "spans": 0, "path": [], "by_kind": {}, "phase_seconds": {}, "model_calls": {}}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span["parent_id"], []).append(span)
+    # Spans whose parent never finished (work orphaned by a failed stage) are not on any path
+    root = next(span for span in spans if span["parent_id"] is None)
+
+    path = []
+    by_kind: Dict[str, float] = {}
+
+    def walk(span: Dict[str, Any], depth: int):
+        cursor = span["end"]
+        chosen = []
+        candidates = sorted(children.get(span["span_id"], []), key=lambda child: child["end"], reverse=True)
+        for child in candidates:
+            if child["end"] <= cursor + 1e-6:
+                chosen.append(child)
+                cursor = child["start"]
+        chosen.reverse()
+        self_seconds = max(0.0, span["duration"] - sum(child["duration"] for child in chosen))
+        path.append({
+            "name": span["name"],
+            "kind": span["kind"],
+            "depth": depth,
+            "seconds": round(span["duration"], 4),
+            "self_seconds": round(self_seconds, 4),
+            "status": span["status"],
+            "attributes": span["attributes"]
+        })
+        by_kind[span["kind"]] = by_kind.get(span["kind"], 0.0) + self_seconds
+        for child in chosen:
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    phase_seconds: Dict[str, float] = {}
+    model_calls: Dict[str, int] = {}
+    for span in spans:
+        if span["kind"] == "phase":
+            name = span["attributes"].get("phase", span["name"])
+            phase_seconds[name] = phase_seconds.get(name, 0.0) + span["duration"]
+        elif span["kind"] == "model":
+            agent = span["attributes"].get("agent", "")
+            model_calls[agent] = model_calls.get(agent, 0) + 1
+    return {
+        "trace_id": root["trace_id"],
+        "name": root["name"],
+        "duration_seconds": round(root["duration"], 4),
+        "spans": len(spans),
+        "path": path,
+        "by_kind": {kind: round(seconds, 4) for kind, seconds in sorted(by_kind.items(), key=lambda item: -item[1])},
+        "phase_seconds": {name: round(seconds, 4) for name, seconds in phase_seconds.items()},
+        "model_calls": model_calls
+    }
+
+
+def render_critical_path(summary: Dict[str, Any]) -> str:
+    """Critical-path summary as indented text, one span per line"""
+    lines = [f"{summary.get('name', 'trace')}: {summary['duration_seconds']:.2f}s over {summary['spans']} spans"]
+    for step in summary["path"]:
+        label = step["attributes"].get("agent") or step["attributes"].get("phase") or ""
+        lines.append(
+            f"{'  ' * step['depth']}{step['seconds']:9.2f}s  self {step['self_seconds']:8.2f}s  "
+            f"{step['name']}{f' [{label}]' if label else ''}{'' if step['status'] == 'ok' else ' (error)'}"
+        )
+    lines.append("Critical path self time by kind: " + ", ".join(
+        f"{kind} {seconds:.2f}s" for kind, seconds in summary["by_kind"].items()
+    ))
+    return "\n".join(lines)
+
+
+tracer = Tracer()
+
+
+@contextmanager
+def phase(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time an orchestration phase or pipeline stage into the phase histogram and trace it as a span"""
+    with PHASE_SECONDS.time(phase=name), tracer.span(f"phase.{name}", kind="phase", phase=name, **attributes) as span:
+        yield span
+
+
+def trace_tools(tools: List[Any]) -> List[Any]:
+    """Wrap each tool's forward in a tool span; tools are shared, so each is wrapped only once"""
+    for tool in tools:
+        forward = tool.forward
+        if getattr(forward, "_traced", False):
+            continue
+
+        @functools.wraps(forward)
+        def traced(*args, _forward=forward, _name=tool.name, **kwargs):
+            with tracer.span(f"tool.{_name}", kind="tool", tool=_name):
+                return _forward(*args, **kwargs)
+
+        traced._traced = True
+        tool.forward = traced
+    return tools
+
+
+def trace_agent_step(step: Any):
+    """CodeAgent step callback: records the finished step as a span under the agent run"""
+    if getattr(step, "step_number", None) is None:
+        # Planning and final-answer steps carry no step number
+        return
+    timing = getattr(step, "timing", None) or step
+    start = getattr(timing, "start_time", None)
+    end = getattr(timing, "end_time", None) or time.time()
+    if start is None:
+        return
+    error = getattr(step, "error", None)
+    tool_calls = [getattr(call, "name", str(call)) for call in (getattr(step, "tool_calls", None) or [])]
+    tracer.record(
+        "agent.step", "step", start, end,
+        status="error" if error else "ok",
+        error=str(error) if error else None,
+        step=step.step_number,
+        tool_calls=", ".join(tool_calls)
+    )
+
+
+class TracedModel(ModelProxy):
+    """Opens a model span around every call that reaches the model API"""
+
+    def __init__(self, wrapped: Any, agent_name: str):
+        super().__init__(wrapped)
+        self.agent_name = agent_name
+
+    def generate(self, messages: List[Any], **kwargs) -> Any:
+        with tracer.span("model.call", kind="model", agent=self.agent_name,
+                         model=getattr(self.wrapped, "model_id", "")) as span:
+            response = self._call_wrapped(messages, **kwargs)
+            if span is not None:
+                prompt_tokens, completion_tokens = token_usage(response, self.wrapped)
+                span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+            return response
+
+
+if __name__ == "__main__":
+    # python -m utils.tracing [trace file] [task id]: critical path of each (or one task's) trace
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACE_PATH
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            span = json.loads(line)
+            traces.setdefault(span["trace_id"], []).append(span)
+    for spans in traces.values():
+        roots = [span for span in spans if span["parent_id"] is None]
+        if len(sys.argv) > 2 and not any(root["attributes"].get("task_id") == sys.argv[2] for root in roots):
+            continue
+        print(render_critical_path(critical_path(spans)) + "\n")